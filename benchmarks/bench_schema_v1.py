@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Microbenchmark of the per-item overhead of :mod:`py2neo_compat.schema_v1`.
+
+Times building the URI for each item of a schema loop, as
+:func:`drop_constraint` and :class:`~py2neo_compat.batch_v1.BatchRequest`
+do, with warm caches and with the metadata & template caches invalidated
+before every item (the behaviour before they were added).  No server is
+needed; py2neo 1.6 or 2.0 is.
+
+Run with ``python benchmarks/bench_schema_v1.py [items]``.
+"""
+
+from __future__ import absolute_import, print_function
+
+import sys
+import timeit
+
+from py2neo_compat.schema_v1 import _schema_template, invalidate_graph_metadata
+
+
+class FakeGraph(object):
+    """Graph with v1.6-style metadata and no server."""
+
+    uri = 'http://localhost:7474/db/data/'
+
+    @property
+    def __metadata__(self):
+        return {'constraints': self.uri + 'schema/constraint',
+                'indexes': self.uri + 'schema/index'}
+
+
+def schema_loop(graph, items, cold):
+    for i in range(items):
+        if cold:
+            invalidate_graph_metadata(graph)
+        tpl = _schema_template(graph, 'constraints', label='label',
+                               property_key='key',
+                               constraint_type='uniqueness')
+        tpl.expand(label='label%d' % i, property_key='key')
+
+
+def main(items=1000, repeat=5):
+    graph = FakeGraph()
+    for name, cold in [('uncached', True), ('cached', False)]:
+        best = min(timeit.repeat(lambda: schema_loop(graph, items, cold),
+                                 number=1, repeat=repeat))
+        print('%-8s %8.1f us/item' % (name, best / items * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
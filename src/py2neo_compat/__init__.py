@@ -9,3 +9,12 @@ __email__ = 'wcooley@nakedape.cc'
 
 from .py2neo_compat import *
 from .util import foremost as foremost
+from .cancel import CancellationToken, QueryCancelled, QueryTimeout
+from .retry import RetryPolicy, is_transient
+from .bulk import (
+    delete_all, delete_rels, delete_rels_where, exists_many, expand,
+    find_many, get_nodes, get_rels, pull_all, push_all,
+)
+from .paging import iter_find, iter_match
+from .transactions import cypher_execute_many, transaction
+from .writebehind import WriteBehindQueue
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Vectorised graph algorithms over a local :class:`~.snapshot.Snapshot`.
+
+Requires :mod:`numpy` (the ``analytics`` extra).
+
+Every algorithm returns an array parallel to :attr:`Snapshot.node_ids`,
+which :func:`write_back` can store on the server as a node property.
+Nodes deleted by :func:`~.snapshot.refresh` but not yet compacted keep
+their index with no relationships, so have degree 0, rank 0 and a
+component of their own.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Tuple, Union  # noqa
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+import numpy as np
+
+from .batching import AdaptiveBatcher, as_batcher
+from .py2neo_compat import Graph, cypher_execute
+from .snapshot import Snapshot
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+def _edges(snap, direction='out'):
+    # type: (Snapshot, str) -> Tuple[np.ndarray, np.ndarray]
+    """Start & end node indexes of every relationship, in *direction*."""
+    starts, ends, _ = snap.edges()
+    if direction == 'out':
+        return starts, ends
+    elif direction == 'in':
+        return ends, starts
+    elif direction == 'both':
+        return np.concatenate([starts, ends]), np.concatenate([ends, starts])
+    raise ValueError('Invalid direction="%s"' % direction)
+
+
+def degree(snap, direction='out'):
+    # type: (Snapshot, str) -> np.ndarray
+    """Number of relationships of each node in *direction*."""
+    starts, _ = _edges(snap, direction)
+    return np.bincount(starts, minlength=snap.num_nodes)
+
+
+def pagerank(snap, damping=0.85, tol=1e-6, max_iter=100):
+    # type: (Snapshot, float, float, int) -> np.ndarray
+    """PageRank by power iteration; the ranks of live nodes sum to 1.
+
+    Rank of nodes without outgoing relationships is spread evenly over all
+    live nodes.
+    """
+    n = snap.num_nodes
+    alive = snap.node_alive
+    n_live = int(alive.sum())
+    if n_live == 0:
+        return np.zeros(n)
+
+    starts, ends = _edges(snap)
+    out_degree = np.bincount(starts, minlength=n)
+    dangling = (out_degree == 0) & alive
+    # Avoid dividing by zero; dangling nodes have no edges to weight anyway
+    weights = 1.0 / np.where(out_degree == 0, 1, out_degree)
+
+    rank = np.where(alive, 1.0 / n_live, 0.0)
+    for iteration in range(max_iter):
+        flow = np.bincount(ends, weights=(rank * weights)[starts], minlength=n)
+        new_rank = np.where(alive, (1 - damping) / n_live + damping * (
+            flow + rank[dangling].sum() / n_live), 0.0)
+        delta = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if delta < tol:
+            log.debug('pagerank converged iterations=%d', iteration + 1)
+            break
+    return rank
+
+
+def connected_components(snap):
+    # type: (Snapshot) -> np.ndarray
+    """Weakly-connected component of each node.
+
+    Components are numbered by the smallest node index they contain, using
+    min-label propagation with pointer jumping.
+    """
+    labels = np.arange(snap.num_nodes, dtype=np.int64)
+    starts, ends = _edges(snap)
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, ends, labels[starts])
+        np.minimum.at(labels, starts, labels[ends])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def khop_counts(snap, k, direction='out', batch_size=256):
+    # type: (Snapshot, int, str, int) -> np.ndarray
+    """Number of distinct other nodes reachable within *k* hops of each node.
+
+    Reachability is computed for *batch_size* source nodes at a time with a
+    few boolean matrices, so memory use is about
+    ``batch_size * (3 * num_nodes + num_rels)`` bytes.
+    """
+    n = snap.num_nodes
+    starts, ends = _edges(snap, direction)
+    order = np.argsort(ends, kind='stable')
+    starts, ends = starts[order], ends[order]
+    targets, offsets = np.unique(ends, return_index=True)
+
+    counts = np.zeros(n, dtype=np.int64)
+    for lo in range(0, n, batch_size):
+        rows = np.arange(lo, min(lo + batch_size, n))
+        reached = np.zeros((len(rows), n), dtype=bool)
+        reached[np.arange(len(rows)), rows] = True
+        frontier = reached.copy()
+        for _ in range(k):
+            if not len(targets) or not frontier.any():
+                break
+            hit = np.zeros_like(reached)
+            hit[:, targets] = np.logical_or.reduceat(frontier[:, starts],
+                                                     offsets, axis=1)
+            frontier = hit & ~reached
+            reached |= frontier
+        counts[rows] = reached.sum(axis=1) - 1
+    return counts
+
+
+def write_back(graph, snap, property_key, values, batch_size=1000):
+    # type: (Graph, Snapshot, str, np.ndarray, Union[int, AdaptiveBatcher]) -> None
+    """Set *property_key* on each snapshot node to its entry in *values*.
+
+    Nodes are updated *batch_size* (an int or an
+    :class:`~py2neo_compat.batching.AdaptiveBatcher`) at a time with
+    ``UNWIND``.
+
+    :raises ValueError: If *values* is not parallel to the snapshot nodes.
+    """
+    values = np.asarray(values)
+    if len(values) != snap.num_nodes:
+        raise ValueError('Expected %d values, got %d'
+                         % (snap.num_nodes, len(values)))
+
+    # language=cypher
+    query = """
+        UNWIND {rows} AS row
+        MATCH (n)
+        WHERE ID(n) = row.id
+        SET n.`%s` = row.value
+    """ % property_key
+
+    rows = [{'id': i, 'value': v}
+            for i, v in zip(snap.node_ids.tolist(), values.tolist())]
+
+    def write_batch(batch):
+        log.debug('write_back property_key="%s" batch=%d',
+                  property_key, len(batch))
+        cypher_execute(graph, query, rows=batch)
+
+    as_batcher(batch_size).run(rows, write_batch)
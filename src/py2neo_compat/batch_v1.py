@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Requests to the Neo4j REST batch endpoint (``/db/data/batch``).
+
+py2neo 1.6 & 2.0 only; like :mod:`py2neo_compat.schema_v1`, this uses the
+``py2neo.packages.httpstream`` plumbing which 2021 no longer has.
+
+A :class:`BatchRequest` collects jobs and submits them as one HTTP request,
+which the server runs in one transaction: if any job fails, none of them
+take effect.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Any, Dict, Iterable, List, Mapping, Optional, Union  # noqa
+    NodeRef = Union['Node', int, str]
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+import six
+from py2neo.packages.httpstream import Resource
+
+from .py2neo_compat import Graph, Node, Relationship
+from .schema_v1 import _schema_template, graph_metadata
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+class BatchRequest(object):
+    """Builder for a single request to the REST batch endpoint.
+
+    Each method adds a job and returns its job ID.  A job ID can be used in
+    place of a node in later jobs of the same batch, e.g. to relate nodes
+    created by the batch.
+    """
+
+    def __init__(self, graph):
+        # type: (Graph) -> None
+        self.graph = graph
+        self.jobs = []  # type: List[Dict[str, Any]]
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def _relative(self, uri):
+        # type: (Any) -> str
+        """*uri* relative to the service root, as the batch API wants."""
+        uri = str(uri)
+        root = str(self.graph.uri).rstrip('/')
+        if uri.startswith(root):
+            uri = uri[len(root):]
+        return uri
+
+    def _node_uri(self, node):
+        # type: (NodeRef) -> str
+        """URI of a node, node ID or job ID for use within the batch."""
+        if isinstance(node, six.string_types):  # From job_ref
+            return node
+        if isinstance(node, Node):
+            node = node._id
+        return '/node/%d' % node
+
+    def append(self, method, to, body=None):
+        # type: (str, Any, Any) -> int
+        """Add a job requesting *method* on *to*, returning its job ID."""
+        job = {'method': method, 'to': self._relative(to),
+               'id': len(self.jobs)}
+        if body is not None:
+            job['body'] = body
+        self.jobs.append(job)
+        return job['id']
+
+    @staticmethod
+    def job_ref(job_id):
+        # type: (int) -> str
+        """Reference to the entity created by job *job_id*."""
+        return '{%d}' % job_id
+
+    def create_node(self, properties=None, labels=()):
+        # type: (Optional[Mapping[str, Any]], Iterable[str]) -> int
+        """Create a node; returns the job ID creating the node."""
+        job_id = self.append('POST', '/node', dict(properties or {}))
+        labels = list(labels)
+        if labels:
+            self.append('POST', self.job_ref(job_id) + '/labels', labels)
+        return job_id
+
+    def create_rel(self, start_node, rel_type, end_node, properties=None):
+        # type: (NodeRef, str, NodeRef, Optional[Mapping[str, Any]]) -> int
+        """Create a relationship between nodes, node IDs or job references."""
+        return self.append('POST',
+                           self._node_uri(start_node) + '/relationships',
+                           {'to': self._node_uri(end_node),
+                            'type': rel_type,
+                            'data': dict(properties or {})})
+
+    def delete_node(self, node):
+        # type: (Union[Node, int]) -> int
+        """Delete a node, which must have no relationships."""
+        return self.append('DELETE', self._node_uri(node))
+
+    def delete_rel(self, rel):
+        # type: (Union[Relationship, int]) -> int
+        """Delete a relationship."""
+        if isinstance(rel, Relationship):
+            rel = rel._id
+        return self.append('DELETE', '/relationship/%d' % rel)
+
+    def create_index(self, label, property_key):
+        # type: (str, str) -> int
+        tpl = _schema_template(self.graph, 'indexes', label=label)
+        # The label-only template has a trailing slash
+        return self.append('POST', str(tpl.expand(label=label)).rstrip('/'),
+                           {'property_keys': [property_key]})
+
+    def drop_index(self, label, property_key):
+        # type: (str, str) -> int
+        tpl = _schema_template(self.graph, 'indexes', label=label,
+                               property_key=property_key)
+        return self.append('DELETE', tpl.expand(label=label,
+                                                property_key=property_key))
+
+    def create_constraint(self, constraint_type, label, property_key):
+        # type: (str, str, str) -> int
+        tpl = _schema_template(self.graph, 'constraints', label=label,
+                               constraint_type=constraint_type)
+        return self.append('POST', tpl.expand(label=label),
+                           {'property_keys': [property_key]})
+
+    def drop_constraint(self, constraint_type, label, property_key):
+        # type: (str, str, str) -> int
+        tpl = _schema_template(self.graph, 'constraints', label=label,
+                               property_key=property_key,
+                               constraint_type=constraint_type)
+        return self.append('DELETE', tpl.expand(label=label,
+                                                property_key=property_key))
+
+    def submit(self):
+        # type: () -> List[Dict[str, Any]]
+        """Send all jobs in one request and clear them.
+
+        :return: The server's response for each job, in job ID order; each
+            has the ``status``, and where applicable the ``body`` and
+            ``location`` of the job's result.
+        """
+        if not self.jobs:
+            return []
+        jobs, self.jobs = self.jobs, []
+        log.debug('submitting batch jobs=%d', len(jobs))
+        resource = Resource(graph_metadata(self.graph, 'batch'))
+        responses = resource.post(jobs).content
+        return sorted(responses, key=lambda response: response['id'])
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Batch sizes adapted to observed latency.
+
+An :class:`AdaptiveBatcher` runs batches of work, timing each one, and
+resizes the next batch so that it should take about *target_latency*
+seconds: larger when the server is quiet, smaller when it is busy.  Errors
+shrink the batch size; after an overload (see :func:`is_overload`) the
+failed batch is also split and run again.
+
+Pass one as the *batch_size* of the :mod:`py2neo_compat.bulk` helpers, and
+reuse it across calls so it keeps what it has learnt.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import threading
+import time
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Any, Callable, List, Optional, Sequence, TypeVar, Union  # noqa
+    T = TypeVar('T')
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+from .cancel import CancellationToken, QueryTimeout
+from .metrics import Metrics, registry
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+def is_overload(error):
+    # type: (BaseException) -> bool
+    """Whether *error* suggests the batch was too large.
+
+    True for :class:`MemoryError`,
+    :class:`~py2neo_compat.cancel.QueryTimeout` and server out-of-memory or
+    transaction memory limit errors, whether reported with a status code
+    (2.0 & 2021) or a Java exception name (1.6 & 2.0).
+    """
+    if isinstance(error, (MemoryError, QueryTimeout)):
+        return True
+    names = [cls.__name__ for cls in type(error).__mro__]
+    for attr in ('code', 'exception', 'fullname'):
+        value = getattr(error, attr, None)
+        if isinstance(value, str):
+            names.append(value)
+    return any('OutOfMemory' in name or 'MemoryLimit' in name
+               for name in names)
+
+
+class AdaptiveBatcher(object):
+    """Batch size steered towards a target latency per batch.
+
+    After each batch the size is set to the number of items which would
+    have taken *target_latency* at the batch's rate, changing by at most a
+    factor of *max_growth* at a time.  After an error it is multiplied by
+    *backoff*.  The size stays between *minimum* and *maximum*.
+
+    Thread-safe, so one batcher may be shared by parallel workers.
+
+    With a *name*, the current size is reported as the gauge
+    ``batch.<name>.size`` and back-offs counted as ``batch.<name>.backoffs``
+    in *metrics*.
+
+    :param int initial: Starting batch size.
+    :param int minimum: Smallest batch size.
+    :param int maximum: Largest batch size.
+    :param float target_latency: Wanted seconds per batch.
+    :param float backoff: Factor applied to the size after an error.
+    :param float max_growth: Largest factor by which one batch may change
+        the size.
+    :param str name: (optional) Name to report metrics under.
+    :param Metrics metrics: (optional) Default
+        :data:`py2neo_compat.metrics.registry`.
+    """
+
+    def __init__(self, initial=1000, minimum=1, maximum=50000,
+                 target_latency=1.0, backoff=0.5, max_growth=2.0, name=None,
+                 metrics=None, clock=time.monotonic):
+        # type: (int, int, int, float, float, float, Optional[str], Optional[Metrics], Callable[[], float]) -> None
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.max_growth = max_growth
+        self.name = name
+        self.metrics = registry if metrics is None else metrics
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.size = 0
+        self._resize(initial)
+
+    @classmethod
+    def fixed(cls, size):
+        # type: (int) -> AdaptiveBatcher
+        """Batcher which always uses *size*."""
+        return cls(size, minimum=size, maximum=size)
+
+    def _resize(self, size):
+        # type: (float) -> None
+        self.size = int(max(self.minimum, min(self.maximum, size)))
+        if self.name is not None:
+            self.metrics.set('batch.%s.size' % self.name, self.size)
+
+    def record(self, count, elapsed):
+        # type: (int, float) -> None
+        """Adjust the size after *count* items took *elapsed* seconds."""
+        if count <= 0 or elapsed <= 0:
+            return
+        with self._lock:
+            wanted = count * self.target_latency / elapsed
+            self._resize(max(self.size / self.max_growth,
+                             min(self.size * self.max_growth, wanted)))
+
+    def failed(self, error=None):
+        # type: (Optional[BaseException]) -> None
+        """Shrink the size after an error."""
+        with self._lock:
+            self._resize(self.size * self.backoff)
+        if self.name is not None:
+            self.metrics.incr('batch.%s.backoffs' % self.name)
+        log.debug('batch backoff name=%s size=%d: %r',
+                  self.name, self.size, error)
+
+    def _call(self, func, arg, batch_len, cancel=None):
+        """Call ``func(arg)`` for a batch of *batch_len* items.
+
+        :return: ``(done, result, elapsed)``; *done* is false after an
+            overload if the batch can be made smaller, to be retried.
+        """
+        start = self.clock()
+        try:
+            result = func(arg)
+        except Exception as excp:  # pylint: disable=broad-except
+            if cancel is not None and cancel.cancelled:
+                # The operation's own timeout, not the server's
+                raise
+            self.failed(excp)
+            if is_overload(excp) and self.size < batch_len:
+                return False, None, None
+            raise
+        return True, result, self.clock() - start
+
+    def run(self, items, func, cancel=None):
+        # type: (Sequence[T], Callable[[List[T]], Any], Optional[CancellationToken]) -> List[Any]
+        """Call ``func(batch)`` for consecutive batches of *items*.
+
+        *func* must be safe to run again for a batch which failed.  Once
+        *cancel* (the token *func* queries with, if any) is cancelled, an
+        error is raised rather than treated as an overload.
+
+        :return: The result of each successful call.
+        """
+        items = list(items)
+        results = []
+        start = 0
+        while start < len(items):
+            batch = items[start:start + self.size]
+            done, result, elapsed = self._call(func, batch, len(batch),
+                                               cancel)
+            if done:
+                self.record(len(batch), elapsed)
+                results.append(result)
+                start += len(batch)
+        return results
+
+    def repeat(self, func, cancel=None):
+        # type: (Callable[[int], int], Optional[CancellationToken]) -> int
+        """Call ``func(size)`` until it returns less than *size*.
+
+        For work which the server batches itself, e.g. a query with
+        ``LIMIT {size}`` which returns how many entities it processed.
+        *func* must be safe to run again after failing.  *cancel* is as for
+        :meth:`run`.
+
+        :return: Total of the counts returned.
+        """
+        total = 0
+        while True:
+            size = self.size
+            done, count, elapsed = self._call(func, size, size, cancel)
+            if not done:
+                continue
+            total += count
+            if count < size:
+                # The last batch, whose rate says little
+                return total
+            self.record(count, elapsed)
+
+
+def as_batcher(batch_size):
+    # type: (Union[int, AdaptiveBatcher]) -> AdaptiveBatcher
+    """*batch_size* if a batcher, else a fixed batcher of that size."""
+    if isinstance(batch_size, AdaptiveBatcher):
+        return batch_size
+    return AdaptiveBatcher.fixed(batch_size)
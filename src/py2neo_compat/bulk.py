@@ -0,0 +1,642 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Batched, cross-version alternatives to per-entity operations."""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import numbers
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import (
+        Any, Callable, Dict, FrozenSet, Hashable, Iterable, List,  # noqa
+        NamedTuple, Optional, Tuple, Union,
+    )
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+from .batching import AdaptiveBatcher, as_batcher
+from .cancel import CancellationToken, cancel_kwargs
+from .py2neo_compat import (
+    Graph, Node, Relationship, _canonical, call_with_retry, copy_entity_state,
+    cypher_execute, cypher_stream, entity_key, entity_state, identity_map,
+    mark_entity_pushed,
+)
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+CancelKwargs = Dict[str, CancellationToken]
+
+FindManyResult = NamedTuple('FindManyResult', [
+    ('nodes', Dict[Hashable, Node]),
+    ('missing', List[Hashable]),
+])
+
+
+def find_many(graph, label, property_key, values, batch_size=1000,
+              timeout=None, cancel=None):
+    # type: (Graph, str, str, Iterable[Hashable], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> FindManyResult
+    """Find nodes by many values of one property.
+
+    The bulk counterpart of :meth:`Graph.find_one`: values are deduplicated
+    and looked up *batch_size* at a time with an ``IN`` list, which Neo4j
+    resolves with the schema index on *label*/*property_key* (see
+    :func:`py2neo_compat.schema.create_schema`) when there is one.
+
+    If several nodes share a value, an arbitrary one of them is returned.
+
+    :param Graph graph: Graph session/connection.
+    :param str label: Node label.
+    :param str property_key: Property to look up.
+    :param values: Property values to find.
+    :param batch_size: Maximum number of values per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Mapping of value to node, and the values (in input order)
+        for which no node was found.
+    :rtype: FindManyResult
+    """
+    wanted = list(OrderedDict.fromkeys(values))
+
+    # language=cypher
+    query = """
+        MATCH (n:`%s`)
+        WHERE n.`%s` IN {values}
+        RETURN n.`%s` AS value, n
+    """ % (label, property_key, property_key)
+
+    found = {}
+
+    def find_batch(batch):
+        log.debug('find_many label="%s" property_key="%s" batch=%d',
+                  label, property_key, len(batch))
+        for row in cypher_stream(graph, query, values=batch, **kwargs):
+            if row['value'] not in found:
+                found[row['value']] = _canonical(graph, row['n'])
+
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        as_batcher(batch_size).run(wanted, find_batch, kwargs.get('cancel'))
+
+    missing = [value for value in wanted if value not in found]
+    return FindManyResult(found, missing)
+
+
+_direction_patterns = {
+    'out': '(a)-[%s]->(b)',
+    'in': '(a)<-[%s]-(b)',
+    'both': '(a)-[%s]-(b)',
+}
+
+
+def _identity(entity_or_id):
+    # type: (Union[Node, Relationship, int]) -> int
+    if isinstance(entity_or_id, numbers.Integral):
+        return int(entity_or_id)  # numpy ints are not JSON-serializable
+    return entity_or_id._id
+
+
+def _identities(entities_or_ids):
+    # type: (Iterable[Union[Node, Relationship, int]]) -> List[int]
+    """Deduplicated IDs of entities (or IDs), in input order."""
+    return list(OrderedDict.fromkeys(_identity(e) for e in entities_or_ids))
+
+
+def _rel_pattern(var, rel_type):
+    # type: (str, Union[str, Iterable[str], None]) -> str
+    """Relationship pattern body for one type, any of several, or any."""
+    if not rel_type:
+        return var
+    if isinstance(rel_type, str):
+        rel_type = [rel_type]
+    return '%s:%s' % (var, '|'.join('`%s`' % t for t in rel_type))
+
+
+def expand(graph, nodes, rel_type=None, direction='out', limit_per_node=None,
+           batch_size=1000, timeout=None, cancel=None):
+    # type: (Graph, Iterable[Union[Node, int]], Union[str, Iterable[str], None], str, Optional[int], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> Dict[int, List[Tuple[Relationship, Node]]]
+    """Fetch the neighbours of many nodes at once.
+
+    The bulk counterpart of :meth:`Node.match_outgoing`, running one query
+    per *batch_size* nodes rather than one per node.
+
+    :param Graph graph: Graph session/connection.
+    :param nodes: Nodes (or node IDs) to expand.
+    :param rel_type: (optional) Only follow relationships of this type, or
+        of any of these types.
+    :param str direction: ``'out'``, ``'in'`` or ``'both'``.
+    :param int limit_per_node: (optional) Maximum neighbours per node.
+    :param batch_size: Maximum number of nodes per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Mapping of node ID to a list of ``(relationship, neighbour)``
+        pairs, with an entry (possibly empty) for every node given.
+    """
+    try:
+        pattern = _direction_patterns[direction]
+    except KeyError:
+        raise ValueError('Invalid direction="%s"' % direction)
+    pattern %= _rel_pattern('r', rel_type)
+
+    if limit_per_node is None:
+        # language=cypher
+        query = """
+            MATCH %s
+            WHERE ID(a) IN {ids}
+            RETURN ID(a) AS start, r, b
+        """ % pattern
+    else:
+        # language=cypher
+        query = """
+            MATCH %s
+            WHERE ID(a) IN {ids}
+            WITH a, collect([r, b])[..{limit}] AS pairs
+            UNWIND pairs AS pair
+            RETURN ID(a) AS start, pair[0] AS r, pair[1] AS b
+        """ % pattern
+
+    ids = _identities(nodes)
+    adjacency = OrderedDict((node_id, []) for node_id in ids)
+
+    def expand_batch(batch):
+        log.debug('expand direction="%s" rel_type="%s" batch=%d',
+                  direction, rel_type, len(batch))
+        pairs = [(row['start'],
+                  (_canonical(graph, row['r']), _canonical(graph, row['b'])))
+                 for row in cypher_stream(graph, query, ids=batch,
+                                          limit=limit_per_node, **kwargs)]
+        # Only once read in full, in case the batch is run again
+        for start, pair in pairs:
+            adjacency[start].append(pair)
+
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        as_batcher(batch_size).run(ids, expand_batch, kwargs.get('cancel'))
+
+    return adjacency
+
+
+def _split_entities(entities):
+    # type: (Iterable[Union[Node, Relationship]]) -> Tuple[List[Node], List[Relationship]]
+    """Separate nodes from relationships, dropping duplicates."""
+    nodes, rels = OrderedDict(), OrderedDict()
+    for entity in entities:
+        group = rels if isinstance(entity, Relationship) else nodes
+        group.setdefault(entity._id, entity)
+    return list(nodes.values()), list(rels.values())
+
+
+_entity_patterns = {
+    'node': '(e)',
+    'rel': '()-[e]->()',
+}
+
+
+def _kind_pattern(kind):
+    # type: (str) -> str
+    try:
+        return _entity_patterns[kind]
+    except KeyError:
+        raise ValueError('Invalid kind="%s"' % kind)
+
+
+def exists_many(graph, identities, kind='node', batch_size=1000,
+                timeout=None, cancel=None):
+    # type: (Graph, Iterable[int], str, Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> List[bool]
+    """Check whether many node (or relationship) IDs exist on the server.
+
+    :param Graph graph: Graph session/connection.
+    :param identities: Node or relationship IDs.
+    :param str kind: ``'node'`` or ``'rel'``.
+    :param batch_size: Maximum number of IDs per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Whether each ID exists, in input order.
+    """
+    identities = list(identities)
+    # language=cypher
+    query = 'MATCH %s WHERE ID(e) IN {ids} RETURN ID(e) AS id' \
+        % _kind_pattern(kind)
+
+    found = set()
+
+    def exists_batch(batch):
+        found.update(row['id'] for row in cypher_stream(graph, query,
+                                                        ids=batch, **kwargs))
+
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        as_batcher(batch_size).run(_identities(identities), exists_batch,
+                                   kwargs.get('cancel'))
+    return [identity in found for identity in identities]
+
+
+def _get_entities(graph, kind, identities, batch_size, timeout, cancel):
+    # type: (Graph, str, Iterable[int], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> List[Optional[Union[Node, Relationship]]]
+    identities = list(identities)
+    imap = identity_map(graph)
+    loaded = {}
+    if imap is not None:
+        for identity in identities:
+            entity = imap.get((kind, identity))
+            if entity is not None:
+                loaded[identity] = entity
+
+    # language=cypher
+    query = 'MATCH %s WHERE ID(e) IN {ids} RETURN ID(e) AS id, e' \
+        % _kind_pattern(kind)
+    wanted = [i for i in _identities(identities) if i not in loaded]
+
+    def get_batch(batch):
+        log.debug('get kind="%s" batch=%d', kind, len(batch))
+        for row in cypher_stream(graph, query, ids=batch, **kwargs):
+            loaded[row['id']] = _canonical(graph, row['e'])
+
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        as_batcher(batch_size).run(wanted, get_batch, kwargs.get('cancel'))
+
+    return [loaded.get(identity) for identity in identities]
+
+
+def get_nodes(graph, identities, batch_size=1000, timeout=None, cancel=None):
+    # type: (Graph, Iterable[int], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> List[Optional[Node]]
+    """Load many nodes by ID.
+
+    IDs with a fresh copy in the graph's identity map are not queried.
+
+    :param Graph graph: Graph session/connection.
+    :param identities: Node IDs.
+    :param batch_size: Maximum number of IDs per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Nodes in input order, with *None* for missing IDs.
+    """
+    return _get_entities(graph, 'node', identities, batch_size, timeout,
+                         cancel)
+
+
+def get_rels(graph, identities, batch_size=1000, timeout=None, cancel=None):
+    # type: (Graph, Iterable[int], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> List[Optional[Relationship]]
+    """Load many relationships by ID; as for :func:`get_nodes`."""
+    return _get_entities(graph, 'rel', identities, batch_size, timeout,
+                         cancel)
+
+
+def pull_all(graph, entities, batch_size=1000, timeout=None, cancel=None):
+    # type: (Graph, Iterable[Union[Node, Relationship]], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> List[Union[Node, Relationship]]
+    """Pull many nodes and relationships from the server.
+
+    The bulk counterpart of ``pull()``, costing one query per *batch_size*
+    nodes or relationships.  Like ``pull()``, the server is always read,
+    and any copy in the graph's identity map (see
+    :func:`~py2neo_compat.enable_identity_map`) is refreshed.
+
+    :param Graph graph: Graph session/connection.
+    :param entities: Bound nodes and/or relationships to refresh.
+    :param batch_size: Maximum number of entities per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Entities no longer on the server, which were left unchanged.
+    """
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        return _pull_all(graph, entities, as_batcher(batch_size), kwargs)
+
+
+def _pull_all(graph, entities, batcher, kwargs):
+    # type: (Graph, Iterable[Union[Node, Relationship]], AdaptiveBatcher, CancelKwargs) -> List[Union[Node, Relationship]]
+    missing = []  # type: List[Union[Node, Relationship]]
+    for group in _split_entities(entities):
+        if not group:
+            continue
+
+        kind = entity_key(group[0])[0]
+        # language=cypher
+        query = 'MATCH %s WHERE ID(e) IN {ids} RETURN ID(e) AS id, e' \
+            % _entity_patterns[kind]
+
+        def pull_batch(batch, kind=kind, query=query):
+            log.debug('pull_all kind="%s" batch=%d', kind, len(batch))
+            by_id = {e._id: e for e in batch}
+            for row in cypher_stream(graph, query, ids=list(by_id),
+                                     **kwargs):
+                entity = by_id.pop(row['id'])
+                copy_entity_state(entity, row['e'])
+                _canonical(graph, entity)
+            missing.extend(e for e in batch if e._id in by_id)
+
+        batcher.run(group, pull_batch, kwargs.get('cancel'))
+    return missing
+
+
+def push_all(graph, entities, batch_size=1000, timeout=None, cancel=None):
+    # type: (Graph, Iterable[Union[Node, Relationship]], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> List[Union[Node, Relationship]]
+    """Push the properties (and node labels) of many entities to the server.
+
+    The bulk counterpart of ``push()``.  Properties are replaced with one
+    ``UNWIND`` query per *batch_size* entities.  Labels cannot be set from a
+    parameter, so after reading the current labels of a batch one query is
+    run per label added or removed, rather than per node.  The writes are
+    safe to repeat, so are retried per :func:`~py2neo_compat.enable_retry`.
+
+    py2neo 1.6 writes every change to the server as it is made, so there
+    is nothing to push and no query is run.
+
+    :param Graph graph: Graph session/connection.
+    :param entities: Bound nodes and/or relationships to write.
+    :param batch_size: Maximum number of entities per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Entities no longer on the server, which were not written.
+    """
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        return _push_all(graph, entities, as_batcher(batch_size), kwargs)
+
+
+def _push_all(graph, entities, batcher, kwargs):
+    # type: (Graph, Iterable[Union[Node, Relationship]], AdaptiveBatcher, CancelKwargs) -> List[Union[Node, Relationship]]
+    missing = []  # type: List[Union[Node, Relationship]]
+    nodes, rels = _split_entities(entities)
+    for kind, group in (('node', nodes), ('rel', rels)):
+        # language=cypher
+        query = """
+            UNWIND {rows} AS row
+            MATCH %s
+            WHERE ID(e) = row.id
+            SET e = row.properties
+            RETURN row.id AS id
+        """ % _entity_patterns[kind]
+
+        def push_batch(batch, kind=kind, query=query):
+            states = [(e, entity_state(e)) for e in batch]
+            states = [(e, state) for e, state in states if state is not None]
+            if not states:
+                return
+            log.debug('push_all kind="%s" batch=%d', kind, len(states))
+            rows = call_with_retry(
+                graph, 'push_all', cypher_execute, graph, query,
+                rows=[{'id': e._id, 'properties': properties}
+                      for e, (properties, _) in states], **kwargs)
+            found = {row['id'] for row in rows}
+            pushed = [(e, state) for e, state in states if e._id in found]
+            missing.extend(e for e, _ in states if e._id not in found)
+            if kind == 'node':
+                _push_labels(graph, [(e, labels) for e, (_, labels) in pushed],
+                             kwargs)
+            for entity, _ in pushed:
+                mark_entity_pushed(entity)
+                _canonical(graph, entity)
+
+        batcher.run(group, push_batch, kwargs.get('cancel'))
+    return missing
+
+
+def _push_labels(graph, nodes, kwargs):
+    # type: (Graph, List[Tuple[Node, FrozenSet[str]]], CancelKwargs) -> None
+    if not nodes:
+        return
+    # language=cypher
+    query = ('MATCH (n) WHERE ID(n) IN {ids}'
+             ' RETURN ID(n) AS id, labels(n) AS labels')
+    current = {row['id']: set(row['labels'])
+               for row in cypher_stream(graph, query,
+                                        ids=[n._id for n, _ in nodes],
+                                        **kwargs)}
+
+    changes = OrderedDict()  # (operation, label) -> [node IDs]
+    for node, wanted in nodes:
+        have = current.get(node._id, wanted)
+        for label in sorted(wanted - have):
+            changes.setdefault(('SET', label), []).append(node._id)
+        for label in sorted(have - wanted):
+            changes.setdefault(('REMOVE', label), []).append(node._id)
+
+    for (operation, label), ids in changes.items():
+        # language=cypher
+        call_with_retry(graph, 'push_all', cypher_execute, graph,
+                        'MATCH (n) WHERE ID(n) IN {ids} %s n:`%s`'
+                        % (operation, label), ids=ids, **kwargs)
+
+
+def _delete_query(graph, kind, query, kwargs, **params):
+    # type: (...) -> int
+    """Run a deleting *query* returning ``id`` per deleted entity.
+
+    Such queries are safe to repeat, so are retried per
+    :func:`~py2neo_compat.enable_retry`.  *kwargs* are passed on to
+    :func:`~py2neo_compat.cypher_execute` along with the query *params*.
+    """
+    imap = identity_map(graph)
+    rows = call_with_retry(graph, 'delete_%ss' % kind, cypher_execute,
+                           graph, query, **dict(params, **kwargs))
+    if imap is not None:
+        for row in rows:
+            imap.invalidate((kind, row['id']))
+    return len(rows)
+
+
+def delete_rels(graph, rels_or_ids, batch_size=1000, timeout=None,
+                cancel=None):
+    # type: (Graph, Iterable[Union[Relationship, int]], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> int
+    """Delete many relationships by ID.
+
+    The bulk counterpart of :func:`~py2neo_compat.delete_rel`, deleting
+    *batch_size* relationships per query (and so per transaction).
+    IDs of relationships which no longer exist are ignored.
+
+    :param Graph graph: Graph session/connection.
+    :param rels_or_ids: Relationships or relationship IDs.
+    :param batch_size: Maximum number of relationships per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Number of relationships deleted.
+    """
+    # language=cypher
+    query = """
+        MATCH ()-[r]->()
+        WHERE ID(r) IN {ids}
+        WITH r, ID(r) AS id
+        DELETE r
+        RETURN id
+    """
+    ids = _identities(rels_or_ids)
+
+    def delete_batch(batch):
+        count = _delete_query(graph, 'rel', query, kwargs, ids=batch)
+        log.debug('delete_rels batch=%d deleted=%d', len(batch), count)
+        return count
+
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        return sum(as_batcher(batch_size).run(ids, delete_batch,
+                                              kwargs.get('cancel')))
+
+
+def delete_rels_where(graph, rel_type=None, properties=None, where=None,
+                      batch_size=10000, timeout=None, cancel=None):
+    # type: (Graph, Optional[str], Optional[Dict[str, Any]], Optional[str], Union[int, AdaptiveBatcher], Optional[float], Optional[CancellationToken]) -> int
+    """Delete all relationships matching a filter, in server-side batches.
+
+    Matching relationships are never sent to the client; each query
+    deletes up to *batch_size* of them, until none are left.
+
+    :param Graph graph: Graph session/connection.
+    :param str rel_type: (optional) Relationship type.
+    :param dict properties: (optional) Property values to match.
+    :param str where: (optional) Additional Cypher predicate on ``r``,
+        e.g. ``'r.updated < 1500000000'``.
+    :param batch_size: Maximum number of relationships per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Number of relationships deleted.
+    """
+    params = {}
+    conditions = []
+    for i, (key, value) in enumerate(sorted((properties or {}).items())):
+        conditions.append('r.`%s` = {p%d}' % (key, i))
+        params['p%d' % i] = value
+    if where:
+        conditions.append('(%s)' % where)
+
+    # language=cypher
+    query = """
+        MATCH ()-[%s]->()
+        %s
+        WITH r, ID(r) AS id
+        LIMIT {batch_size}
+        DELETE r
+        RETURN id
+    """ % (_rel_pattern('r', rel_type),
+           'WHERE ' + ' AND '.join(conditions) if conditions else '')
+
+    def delete_batch(size):
+        count = _delete_query(graph, 'rel', query, kwargs, batch_size=size,
+                              **params)
+        log.debug('delete_rels_where rel_type="%s" batch=%d deleted=%d',
+                  rel_type, size, count)
+        return count
+
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        return as_batcher(batch_size).repeat(delete_batch,
+                                             kwargs.get('cancel'))
+
+
+DeleteAllResult = NamedTuple('DeleteAllResult', [
+    ('nodes', int),
+    ('rels', int),
+])
+
+DeleteProgress = Callable[[str, Optional[str], int], None]
+
+
+def _delete_batches(graph, kind, query, label, batcher, progress, kwargs):
+    # type: (Graph, str, str, Optional[str], AdaptiveBatcher, Optional[DeleteProgress], CancelKwargs) -> int
+    """Repeat a ``LIMIT {batch_size}`` deleting *query* until a short batch."""
+    deleted = [0]
+
+    def delete_batch(size):
+        count = _delete_query(graph, kind, query, kwargs, batch_size=size)
+        deleted[0] += count
+        log.debug('delete_all kind=%s label="%s" deleted=%d',
+                  kind, label, deleted[0])
+        if progress is not None:
+            progress(kind, label, deleted[0])
+        return count
+
+    return batcher.repeat(delete_batch, kwargs.get('cancel'))
+
+
+def _delete_all_rels(graph, label, batcher, progress, kwargs):
+    # type: (Graph, Optional[str], AdaptiveBatcher, Optional[DeleteProgress], CancelKwargs) -> int
+    # language=cypher
+    query = """
+        MATCH %s-[r]-()
+        WITH DISTINCT r
+        WITH r, ID(r) AS id
+        LIMIT {batch_size}
+        DELETE r
+        RETURN id
+    """ % ('(n:`%s`)' % label if label else '()')
+    return _delete_batches(graph, 'rel', query, label, batcher, progress,
+                           kwargs)
+
+
+def _delete_all_nodes(graph, label, batcher, progress, kwargs):
+    # type: (Graph, Optional[str], AdaptiveBatcher, Optional[DeleteProgress], CancelKwargs) -> int
+    # language=cypher
+    query = """
+        MATCH %s
+        WITH n, ID(n) AS id
+        LIMIT {batch_size}
+        DELETE n
+        RETURN id
+    """ % ('(n:`%s`)' % label if label else '(n)')
+    return _delete_batches(graph, 'node', query, label, batcher, progress,
+                           kwargs)
+
+
+def delete_all(graph, batch_size=10000, labels=None, workers=1,
+               progress=None, timeout=None, cancel=None):
+    # type: (Graph, Union[int, AdaptiveBatcher], Optional[Iterable[str]], int, Optional[DeleteProgress], Optional[float], Optional[CancellationToken]) -> DeleteAllResult
+    """Delete all nodes and relationships in bounded batches.
+
+    Unlike :meth:`Graph.delete_all`, which deletes everything in one
+    transaction, relationships and then nodes are deleted *batch_size* at a
+    time, so the server's transaction state stays small however large the
+    graph.  Only plain ``DELETE`` is used, so behaviour is the same on every
+    server version.
+
+    With *labels*, only nodes with one of the labels (and their
+    relationships) are deleted, and labels are processed by up to
+    *workers* threads in parallel.  Labels deleted in parallel should not
+    share nodes, or their transactions may conflict.
+
+    :param Graph graph: Graph session/connection.
+    :param batch_size: Maximum number of entities per query, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher` to size batches
+        by latency.
+    :param labels: (optional) Only delete nodes with these labels.
+    :param int workers: Number of labels to delete in parallel.
+    :param progress: (optional) Called after each batch as
+        ``progress(kind, label, deleted)``, where *kind* is ``'rel'`` or
+        ``'node'`` and *deleted* is the running count for that label.
+    :param float timeout: (optional) Seconds to allow for all queries.
+    :param cancel: (optional) Token to cancel the remaining queries.
+    :return: Number of nodes and relationships deleted.
+    :rtype: DeleteAllResult
+    """
+    targets = [None] if labels is None else list(labels)
+    batcher = as_batcher(batch_size)
+
+    def run(task, kwargs):
+        # type: (Callable[[Graph, Optional[str], AdaptiveBatcher, Optional[DeleteProgress], CancelKwargs], int], CancelKwargs) -> int
+        if workers <= 1 or len(targets) <= 1:
+            return sum(task(graph, label, batcher, progress, kwargs)
+                       for label in targets)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(
+                lambda label: task(graph, label, batcher, progress, kwargs),
+                targets))
+
+    with cancel_kwargs(timeout, cancel) as kwargs:
+        # All relationships go first so no node is deleted while attached
+        rels = run(_delete_all_rels, kwargs)
+        nodes = run(_delete_all_nodes, kwargs)
+    return DeleteAllResult(nodes, rels)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Client-side caches for entities and query results of the compat layer."""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence, Set
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import (
+        Any, Callable, Dict, FrozenSet, Hashable, Iterable, Optional,  # noqa
+    )
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+class IdentityMap(object):
+    """Map of entity keys to the one Python object representing each entity.
+
+    Entries are evicted least-recently-used first once *maxsize* is
+    exceeded, and are considered expired *ttl* seconds after they were
+    last loaded from (or written to) the server.  Either limit may be
+    *None* to disable it.
+
+    Keys are opaque hashables; the compat layer uses ``(kind, identity)``
+    tuples so that node and relationship IDs do not collide.
+    """
+
+    def __init__(self, maxsize=10000, ttl=None, clock=time.monotonic):
+        # type: (Optional[int], Optional[float], Callable[[], float]) -> None
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (entity, loaded_at)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def _expired(self, loaded_at):
+        # type: (float) -> bool
+        return self.ttl is not None and self._clock() - loaded_at > self.ttl
+
+    def get(self, key, default=None):
+        # type: (Hashable, Any) -> Any
+        """Return the cached entity for *key* if present and unexpired."""
+        with self._lock:
+            try:
+                entity, loaded_at = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if self._expired(loaded_at):
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entity
+
+    def is_fresh(self, key, entity):
+        # type: (Hashable, Any) -> bool
+        """Whether *entity* is the cached object for *key* and unexpired."""
+        return self.get(key) is entity
+
+    def put(self, key, entity):
+        # type: (Hashable, Any) -> Any
+        """Store *entity* under *key*, marking it freshly loaded."""
+        with self._lock:
+            self._entries[key] = (entity, self._clock())
+            self._entries.move_to_end(key)
+            self._evict()
+        return entity
+
+    def canonical(self, key, entity, merge=None):
+        # type: (Hashable, Any, Optional[Callable[[Any, Any], None]]) -> Any
+        """Return the one object for *key*, given a freshly-loaded *entity*.
+
+        If another object is already cached for *key*, the state of
+        *entity* is copied onto it with *merge(cached, entity)* and the
+        cached object is returned; otherwise *entity* itself is cached.
+        Either way the entry is marked freshly loaded.
+        """
+        with self._lock:
+            try:
+                cached, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return self.put(key, entity)
+
+            self.hits += 1
+            if cached is not entity and merge is not None:
+                merge(cached, entity)
+            return self.put(key, cached)
+
+    def invalidate(self, key):
+        # type: (Hashable) -> None
+        """Forget *key*, forcing the next load to go to the server."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        # type: () -> None
+        """Forget all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        if self.maxsize is None:
+            return
+        while len(self._entries) > self.maxsize:
+            key, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            log.debug('identity map evicted key="%s"', key)
+
+
+class _Flight(object):
+    """One in-progress call of :meth:`SingleFlight.do`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None  # type: Any
+        self.error = None  # type: Optional[BaseException]
+
+
+class SingleFlight(object):
+    """Collapse concurrent calls with the same key into one.
+
+    While a call for a key is in progress, further calls for that key wait
+    for it and share its result (or exception) instead of repeating it.
+    Nothing is kept once the call completes.
+    """
+
+    def __init__(self):
+        self._flights = {}  # type: Dict[Hashable, _Flight]
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, func):
+        # type: (Hashable, Callable[[], Any]) -> Any
+        """Return ``func()``, or the result of an identical call in progress."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as excp:
+            flight.error = excp
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+
+def approximate_size(value, _seen=None):
+    # type: (Any, Optional[set]) -> int
+    """Rough size in bytes of *value* and the containers & values within it."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray)):
+        return size
+    if isinstance(value, Mapping):
+        size += sum(approximate_size(k, _seen) + approximate_size(v, _seen)
+                    for k, v in value.items())
+    elif isinstance(value, (Sequence, Set)):
+        size += sum(approximate_size(v, _seen) for v in value)
+    return size
+
+
+class QueryCache(object):
+    """Read-query results, bounded by count, size and age.
+
+    Each entry carries the *tags* (labels and relationship types) of the
+    data it was read from, or *None* if that is unknown, so that writes can
+    invalidate just the entries they affect.  Entries are evicted
+    least-recently-used first once there are more than *maxsize* or they
+    total more than *maxbytes* (as estimated by *sizeof*), and expire *ttl*
+    seconds after being stored.  Any limit may be *None* to disable it.
+    """
+
+    def __init__(self, maxsize=1000, maxbytes=64 * 1024 * 1024, ttl=60.0,
+                 sizeof=approximate_size, clock=time.monotonic):
+        # type: (Optional[int], Optional[int], Optional[float], Callable[[Any], int], Callable[[], float]) -> None
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._clock = clock
+        # key -> (result, tags, size, stored_at)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Incremented by each invalidation
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        # type: (Hashable, Any) -> Any
+        """Return the cached result for *key* if present and unexpired."""
+        with self._lock:
+            try:
+                result, _, _, stored_at = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result, tags=None, generation=None):
+        # type: (Hashable, Any, Optional[FrozenSet[str]], Optional[int]) -> Any
+        """Cache *result* under *key*; results over *maxbytes* are not kept.
+
+        Pass the :attr:`generation` from before *result* was read to not
+        keep it if the cache has been invalidated since, as it may then
+        predate a write.
+        """
+        size = self._sizeof(result)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return result
+            self._remove(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return result
+            self._entries[key] = (result, tags, size, self._clock())
+            self.bytes += size
+            self._evict()
+        return result
+
+    def invalidate(self, tags=None):
+        # type: (Optional[Iterable[str]]) -> None
+        """Forget entries read from any of *tags*, or with unknown tags.
+
+        With *tags* of *None*, forget everything.
+        """
+        with self._lock:
+            self.generation += 1
+            if tags is None:
+                stale = list(self._entries)
+            else:
+                tags = frozenset(tags)
+                stale = [key for key, (_, entry_tags, _, _)
+                         in self._entries.items()
+                         if entry_tags is None or entry_tags & tags]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        # type: () -> None
+        """Forget all entries."""
+        self.invalidate()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def _evict(self):
+        while self._entries and (
+                (self.maxsize is not None
+                 and len(self._entries) > self.maxsize)
+                or (self.maxbytes is not None and self.bytes > self.maxbytes)):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+            log.debug('query cache evicted key="%s"', key)
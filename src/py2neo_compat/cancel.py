@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Deadlines and cooperative cancellation of queries.
+
+A :class:`CancellationToken` is passed as *cancel* to
+:func:`~py2neo_compat.cypher_stream` and friends; cancelling it, or its
+*timeout* expiring, stops the query:
+
+* Records are checked for cancellation as they are read.
+* On py2neo 1.6 & 2.0 the server transaction is also rolled back from the
+  cancelling thread, which aborts a statement the server is still running.
+  Bolt connections (2021) must not be shared between threads, so there the
+  statement runs to completion before the cancellation is noticed.
+
+py2neo does not pass transaction timeouts to the server on any supported
+version, so every *timeout* is a client-side deadline.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import (
+        Callable, Dict, Iterable, Iterator, List, Optional,  # noqa
+    )
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+class QueryCancelled(Exception):
+    """A query was stopped by its :class:`CancellationToken`."""
+
+
+class QueryTimeout(QueryCancelled):
+    """A query ran past its *timeout*."""
+
+
+class CancellationToken(object):
+    """Thread-safe flag asking queries to stop, with an optional deadline.
+
+    :param float timeout: (optional) Seconds after which the token cancels
+        itself with :class:`QueryTimeout`.
+    :param CancellationToken parent: (optional) Token whose cancellation
+        also cancels this one.
+    """
+
+    def __init__(self, timeout=None, parent=None):
+        # type: (Optional[float], Optional[CancellationToken]) -> None
+        self.timeout = timeout
+        self.reason = None  # type: Optional[QueryCancelled]
+        self._lock = threading.Lock()
+        self._callbacks = []  # type: List[Callable[[], None]]
+        self._parent = parent
+        self._timer = None
+        if parent is not None:
+            parent.on_cancel(self._cancel_from_parent)
+        if timeout is not None:
+            self._timer = threading.Timer(
+                timeout, self._fire,
+                [QueryTimeout('query timed out after %gs' % timeout)])
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def cancelled(self):
+        # type: () -> bool
+        return self.reason is not None
+
+    def cancel(self):
+        # type: () -> None
+        """Ask queries using this token to stop."""
+        self._fire(QueryCancelled('query cancelled'))
+
+    def _cancel_from_parent(self):
+        self._fire(self._parent.reason)
+
+    def _fire(self, reason):
+        # type: (QueryCancelled) -> None
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        if self._timer is not None:
+            self._timer.cancel()
+        log.debug('cancelling callbacks=%d reason=%s', len(callbacks), reason)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:  # pylint: disable=broad-except
+                log.debug('cancellation callback failed', exc_info=True)
+
+    def error(self):
+        # type: () -> Optional[QueryCancelled]
+        """New exception to raise for the cancellation, or *None*."""
+        reason = self.reason
+        if reason is None:
+            return None
+        return type(reason)(*reason.args)
+
+    def check(self):
+        # type: () -> None
+        """Raise :class:`QueryCancelled` (or :class:`QueryTimeout`) if
+        cancelled."""
+        error = self.error()
+        if error is not None:
+            raise error
+
+    def on_cancel(self, callback):
+        # type: (Callable[[], None]) -> None
+        """Call *callback* (from the cancelling thread) on cancellation, or
+        now if already cancelled."""
+        with self._lock:
+            if self.reason is None:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def discard(self, callback):
+        # type: (Callable[[], None]) -> None
+        """Forget a callback added with :meth:`on_cancel`."""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def close(self):
+        # type: () -> None
+        """Stop the deadline timer and detach from the parent token."""
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._parent is not None:
+            self._parent.discard(self._cancel_from_parent)
+
+
+@contextmanager
+def cancellation(timeout=None, cancel=None):
+    # type: (Optional[float], Optional[CancellationToken]) -> Iterator[CancellationToken]
+    """Token for one operation, cancelled by *cancel* or after *timeout*."""
+    token = CancellationToken(timeout, parent=cancel)
+    try:
+        yield token
+    finally:
+        token.close()
+
+
+@contextmanager
+def cancel_kwargs(timeout=None, cancel=None):
+    # type: (Optional[float], Optional[CancellationToken]) -> Iterator[Dict[str, CancellationToken]]
+    """Keyword arguments giving each query of one operation its token.
+
+    ``{'cancel': token}``, with a token as from :func:`cancellation`, or
+    ``{}`` if neither *timeout* nor *cancel* is given.
+    """
+    if timeout is None and cancel is None:
+        yield {}
+        return
+    with cancellation(timeout, cancel) as token:
+        yield {'cancel': token}
+
+
+def checked(records, token):
+    # type: (Iterable, CancellationToken) -> Iterator
+    """Yield *records*, raising if *token* is cancelled in between."""
+    for record in records:
+        token.check()
+        yield record
+    token.check()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Process-wide counters and gauges.
+
+Helpers record what they do in :data:`registry`, e.g. the ``retry.*``
+counters of :mod:`py2neo_compat.retry`; read them with
+:meth:`Metrics.snapshot` and export them to whatever monitoring is in use.
+"""
+
+from __future__ import absolute_import, print_function
+
+import threading
+from collections import Counter
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Dict, Union  # noqa
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+
+class Metrics(object):
+    """Thread-safe named counters (which add up) and gauges (which are set)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = Counter()  # type: Dict[str, int]
+        self._gauges = {}  # type: Dict[str, float]
+
+    def incr(self, name, value=1):
+        # type: (str, int) -> None
+        """Add *value* to counter *name*."""
+        with self._lock:
+            self._counters[name] += value
+
+    def set(self, name, value):
+        # type: (str, float) -> None
+        """Set gauge *name* to *value*."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name, default=0):
+        # type: (str, Union[int, float]) -> Union[int, float]
+        """Current value of counter or gauge *name*."""
+        with self._lock:
+            if name in self._gauges:
+                return self._gauges[name]
+            return self._counters.get(name, default)
+
+    def snapshot(self):
+        # type: () -> Dict[str, Union[int, float]]
+        """Copy of all counters & gauges."""
+        with self._lock:
+            values = dict(self._counters)
+            values.update(self._gauges)
+            return values
+
+    def reset(self):
+        # type: () -> None
+        """Forget all counters & gauges."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+
+
+registry = Metrics()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Keyset (seek) pagination over nodes and relationships.
+
+Rather than ``SKIP``, each page asks for entities with an ID greater than
+the last one seen, so pages stay consistent while the graph changes.  The
+last ID seen is exposed as :attr:`KeysetIterator.cursor`, which can be
+passed back as *cursor* to resume an interrupted walk.
+
+This does not make later pages cheaper: Neo4j 3.0 has no range seek on
+``ID()``, so every page still scans, filters and sorts all matching
+entities before applying ``LIMIT``.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Any, Dict, Iterator, Optional  # noqa
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+from .cancel import CancellationToken
+from .py2neo_compat import Graph, Node, _canonical, cypher_execute
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+class KeysetIterator(object):
+    """Lazily page through entities in ID order.
+
+    *query* must return the entity as ``e``, filter on ``ID(e) > {after}``,
+    order by ``ID(e)`` and end with ``LIMIT {page_size}``.
+
+    *timeout* (in seconds) applies to each page's query, and *cancel* stops
+    the walk; see :func:`~py2neo_compat.cypher_stream`.
+    """
+
+    def __init__(self, graph, query, params=None, page_size=1000, cursor=None,
+                 timeout=None, cancel=None):
+        # type: (Graph, str, Optional[Dict[str, Any]], int, Optional[int], Optional[float], Optional[CancellationToken]) -> None
+        self.graph = graph
+        self.query = query
+        self.params = dict(params or {})
+        self.page_size = page_size
+        self.cursor = cursor
+        self.timeout = timeout
+        self.cancel = cancel
+
+    def __iter__(self):
+        # type: () -> Iterator
+        kwargs = {}
+        if self.timeout is not None or self.cancel is not None:
+            kwargs.update(timeout=self.timeout, cancel=self.cancel)
+        while True:
+            after = -1 if self.cursor is None else self.cursor
+            log.debug('fetching page after="%s" page_size=%d',
+                      after, self.page_size)
+            rows = cypher_execute(self.graph, self.query, params=self.params,
+                                  after=after, page_size=self.page_size,
+                                  **kwargs)
+            for row in rows:
+                entity = row['e']
+                self.cursor = entity._id
+                yield _canonical(self.graph, entity)
+
+            if len(rows) < self.page_size:
+                return
+
+
+def iter_find(graph, label, property_key=None, property_value=None,
+              page_size=1000, cursor=None, timeout=None, cancel=None):
+    # type: (Graph, str, Optional[str], Any, int, Optional[int], Optional[float], Optional[CancellationToken]) -> KeysetIterator
+    """Iterate over nodes with *label*, paged by node ID.
+
+    :param Graph graph: Graph session/connection.
+    :param str label: Node label.
+    :param str property_key: (optional) Property key to match.
+    :param property_value: (optional) Property value to match.
+    :param int page_size: Number of nodes fetched per query.
+    :param int cursor: (optional) :attr:`KeysetIterator.cursor` of a
+        previous walk to resume after.
+    :param float timeout: (optional) Seconds to allow for each page.
+    :param cancel: (optional) Token to stop the walk.
+    :rtype: KeysetIterator
+    """
+    params = {}
+    conditions = ['ID(e) > {after}']
+    if property_key is not None:
+        conditions.append('e.`%s` = {value}' % property_key)
+        params['value'] = property_value
+
+    # language=cypher
+    query = """
+        MATCH (e:`%s`)
+        WHERE %s
+        RETURN e
+        ORDER BY ID(e)
+        LIMIT {page_size}
+    """ % (label, ' AND '.join(conditions))
+
+    return KeysetIterator(graph, query, params, page_size, cursor, timeout,
+                          cancel)
+
+
+def iter_match(graph, start_node=None, rel_type=None, end_node=None,
+               page_size=1000, cursor=None, timeout=None, cancel=None):
+    # type: (Graph, Optional[Node], Optional[str], Optional[Node], int, Optional[int], Optional[float], Optional[CancellationToken]) -> KeysetIterator
+    """Iterate over relationships, paged by relationship ID.
+
+    Arguments match those of :meth:`Graph.match`.
+
+    :param Graph graph: Graph session/connection.
+    :param Node start_node: (optional) Head node of relationships.
+    :param str rel_type: (optional) Relationship type.
+    :param Node end_node: (optional) Tail node of relationships.
+    :param int page_size: Number of relationships fetched per query.
+    :param int cursor: (optional) :attr:`KeysetIterator.cursor` of a
+        previous walk to resume after.
+    :param float timeout: (optional) Seconds to allow for each page.
+    :param cancel: (optional) Token to stop the walk.
+    :rtype: KeysetIterator
+    """
+    params = {}
+    conditions = ['ID(e) > {after}']
+    if start_node is not None:
+        conditions.append('ID(a) = {start_id}')
+        params['start_id'] = start_node._id
+    if end_node is not None:
+        conditions.append('ID(b) = {end_id}')
+        params['end_id'] = end_node._id
+
+    rel_pattern = 'e:`%s`' % rel_type if rel_type else 'e'
+
+    # language=cypher
+    query = """
+        MATCH (a)-[%s]->(b)
+        WHERE %s
+        RETURN e
+        ORDER BY ID(e)
+        LIMIT {page_size}
+    """ % (rel_pattern, ' AND '.join(conditions))
+
+    return KeysetIterator(graph, query, params, page_size, cursor, timeout,
+                          cancel)
@@ -5,18 +5,24 @@
 from __future__ import absolute_import, print_function
 
 import logging
+import re
 
 try:
     # noinspection PyUnresolvedReferences
     from typing import (
-        Any, Dict, List, Mapping, NamedTuple, Optional,
-        Union, Tuple, Iterable,  # noqa
+        Any, Callable, Dict, FrozenSet, Hashable, List, Mapping, NamedTuple,
+        Optional, Set, Union, Tuple, Iterable, Iterator,  # noqa
     )
 except ImportError:  # pragma: no cover
     """Module :mod:`typing` not required for Py27-compatible type comments."""
 
 
 import py2neo
+import six
+
+from .cache import IdentityMap, QueryCache, SingleFlight
+from .cancel import CancellationToken, QueryCancelled
+from .retry import RetryPolicy
 
 log = logging.getLogger(__name__)  # pylint: disable=invalid-name
 log.addHandler(logging.NullHandler())
@@ -85,9 +91,10 @@ for cls in py2neo_property_classes:
 
 
 def create_unique_rel(
-    graph, start_node, rel_type, end_node, prop_key=None, prop_val=None
+    graph, start_node, rel_type, end_node, prop_key=None, prop_val=None,
+    timeout=None, cancel=None,
 ):
-    # type: (Graph, Node, str, Node, Optional[str], Optional[Any]) -> Relationship
+    # type: (Graph, Node, str, Node, Optional[str], Optional[Any], Optional[float], Optional[CancellationToken]) -> Relationship
     """Get or create a unique relationship.
 
     py2neo 1.6 has similar functionality but not 2.0
@@ -104,6 +111,10 @@ def create_unique_rel(
     :type prop_key: str
     :param prop_val: (optional) Property value to identify relationship.
     :type prop_val: str
+    :param timeout: (optional) Seconds to allow; see :func:`cypher_stream`.
+    :type timeout: float
+    :param cancel: (optional) Token to cancel the query.
+    :type cancel: py2neo_compat.cancel.CancellationToken
 
     :return: The pre-existing or newly-created Relationship object.
     :rtype: py2neo.Relationship
@@ -134,5 +145,739 @@ def create_unique_rel(
             % rel_type
         )
 
-    for row in cypher_stream(graph, query, **params):
-        return row['r']
+    # The generic write invalidation would flush the whole query cache,
+    # since the start & end node patterns have no labels.
+    def run():
+        if timeout is None and cancel is None:
+            return list(_orig_cypher_stream(graph, query, **params))
+        return list(CancellableStream(
+            graph, query, params, CancellationToken(timeout, parent=cancel)))
+
+    for row in call_with_retry(graph, 'create_unique_rel', run):
+        invalidate_queries(graph, [rel_type])
+        return _canonical(graph, row['r'])
+
+
+def find(graph, label, property_key=None, property_value=None,
+         limit=None, skip=None, timeout=None, cancel=None):
+    # type: (Graph, str, Optional[str], Any, Optional[int], Optional[int], Optional[float], Optional[CancellationToken]) -> Iterator[Node]
+    """Find nodes by label and, optionally, a property value.
+
+    Unlike :meth:`Graph.find`, which differs between versions (and has
+    neither *limit* nor *skip* on some), this sends both to the server on
+    every version.  Results are ordered by node ID when *skip* is given,
+    so that successive pages are consistent.
+
+    :param Graph graph: Graph session/connection.
+    :param str label: Node label.
+    :param str property_key: (optional) Property key to match.
+    :param property_value: (optional) Property value to match.
+    :param int limit: (optional) Maximum number of nodes to return.
+    :param int skip: (optional) Number of nodes to skip.
+    :param float timeout: (optional) Seconds to allow; see
+        :func:`cypher_stream`.
+    :param cancel: (optional) Token to cancel the query.
+    :return: Generator of matching nodes; closing it closes the cursor.
+        With a query cache (see :func:`enable_query_cache`), results are
+        read in full and cached; with single-flight (see
+        :func:`enable_single_flight`), and neither *timeout* nor *cancel*,
+        they are read in full and shared.
+    """
+    params = {}
+
+    # language=cypher
+    query = 'MATCH (n:`%s`)' % label
+    if property_key is not None:
+        query += ' WHERE n.`%s` = {value}' % property_key
+        params['value'] = property_value
+    query += ' RETURN n'
+    if skip is not None:
+        query += ' ORDER BY ID(n) SKIP {skip}'
+        params['skip'] = skip
+    if limit is not None:
+        query += ' LIMIT {limit}'
+        params['limit'] = limit
+
+    shared = (getattr(graph, '_compat_single_flight', None) is not None
+              and timeout is None and cancel is None)
+    if shared or query_cache(graph) is not None:
+        cursor = cypher_execute(graph, query, timeout=timeout, cancel=cancel,
+                                params=params)
+    else:
+        cursor = cypher_stream(graph, query, timeout=timeout, cancel=cancel,
+                               params=params)
+    try:
+        for row in cursor:
+            yield _canonical(graph, row['n'])
+    finally:
+        _close_cursor(cursor)
+
+
+def _close_cursor(cursor):
+    close = getattr(cursor, 'close', None)
+    if close is not None:
+        close()
+
+
+# Identity map
+#
+# Optional, per-graph; see :class:`py2neo_compat.cache.IdentityMap`.
+
+def enable_identity_map(graph, maxsize=10000, ttl=None):
+    # type: (Graph, Optional[int], Optional[float]) -> IdentityMap
+    """Attach an identity map to *graph*.
+
+    While enabled, :meth:`Graph.find_one`, :meth:`Graph.match_one` and
+    :func:`create_unique_rel` return the same Python object for the same
+    entity.  ``pull()`` always reads the server, refreshing the cached
+    copy, so that changes made other than through these helpers are seen.
+    Writes through :func:`update_properties`, :func:`set_properties` and
+    :func:`delete_rel` invalidate the entity.
+
+    :param Graph graph: Graph to attach the map to.
+    :param int maxsize: Maximum number of entities kept (LRU eviction), or
+        *None* for unbounded.
+    :param float ttl: Seconds after loading that an entity is considered
+        stale, or *None* for no expiry.
+    :return: The new identity map.
+    """
+    imap = IdentityMap(maxsize=maxsize, ttl=ttl)
+    graph._compat_identity_map = imap
+    return imap
+
+
+def disable_identity_map(graph):
+    # type: (Graph) -> None
+    """Detach the identity map, if any, from *graph*."""
+    graph.__dict__.pop('_compat_identity_map', None)
+
+
+def identity_map(graph):
+    # type: (Optional[Graph]) -> Optional[IdentityMap]
+    """Get the identity map attached to *graph*, or *None*."""
+    return getattr(graph, '_compat_identity_map', None)
+
+
+def entity_key(entity):
+    # type: (Union[Node,Relationship]) -> Tuple[str, int]
+    """Identity map key for a bound node or relationship."""
+    kind = 'rel' if isinstance(entity, Relationship) else 'node'
+    return kind, entity._id
+
+
+def _canonical(graph, entity):
+    imap = identity_map(graph)
+    if imap is None or entity is None:
+        return entity
+    return imap.canonical(entity_key(entity), entity, merge=copy_entity_state)
+
+
+def _invalidate(entity):
+    graph = entity_graph(entity)
+    imap = identity_map(graph)
+    if imap is not None:
+        imap.invalidate(entity_key(entity))
+    if query_cache(graph) is not None:
+        invalidate_queries(graph, entity_tags(entity))
+
+
+def _graph_find_one(self, label, property_key=None, property_value=None):
+    """Find one node by label and, optionally, a property value."""
+    results = find(self, label, property_key, property_value, limit=1)
+    try:
+        return foremost(results)
+    finally:
+        results.close()
+Graph.find_one = _graph_find_one
+
+
+Graph._orig_match_one = Graph.match_one
+def _graph_match_one(self, *args, **kws):
+    return _canonical(self, self._orig_match_one(*args, **kws))
+Graph.match_one = _graph_match_one
+
+
+def _entity_pull(self):
+    # Always a round trip: pulling is how changes from elsewhere are seen
+    self._orig_pull()
+    _canonical(entity_graph(self), self)
+
+
+def _entity_push(self):
+    # Labels on the server before the push, which it may remove (2021
+    # only; unknown on 1.6 & 2.0)
+    before = getattr(self, '_remote_labels', None)
+    self._orig_push()
+    graph = entity_graph(self)
+    _canonical(graph, self)
+    if query_cache(graph) is not None:
+        tags = entity_tags(self)  # type: Optional[FrozenSet[str]]
+        if isinstance(self, Node):
+            tags = None if before is None else tags | before
+        invalidate_queries(graph, tags)
+
+
+for cls in (Node, Relationship):
+    cls._orig_pull = cls.pull
+    cls.pull = _entity_pull
+    cls._orig_push = cls.push
+    cls.push = _entity_push
+
+
+_orig_update_properties = update_properties
+def update_properties(entity, properties):
+    # type: (Union[Node,Relationship], Mapping[str, Any]) -> None
+    """Update properties of *entity*, invalidating any cached copy."""
+    _orig_update_properties(entity, properties)
+    _invalidate(entity)
+
+
+_orig_set_properties = set_properties
+def set_properties(entity, properties):
+    # type: (Union[Node,Relationship], Mapping[str, Any]) -> None
+    """Replace properties of *entity*, invalidating any cached copy."""
+    _orig_set_properties(entity, properties)
+    _invalidate(entity)
+
+
+_orig_delete_rel = delete_rel
+def delete_rel(rel):
+    # type: (Relationship) -> None
+    """Delete a relationship, invalidating any cached copy."""
+    _invalidate(rel)
+    _orig_delete_rel(rel)
+
+
+# Single-flight reads
+#
+# Optional, per-graph; see :class:`py2neo_compat.cache.SingleFlight`.
+
+_write_clauses = re.compile(
+    r'\b(CREATE|MERGE|SET|DELETE|REMOVE|FOREACH|LOAD\s+CSV|CALL)\b',
+    re.IGNORECASE)
+
+
+def is_read_only(query):
+    # type: (str) -> bool
+    """Whether *query* has no clause which could write.
+
+    Conservative: a write keyword anywhere in the query, even in a string
+    literal, makes it count as a write.  Procedure calls count as writes.
+    """
+    return _write_clauses.search(query) is None
+
+
+def _freeze(value):
+    # type: (Any) -> Any
+    """Hashable equivalent of a query parameter value."""
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+def enable_single_flight(graph):
+    # type: (Graph) -> SingleFlight
+    """Share results of identical concurrent reads on *graph*.
+
+    While enabled, a read-only (see :func:`is_read_only`)
+    :func:`cypher_execute` with the same query & parameters as one already
+    in progress on another thread waits for it and returns the same result
+    object, which callers should therefore not modify.  The same goes for
+    :func:`find`, :meth:`Graph.find_one`, ``Graph.order`` and
+    ``Graph.size``.  Writes, streams, queries with a timeout or cancel
+    token and explicit transactions are never shared.
+
+    :return: The single-flight group, whose ``calls`` and ``shared``
+        counters show how many queries were sent and saved.
+    """
+    flight = SingleFlight()
+    graph._compat_single_flight = flight
+    return flight
+
+
+def disable_single_flight(graph):
+    # type: (Graph) -> None
+    """Stop sharing concurrent reads on *graph*."""
+    graph.__dict__.pop('_compat_single_flight', None)
+
+
+def _shared_read(graph, key, func):
+    # type: (Graph, Hashable, Callable[[], Any]) -> Any
+    """``func()``, shared with identical concurrent calls if enabled."""
+    flight = getattr(graph, '_compat_single_flight', None)
+    if flight is None:
+        return func()
+    return flight.do(key, func)
+
+
+def _share_graph_count(name):
+    # type: (str) -> None
+    """Share ``Graph.order``/``Graph.size``, a property or method."""
+    orig = getattr(Graph, name, None)
+    if orig is None:
+        return
+    key = ('Graph', name)
+    if isinstance(orig, property):
+        def fget(self):
+            return _shared_read(self, key, lambda: orig.fget(self))
+        setattr(Graph, name, property(fget, doc=orig.__doc__))
+    else:
+        def method(self):
+            return _shared_read(self, key, lambda: orig(self))
+        method.__doc__ = orig.__doc__
+        setattr(Graph, name, method)
+_share_graph_count('order')
+_share_graph_count('size')
+
+
+# Query-result cache
+#
+# Optional, per-graph; see :class:`py2neo_compat.cache.QueryCache`.
+
+def enable_query_cache(graph, maxsize=1000, maxbytes=64 * 1024 * 1024,
+                       ttl=60.0):
+    # type: (Graph, Optional[int], Optional[int], Optional[float]) -> QueryCache
+    """Cache results of read queries on *graph*.
+
+    While enabled, results of read-only (see :func:`is_read_only`)
+    :func:`cypher_execute` calls, :func:`find` and :meth:`Graph.match` are
+    cached and shared between callers, who should therefore not modify
+    them.  Each result is tagged with the labels and relationship types in
+    its query (see :func:`query_tags`).
+
+    Writes through :func:`create_node`, :func:`create_unique_rel`,
+    :func:`update_properties`, :func:`set_properties`, :func:`delete_rel`,
+    ``push()``, write queries through :func:`cypher_execute` or
+    :func:`cypher_stream` and commits of
+    :func:`~py2neo_compat.transaction` invalidate cached results with the
+    written labels or relationship types.  Other writes (and writes by
+    other clients) are only seen once cached results expire.
+
+    :param Graph graph: Graph to attach the cache to.
+    :param int maxsize: Maximum number of results kept, or *None*.
+    :param int maxbytes: Maximum approximate total size of results, or
+        *None*.
+    :param float ttl: Seconds a result is kept, or *None* for no expiry.
+    :return: The new query cache.
+    """
+    cache = QueryCache(maxsize=maxsize, maxbytes=maxbytes, ttl=ttl)
+    graph._compat_query_cache = cache
+    return cache
+
+
+def disable_query_cache(graph):
+    # type: (Graph) -> None
+    """Detach the query cache, if any, from *graph*."""
+    graph.__dict__.pop('_compat_query_cache', None)
+
+
+def query_cache(graph):
+    # type: (Optional[Graph]) -> Optional[QueryCache]
+    """Get the query cache attached to *graph*, or *None*."""
+    return getattr(graph, '_compat_query_cache', None)
+
+
+_node_patterns = re.compile(r'(?<![\w`])\(([^()]*)\)')
+_rel_patterns = re.compile(r'\[([^\[\]]*)\]')
+_pattern_names = re.compile(r'[:|]\s*:?\s*(`[^`]+`|\w+)')
+_literals = re.compile(r"`[^`]*`|'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_clauses = re.compile(
+    r'\b(SET|REMOVE|MATCH|OPTIONAL|WHERE|RETURN|WITH|CREATE|MERGE|DELETE|'
+    r'DETACH|UNWIND|ON|ORDER|SKIP|LIMIT|FOREACH|CALL|YIELD|UNION|START)\b',
+    re.IGNORECASE)
+_maps = re.compile(r'\{[^{}]*\}')
+_label_items = re.compile(
+    r'(?<![\w`.])(?:`[^`]+`|\w+)\s*((?::\s*(?:`[^`]+`|\w+)\s*)+)')
+_names = re.compile(r'`[^`]+`|\w+')
+
+
+def _strip_literals(query):
+    # type: (str) -> str
+    """*query* with string literals emptied, keeping `quoted` names."""
+    return _literals.sub(
+        lambda m: m.group() if m.group().startswith('`') else "''", query)
+
+
+def query_tags(query):
+    # type: (str) -> Optional[FrozenSet[str]]
+    """Labels & relationship types in the patterns of *query*.
+
+    Returns *None*, meaning any, if some node pattern has no label or some
+    relationship pattern no type.  Like :func:`is_read_only` this is a
+    conservative reading of the text, not a parse; string literals are
+    ignored.
+    """
+    query = _strip_literals(query)
+    tags = set()
+    for patterns in (_node_patterns, _rel_patterns):
+        for pattern in patterns.findall(query):
+            names = _pattern_names.findall(pattern.split('{')[0])
+            if not names:
+                return None
+            tags.update(name.strip('`') for name in names)
+    return frozenset(tags)
+
+
+def entity_tags(entity):
+    # type: (Union[Node, Relationship]) -> FrozenSet[str]
+    """Labels of a node, or the type of a relationship."""
+    if isinstance(entity, Relationship):
+        return frozenset([entity.reltype])
+    return frozenset(entity.labels)
+
+
+def invalidate_queries(graph, tags=None):
+    # type: (Graph, Optional[Iterable[str]]) -> None
+    """Forget cached results read from *tags* (default: all) on *graph*."""
+    cache = query_cache(graph)
+    if cache is not None:
+        cache.invalidate(tags)
+
+
+def _label_writes(query):
+    # type: (str) -> Set[str]
+    """Labels set or removed by ``SET n:Label`` & ``REMOVE n:Label``."""
+    labels = set()
+    parts = _clauses.split(_strip_literals(query))
+    for keyword, text in zip(parts[1::2], parts[2::2]):
+        if keyword.upper() not in ('SET', 'REMOVE'):
+            continue
+        while _maps.search(text):
+            text = _maps.sub('', text)
+        for names in _label_items.findall(text):
+            labels.update(name.strip('`') for name in _names.findall(names))
+    return labels
+
+
+def _written_tags(query):
+    # type: (str) -> Optional[FrozenSet[str]]
+    """Tags whose cached results *query* may make stale.
+
+    Those of its patterns, and any labels it sets or removes.
+    """
+    if is_read_only(query):
+        return frozenset()
+    tags = query_tags(query)
+    if tags is None:
+        return None
+    return tags | _label_writes(query)
+
+
+_orig_create_node = create_node
+def create_node(graph=None, labels=None, properties=None):
+    # type: (Optional[Graph], Optional[Iterable[str]], Optional[Mapping[str, Any]]) -> Node
+    """Cross-version function to create a node."""
+    created = _orig_create_node(graph=graph, labels=labels,
+                                properties=properties)
+    if graph is not None:
+        invalidate_queries(graph, labels or [])
+    return created
+
+
+def _cache_arg(value):
+    # type: (Any) -> Hashable
+    if isinstance(value, (Node, Relationship)):
+        return entity_key(value)
+    return _freeze(value)
+
+
+Graph._orig_match_uncached = Graph.match
+def _graph_match(self, *args, **kws):
+    cache = query_cache(self)
+    if cache is None:
+        return self._orig_match_uncached(*args, **kws)
+
+    key = ('Graph.match', tuple(_cache_arg(v) for v in args),
+           tuple(sorted((k, _cache_arg(v)) for k, v in kws.items())))
+    result = cache.get(key)
+    if result is None:
+        rel_type = kws.get('rel_type', args[1] if len(args) > 1 else None)
+        tags = None if rel_type is None else frozenset([rel_type])
+        generation = cache.generation
+        result = cache.put(
+            key, list(self._orig_match_uncached(*args, **kws)), tags,
+            generation)
+    return iter(result)
+Graph.match = _graph_match
+
+
+# Retries
+#
+# Optional, per-graph; see :mod:`py2neo_compat.retry`.
+
+def enable_retry(graph, policy=None):
+    # type: (Graph, Optional[RetryPolicy]) -> RetryPolicy
+    """Retry idempotent compat writes on *graph* after transient errors.
+
+    Applies to :func:`create_unique_rel`, :func:`~py2neo_compat.bulk.push_all`,
+    :func:`~py2neo_compat.bulk.delete_rels`,
+    :func:`~py2neo_compat.bulk.delete_rels_where` and
+    :func:`~py2neo_compat.bulk.delete_all`, each query of which is retried
+    on its own.  Statements in explicit transactions are never retried.
+
+    :param Graph graph: Graph to attach the policy to.
+    :param RetryPolicy policy: (optional) Defaults to ``RetryPolicy()``.
+    :return: The policy.
+    """
+    if policy is None:
+        policy = RetryPolicy()
+    graph._compat_retry = policy
+    return policy
+
+
+def disable_retry(graph):
+    # type: (Graph) -> None
+    """Stop retrying writes on *graph*."""
+    graph.__dict__.pop('_compat_retry', None)
+
+
+def retry_policy(graph):
+    # type: (Optional[Graph]) -> Optional[RetryPolicy]
+    """Get the retry policy attached to *graph*, or *None*."""
+    return getattr(graph, '_compat_retry', None)
+
+
+def call_with_retry(graph, operation, func, *args, **kwargs):
+    """Call ``func(*args, **kwargs)`` under the retry policy of *graph*.
+
+    *func* must be safe to repeat.  Without a policy it is called once.
+    Retries are counted under *operation*; see :class:`RetryPolicy`.
+    """
+    policy = retry_policy(graph)
+    if policy is None:
+        return func(*args, **kwargs)
+    return policy.run(operation, func, *args, **kwargs)
+
+
+# Timeouts & cancellation
+#
+# See :mod:`py2neo_compat.cancel`.
+
+class CancellableStream(object):
+    """Records of one statement run in its own transaction.
+
+    The transaction is committed when the records have all been read or
+    the stream is closed, and rolled back if reading fails or *token* is
+    cancelled, in which case :class:`~py2neo_compat.cancel.QueryCancelled`
+    is raised.  The stream takes ownership of *token*.
+    """
+
+    def __init__(self, graph, query, params, token):
+        # type: (Graph, str, Mapping[str, Any], CancellationToken) -> None
+        self.graph = graph
+        self.token = token
+        self._tx = None
+        try:
+            token.check()
+            self._tx = begin_transaction(graph, eager=True)
+        except BaseException:
+            token.close()
+            raise
+        token.on_cancel(self._interrupt)
+        try:
+            self._records = iter(transaction_run(self._tx, query, params))
+            token.check()
+        except BaseException as excp:
+            self._abort(excp)
+
+    def _interrupt(self):
+        interrupt_transaction(self.graph, self._tx)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._tx is None:
+            raise StopIteration
+        try:
+            record = next(self._records)
+            self.token.check()
+        except StopIteration:
+            self.close()
+            raise
+        except BaseException as excp:
+            self._abort(excp)
+        return record
+
+    def close(self):
+        # type: () -> None
+        """Commit the transaction, unless already finished."""
+        if self._tx is None:
+            return
+        self.token.discard(self._interrupt)
+        try:
+            self.token.check()
+            commit_transaction(self.graph, self._tx)
+        except BaseException as excp:
+            self._abort(excp)
+        self._tx = None
+        self.token.close()
+
+    def _abort(self, excp):
+        # type: (BaseException) -> None
+        """Roll back and re-raise *excp*, being handled, or the cancellation
+        which caused it."""
+        tx, self._tx = self._tx, None
+        self.token.discard(self._interrupt)
+        self.token.close()
+        try:
+            rollback_transaction(self.graph, tx)
+        except Exception:  # pylint: disable=broad-except
+            # An interrupt or the failure may already have closed it
+            log.debug('rollback of stream', exc_info=True)
+        error = self.token.error()
+        if error is not None and not isinstance(excp, QueryCancelled):
+            six.raise_from(error, excp)
+        raise  # pylint: disable=misplaced-bare-raise
+
+
+class _WriteCursor(object):
+    """Records of a write, invalidating cached results once it is done.
+
+    That is, once the records have all been read or the cursor is closed;
+    reads cached while the write was running may be stale.  Other
+    attributes are those of the wrapped cursor.
+    """
+
+    def __init__(self, cursor, graph, tags):
+        # type: (Any, Graph, Optional[FrozenSet[str]]) -> None
+        self._cursor = cursor
+        self._graph = graph
+        self._tags = tags
+        self._records = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._records is None:
+            self._records = iter(self._cursor)
+        try:
+            return next(self._records)
+        except StopIteration:
+            self._done()
+            raise
+    next = __next__
+
+    def close(self):
+        # type: () -> None
+        try:
+            close = getattr(self._cursor, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._done()
+
+    def _done(self):
+        if self._graph is not None:
+            invalidate_queries(self._graph, self._tags)
+            self._graph = None
+
+
+def _query_params(params, kwparams):
+    # type: (Optional[Mapping[str, Any]], Dict[str, Any]) -> Dict[str, Any]
+    """Query parameters given as a *params* mapping and/or keywords."""
+    if not params:
+        return kwparams
+    merged = dict(params)
+    merged.update(kwparams)
+    return merged
+
+
+_orig_cypher_stream = cypher_stream
+def cypher_stream(graph, query, timeout=None, cancel=None, params=None,
+                  **kwparams):
+    """Execute a Cypher query, returning an iterable of records.
+
+    Query parameters are given as keywords, or as a *params* mapping; the
+    latter is needed for parameters named ``timeout``, ``cancel``,
+    ``spill_threshold`` or ``params``, which these functions take for
+    themselves.
+
+    With *timeout* (in seconds) or a *cancel* token, the query runs in its
+    own transaction as a :class:`CancellableStream`, which should be read
+    to the end or closed to commit it.
+    """
+    params = _query_params(params, kwparams)
+    if timeout is None and cancel is None:
+        cursor = _orig_cypher_stream(graph, query, **params)
+    else:
+        cursor = CancellableStream(graph, query, params,
+                                   CancellationToken(timeout, parent=cancel))
+    if query_cache(graph) is not None:
+        written = _written_tags(query)
+        if written is None or written:
+            # Now, in case the stream is never read to the end, and again
+            # once it is
+            invalidate_queries(graph, written)
+            return _WriteCursor(cursor, graph, written)
+    return cursor
+
+
+_orig_cypher_execute = cypher_execute
+def cypher_execute(graph, query, spill_threshold=None, timeout=None,
+                   cancel=None, params=None, **kwparams):
+    """Execute a Cypher query, returning all records.
+
+    Query parameters are as for :func:`cypher_stream`.
+
+    With *spill_threshold*, records are read from :func:`cypher_stream`
+    into a :class:`~py2neo_compat.spill.SpillableResult` of plain values,
+    which moves to a memory-mapped temporary file once the records take
+    more than *spill_threshold* bytes.  Such results are never cached or
+    shared.
+
+    With *timeout* (in seconds) or a *cancel* token, see
+    :func:`cypher_stream`; such queries are not shared by single-flight.
+    """
+    params = _query_params(params, kwparams)
+    if spill_threshold is not None:
+        from .spill import spill_records
+        return spill_records(
+            cypher_stream(graph, query, timeout=timeout, cancel=cancel,
+                          params=params),
+            spill_threshold)
+
+    if timeout is None and cancel is None:
+        def fetch():
+            return _orig_cypher_execute(graph, query, **params)
+        flight = getattr(graph, '_compat_single_flight', None)
+    else:
+        def fetch():
+            return list(cypher_stream(graph, query, timeout=timeout,
+                                      cancel=cancel, params=params))
+        flight = None
+
+    cache = query_cache(graph)
+    if flight is None and cache is None:
+        return fetch()
+
+    if not is_read_only(query):
+        result = fetch()
+        # All of them if None
+        invalidate_queries(graph, _written_tags(query))
+        return result
+
+    key = (query, _freeze(params))
+    try:
+        hash(key)
+    except TypeError:
+        return fetch()
+
+    if cache is not None:
+        result = cache.get(key)
+        if result is not None:
+            return result
+        generation = cache.generation
+
+    result = fetch() if flight is None else flight.do(key, fetch)
+    if cache is not None:
+        cache.put(key, result, query_tags(query), generation)
+    return result
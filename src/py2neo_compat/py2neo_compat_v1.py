@@ -11,6 +11,7 @@ from py2neo.neo4j import ServerError as DatabaseError
 py2neo.DatabaseError = DatabaseError
 
 from py2neo.neo4j import CypherQuery as _CypherQuery
+from py2neo.cypher import Session as _CypherSession
 
 from py2neo import node
 from py2neo import rel
@@ -24,8 +25,9 @@ Node.pull = Node.refresh
 Node.labels = property(lambda s: s.get_labels())
 Relationship.push = Relationship.refresh
 Relationship.pull = Relationship.refresh
+# noinspection PyPropertyAccess
+Relationship.reltype = property(lambda s: s.type)
 
-Graph.find_one = lambda s, *args, **kws: foremost(s.find(*args, **kws))
 Graph.delete_all = Graph.clear
 Graph.uri = Graph.__uri__
 Graph.resource = property(lambda s: s._resource)
@@ -58,8 +60,60 @@ def cypher_execute(graph, query, **params):
 def cypher_stream(graph, query, **params):
     return _CypherQuery(graph, query).stream(**params)
 
+def record_keys(record):
+    return list(record.columns)
+
+def begin_transaction(graph, eager=False):
+    # Session resolves the service root from any URI on the server
+    tx = _CypherSession(str(graph.__uri__)).create_transaction()
+    if eager:
+        # Open it on the server now, so interrupt_transaction can reach it
+        tx.execute()
+    return tx
+
+def transaction_run(tx, query, params):
+    tx.append(query, params or None)
+    return tx.execute()[-1]
+
+def transaction_run_many(tx, statements):
+    for query, params in statements:
+        tx.append(query, params or None)
+    return [list(result) for result in tx.execute()]
+
+def commit_transaction(graph, tx):
+    tx.commit()
+
+def rollback_transaction(graph, tx):
+    tx.rollback()
+
+def interrupt_transaction(graph, tx):
+    # A separate HTTP request, which aborts any statement still running
+    tx.rollback()
+
 def update_properties(entity, properties):
     entity.update_properties(properties)
 
 def set_properties(entity, properties):
     entity.set_properties(properties)
+
+def entity_graph(entity):
+    return getattr(entity, 'graph_db', None)
+
+def copy_entity_state(dst, src):
+    # 1.6 reads properties & labels from the server on access, so there is
+    # no local state to copy.
+    pass
+
+def entity_state(entity):
+    # 1.6 writes properties & labels to the server eagerly, so there is no
+    # local state left to push.
+    return None
+
+def mark_entity_pushed(entity):
+    pass
+
+def delete_rel(rel):
+    if rel.is_abstract:
+        return
+
+    rel.delete()
@@ -48,6 +48,35 @@ def cypher_stream(graph, query, **params):
 def cypher_execute(graph, query, **params):
     return graph.cypher.execute(query, **params)
 
+def record_keys(record):
+    return list(record.__producer__.columns)
+
+def begin_transaction(graph, eager=False):
+    tx = graph.cypher.begin()
+    if eager:
+        # Open it on the server now, so interrupt_transaction can reach it
+        tx.process()
+    return tx
+
+def transaction_run(tx, query, params):
+    tx.append(query, params or None)
+    return tx.process()[-1]
+
+def transaction_run_many(tx, statements):
+    for query, params in statements:
+        tx.append(query, params or None)
+    return [list(result) for result in tx.process()]
+
+def commit_transaction(graph, tx):
+    tx.commit()
+
+def rollback_transaction(graph, tx):
+    tx.rollback()
+
+def interrupt_transaction(graph, tx):
+    # A separate HTTP request, which aborts any statement still running
+    tx.rollback()
+
 def update_properties(entity, properties):
     entity.properties.update(properties)
 
@@ -61,3 +90,22 @@ def delete_rel(rel):
         return
 
     graph.delete(rel)
+
+def entity_graph(entity):
+    try:
+        return entity.graph
+    except (AttributeError, BindError):
+        return None
+
+def copy_entity_state(dst, src):
+    dst.properties.replace(src.properties)
+    if isinstance(dst, Node):
+        dst.labels.clear()
+        dst.labels.update(src.labels)
+
+def entity_state(entity):
+    labels = frozenset(entity.labels) if isinstance(entity, Node) else None
+    return dict(entity.properties), labels
+
+def mark_entity_pushed(entity):
+    pass
@@ -107,12 +107,6 @@ def graph_find(self, label: object = None, property_key: object = None,
 Graph.find = graph_find
 
 
-def graph_find_one(self, label: str = None, property_key: str = None,
-                   property_value: str = None):
-    return self.find(label, property_key, property_value).first()
-Graph.find_one = graph_find_one
-
-
 Graph._orig_create = Graph.create
 
 
@@ -149,7 +143,8 @@ def graph_match_one(
     end_node: Optional[Node] = None
 ):
     """Match one relationship between two nodes."""
-    return foremost(graph.match(start_node=start_node, rel_type=rel_type, end_node=end_node))
+    return foremost(graph.match(start_node=start_node, rel_type=rel_type,
+                                end_node=end_node, limit=1))
 Graph.match_one = graph_match_one
 
 
@@ -176,6 +171,49 @@ def cypher_execute(graph: Graph, query: str, **ps: Optional[Mapping[str, Any]])
     return list(graph.run(query, **ps))
 
 
+def record_keys(record: Record) -> List[str]:
+    return list(record.keys())
+
+
+def begin_transaction(graph: Graph, eager: bool = False) -> py2neo.Transaction:
+    # Always begun on the server
+    return graph.begin()
+
+
+def transaction_run(tx: py2neo.Transaction, query: str,
+                    params: Optional[Mapping[str, Any]]) -> Iterable:
+    return tx.run(query, params)
+
+
+def transaction_run_many(tx: py2neo.Transaction,
+                         statements: Iterable[Tuple[str, Optional[Mapping]]]
+                         ) -> List[List]:
+    # Bolt has no multi-statement request in py2neo, so each runs in turn,
+    # and the error says which failed (as ``statement_index``)
+    results = []
+    for index, (query, params) in enumerate(statements):
+        try:
+            results.append(list(tx.run(query, params)))
+        except Exception as excp:
+            excp.statement_index = index
+            raise
+    return results
+
+
+def commit_transaction(graph: Graph, tx: py2neo.Transaction):
+    graph.commit(tx)
+
+
+def rollback_transaction(graph: Graph, tx: py2neo.Transaction):
+    graph.rollback(tx)
+
+
+def interrupt_transaction(graph: Graph, tx: py2neo.Transaction):
+    # The Bolt connection may be mid-statement on another thread, so leave
+    # the rollback to it
+    pass
+
+
 def update_properties(entity: _Entity, properties: Mapping[str, Any]):
     entity.update(properties)
 
@@ -190,3 +228,33 @@ def delete_rel(rel: Relationship):
         return
 
     rel.graph.separate(rel)
+
+
+def entity_graph(entity: _Entity) -> Optional[Graph]:
+    return entity.graph
+
+
+def copy_entity_state(dst: _Entity, src: _Entity):
+    """Copy the local properties (and labels) of *src* onto *dst*."""
+    dst.clear()
+    dst.update(src)
+    if isinstance(dst, Node):
+        dst.clear_labels()
+        dst.update_labels(src.labels)
+        dst._remote_labels = src._remote_labels
+
+
+def entity_state(entity: _Entity) -> Optional[Tuple[dict, Optional[frozenset]]]:
+    """Return the local properties (and labels) of *entity*."""
+    labels = frozenset(entity.labels) if isinstance(entity, Node) else None
+    return dict(entity), labels
+
+
+def mark_entity_pushed(entity: _Entity):
+    """Record that the local labels of *entity* are now on the server.
+
+    ``Node.push`` diffs labels against ``_remote_labels``, so leaving them
+    stale would make the next push re-add or miss label changes.
+    """
+    if isinstance(entity, Node):
+        entity._remote_labels = frozenset(entity.labels)
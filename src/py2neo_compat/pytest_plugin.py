@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Pytest fixtures for tests against a disposable Neo4j database.
+
+Enable with ``pytest_plugins = ['py2neo_compat.pytest_plugin']`` in the
+top-level ``conftest.py``.  The :class:`Graph` and baseline are created
+once per session; :func:`compat_graph` resets the graph for each test.
+
+Override :func:`compat_schema` and :func:`compat_baseline` to reset to a
+particular schema and fixture graph.
+"""
+
+from __future__ import absolute_import, print_function
+
+import os
+
+import pytest
+
+from .py2neo_compat import Graph
+from .schema import SchemaMap  # noqa
+from .testing import GraphDump, reset_graph
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Optional  # noqa
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+
+@pytest.fixture(scope='session')
+def compat_neo4j_uri():
+    # type: () -> str
+    """Neo4J URI.  Set env NEO4J_URI or override fixture to change."""
+    return os.environ.get('NEO4J_URI', 'http://localhost:7474/db/data/')
+
+
+# noinspection PyShadowingNames
+@pytest.fixture(scope='session')
+def compat_session_graph(compat_neo4j_uri):
+    # type: (str) -> Graph
+    """Graph object shared by the whole session."""
+    return Graph(compat_neo4j_uri)
+
+
+@pytest.fixture(scope='session')
+def compat_schema():
+    # type: () -> Optional[SchemaMap]
+    """Schema each test starts with; *None* leaves the schema alone."""
+    return None
+
+
+@pytest.fixture(scope='session')
+def compat_baseline():
+    # type: () -> Optional[GraphDump]
+    """Graph each test starts with; *None* for an empty graph."""
+    return None
+
+
+# noinspection PyShadowingNames
+@pytest.fixture
+def compat_graph(compat_session_graph, compat_schema, compat_baseline):
+    # type: (Graph, Optional[SchemaMap], Optional[GraphDump]) -> Graph
+    """Session graph, reset to :func:`compat_schema` & :func:`compat_baseline`.
+
+    Without a :func:`compat_schema`, the schema of the baseline (if it has
+    one) is used, as for :func:`~py2neo_compat.testing.reset_graph`.
+    """
+    keep_schema = compat_schema is None and (
+        compat_baseline is None or not compat_baseline.schema)
+    reset_graph(compat_session_graph,
+                keep_schema=keep_schema,
+                schema=compat_schema,
+                baseline=compat_baseline)
+    return compat_session_graph
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Retrying idempotent operations on transient errors.
+
+Each py2neo version reports a deadlock or a dropped connection
+differently; :func:`is_transient` recognises them all, and a
+:class:`RetryPolicy` retries with jittered exponential backoff.  Attach a
+policy to a graph with :func:`~py2neo_compat.enable_retry` to have the
+idempotent compat writes (:func:`~py2neo_compat.create_unique_rel`,
+:func:`~py2neo_compat.bulk.push_all` and the bulk deletes) retried.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import random
+import socket
+import time
+from functools import wraps
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Any, Callable, Optional  # noqa
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+from .metrics import Metrics, registry
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+# Server exceptions of the REST & legacy Cypher endpoints (1.6 & 2.0 name
+# an error class after them) which a retry may not meet again
+_transient_exceptions = frozenset([
+    'DeadlockDetectedException',
+    'AcquireLockTimeoutException',
+    'TransientFailureException',
+    'TransientTransactionFailureException',
+])
+
+# Connection failures: py2neo 2021 & httpstream (1.6 & 2.0)
+_transient_classes = frozenset([
+    'ConnectionUnavailable',
+    'ConnectionBroken',
+    'ServiceUnavailable',
+    'SocketError',
+])
+
+
+def is_transient(error):
+    # type: (BaseException) -> bool
+    """Whether *error* may not recur if the operation is retried.
+
+    True for:
+
+    * Errors with a Neo4j status code (``code``) classified as
+      ``TransientError``, e.g. ``Neo.TransientError.Transaction.
+      DeadlockDetected`` (transactional endpoint on 2.0, Bolt on 2021).
+    * Errors naming a deadlock or transient failure as their server
+      ``exception`` (REST & legacy Cypher endpoints on 1.6 & 2.0).
+    * Broken or unavailable connections on every version.
+    """
+    code = getattr(error, 'code', None)
+    if isinstance(code, str) and '.TransientError.' in code:
+        return True
+
+    names = set(cls.__name__ for cls in type(error).__mro__)
+    exception = getattr(error, 'exception', None)
+    if isinstance(exception, str):
+        names.add(exception)
+    fullname = getattr(error, 'fullname', None)
+    if isinstance(fullname, str):
+        names.add(fullname.rpartition('.')[2])
+    if names & (_transient_exceptions | _transient_classes):
+        return True
+
+    return isinstance(error, (ConnectionError, socket.timeout))
+
+
+class RetryPolicy(object):
+    """Retry with jittered exponential backoff.
+
+    The *n*-th retry waits up to ``base_delay * multiplier ** (n - 1)``
+    seconds, capped at *max_delay*; with *jitter* the wait is drawn
+    uniformly from zero to that ("full jitter"), so that clients which
+    failed together do not retry together.
+
+    Only use for operations which are safe to repeat.
+
+    Counts ``retry.retries`` (and ``retry.retries.<operation>``),
+    ``retry.recovered`` and ``retry.exhausted`` in *metrics*.
+
+    :param int attempts: Maximum number of calls, including the first.
+    :param float base_delay: Seconds before the first retry.
+    :param float max_delay: Maximum seconds between attempts.
+    :param float multiplier: Growth of the delay per retry.
+    :param bool jitter: Randomise delays.
+    :param retry_on: Predicate on exceptions, default :func:`is_transient`.
+    :param Metrics metrics: (optional) Where to count, default
+        :data:`py2neo_compat.metrics.registry`.
+    """
+
+    def __init__(self, attempts=5, base_delay=0.05, max_delay=5.0,
+                 multiplier=2.0, jitter=True, retry_on=is_transient,
+                 metrics=None, sleep=time.sleep):
+        # type: (int, float, float, float, bool, Callable[[BaseException], bool], Optional[Metrics], Callable[[float], Any]) -> None
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.metrics = registry if metrics is None else metrics
+        self.sleep = sleep
+
+    def delay(self, retry):
+        # type: (int) -> float
+        """Seconds to wait before retry number *retry* (from 1)."""
+        cap = min(self.max_delay,
+                  self.base_delay * self.multiplier ** (retry - 1))
+        if self.jitter:
+            return random.uniform(0, cap)
+        return cap
+
+    def call(self, func, *args, **kwargs):
+        """Call ``func(*args, **kwargs)``, retrying on retryable errors."""
+        return self.run(getattr(func, '__name__', 'call'), func,
+                        *args, **kwargs)
+
+    def run(self, operation, func, *args, **kwargs):
+        """As :meth:`call`, counting retries under *operation*."""
+        attempt = 1
+        while True:
+            try:
+                result = func(*args, **kwargs)
+            except Exception as excp:  # pylint: disable=broad-except
+                if attempt >= self.attempts or not self.retry_on(excp):
+                    if attempt > 1:
+                        self.metrics.incr('retry.exhausted')
+                    raise
+                delay = self.delay(attempt)
+                self.metrics.incr('retry.retries')
+                self.metrics.incr('retry.retries.%s' % operation)
+                log.debug('retrying operation=%s attempt=%d delay=%.3f: %r',
+                          operation, attempt, delay, excp)
+                self.sleep(delay)
+                attempt += 1
+            else:
+                if attempt > 1:
+                    self.metrics.incr('retry.recovered')
+                return result
+
+    def __call__(self, func):
+        # type: (Callable) -> Callable
+        """Decorate *func* to be called with retries."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        return wrapper
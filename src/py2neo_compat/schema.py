@@ -3,9 +3,10 @@ from __future__ import absolute_import, print_function
 import logging
 from functools import partial
 
-from typing import NamedTuple
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple  # noqa
 
 from . import Graph, py2neo_compat, py2neo_ver
+from .cancel import CancellationToken, cancellation
 
 log = logging.getLogger(__name__)  # pylint: disable=invalid-name
 log.addHandler(logging.NullHandler())
@@ -27,6 +28,13 @@ SchemaItem = NamedTuple('SchemaItem', [
 ])
 
 
+def _batch(graph):
+    """REST batch request for *graph*, or *None* where unsupported (2021)."""
+    if py2neo_ver == 2021:
+        return None
+    from .batch_v1 import BatchRequest
+    return BatchRequest(graph)
+
 
 def create_uniqueness_constraint(graph, label, property_key):
     """Create uniqueness constraint."""
@@ -37,14 +45,18 @@ def create_uniqueness_constraint(graph, label, property_key):
         _create_constraint(graph, 'uniqueness', label, property_key)
 
 
-def create_schema(graph, schema_map, ignoredups=True):
-    # type: (Graph) -> None
+def create_schema(graph, schema_map, ignoredups=True, timeout=None,
+                  cancel=None):
+    # type: (Graph, SchemaMap, bool, Optional[float], Optional[CancellationToken]) -> None
     """Create constraints and indexes.
 
     :param Graph graph: Instance of :class:`py2neo.Graph`.
     :param dict schema_map: Mapping describing schema where the key is the
         name of the schema type (corresponding with the keys of the `creators`
         dict below), and the values a list of :class:`SchemaItem` instances.
+    :param float timeout: (optional) Seconds to allow; checked before each
+        request to the server.
+    :param cancel: (optional) Token to stop before the next request.
 
     e.g.:
         'uniqueness_constraints'|'indexes': [
@@ -52,6 +64,30 @@ def create_schema(graph, schema_map, ignoredups=True):
             ...
         ]
     """
+    with cancellation(timeout, cancel) as token:
+        _create_schema(graph, schema_map, ignoredups, token)
+
+
+def _create_schema(graph, schema_map, ignoredups, token):
+    # type: (Graph, SchemaMap, bool, CancellationToken) -> None
+    batch = _batch(graph)
+    if batch is not None:
+        for item in schema_map.get('uniqueness_constraints', []):
+            batch.create_constraint('uniqueness',
+                                    item.label, item.property_key)
+        for item in schema_map.get('indexes', []):
+            batch.create_index(item.label, item.property_key)
+        token.check()
+        try:
+            batch.submit()
+            return
+        except Exception:  # pylint: disable=broad-except
+            if not ignoredups:
+                raise
+            # The batch is all-or-nothing, so redo item by item, skipping
+            # those which already exist
+            log.debug('schema batch failed, creating items one by one',
+                      exc_info=True)
 
     creators = {
         'uniqueness_constraints': partial(create_uniqueness_constraint, graph),
@@ -62,6 +98,7 @@ def create_schema(graph, schema_map, ignoredups=True):
         schema_creator = creators[schema_type]
 
         for item in schema_items:
+            token.check()
             log.debug('creating schema_type="%s" for label="%s"'
                       ' property_key="%s"',
                       schema_type,
@@ -100,37 +137,86 @@ dup_schema_exception_messages = [
 ]
 
 
-def drop_schema(graph):
-    # type: (Graph) -> None
-    """Drop all constraints and indexes."""
-    drop_constraints(graph)
-    drop_indexes(graph)
+def drop_schema(graph, timeout=None, cancel=None):
+    # type: (Graph, Optional[float], Optional[CancellationToken]) -> None
+    """Drop all constraints and indexes.
+
+    *timeout* and *cancel* are as for :func:`create_schema`.
+    """
+    with cancellation(timeout, cancel) as token:
+        drop_constraints(graph, cancel=token)
+        drop_indexes(graph, cancel=token)
+
+
+def drop_constraints(graph, timeout=None, cancel=None):
+    # type: (Graph, Optional[float], Optional[CancellationToken]) -> None
+    """Drop all constraints.
+
+    *timeout* and *cancel* are as for :func:`create_schema`.
+    """
+    with cancellation(timeout, cancel) as token:
+        _drop_constraints(graph, token)
 
 
-def drop_constraints(graph):
-    # type: (Graph) -> None
-    """Drop all constraints."""
+def _drop_constraints(graph, token):
+    # type: (Graph, CancellationToken) -> None
+    token.check()
     constraint_dispatch = {
         'UNIQUENESS': getattr(graph.schema,
                               'drop_uniqueness_constraint',
                               partial(drop_constraint, graph, 'uniqueness')),
     }
 
+    batch = _batch(graph)
     for label, property_keys, type_ in schema_constraints(graph):
         log.debug('dropping schema constraint for label="%s" properties="%s",'
                   ' type="%s"', label, ','.join(property_keys), type_)
         for propkey in property_keys:
-            constraint_dispatch[type_](label, propkey)
+            if batch is not None:
+                batch.drop_constraint(type_.lower(), label, propkey)
+            else:
+                token.check()
+                constraint_dispatch[type_](label, propkey)
+    if batch is not None:
+        token.check()
+        batch.submit()
 
 
-def drop_indexes(graph):
-    # type: (Graph) -> None
-    """Drop all schema indexes."""
-    for label, property_keys in schema_indexes(graph):
+def drop_indexes(graph, timeout=None, cancel=None):
+    # type: (Graph, Optional[float], Optional[CancellationToken]) -> None
+    """Drop all schema indexes.
+
+    *timeout* and *cancel* are as for :func:`create_schema`.
+    """
+    with cancellation(timeout, cancel) as token:
+        _drop_indexes(graph, token)
+
+
+def _drop_indexes(graph, token):
+    # type: (Graph, CancellationToken) -> None
+    token.check()
+    indexes = schema_indexes(graph)
+
+    batch = _batch(graph)
+    if batch is not None and indexes:
+        for label, property_keys in indexes:
+            for property_key in property_keys:
+                batch.drop_index(label, property_key)
+        token.check()
+        try:
+            batch.submit()
+            return
+        except Exception:  # pylint: disable=broad-except
+            # The batch is all-or-nothing; find and log the culprit below
+            log.debug('schema batch failed, dropping indexes one by one',
+                      exc_info=True)
+
+    for label, property_keys in indexes:
         log.debug('dropping schema index for label="%s" properties="%s"',
                   label, ','.join(property_keys))
         try:
             for property_key in property_keys:
+                token.check()
                 graph.schema.drop_index(label, property_key)
         except py2neo_compat.ServerError:
             # Usually means it doesn't have the index or
@@ -141,3 +227,92 @@ def drop_indexes(graph):
             log.exception('dropping index label="%s" properties="%s"',
                           label, ','.join(property_keys))
             raise
+
+
+SchemaMap = Dict[str, List[SchemaItem]]
+
+
+def schema_map(graph, timeout=None, cancel=None):
+    # type: (Graph, Optional[float], Optional[CancellationToken]) -> SchemaMap
+    """Current constraints & indexes, in the form taken by :func:`create_schema`.
+
+    Indexes which back a uniqueness constraint are not listed separately.
+    *timeout* and *cancel* are as for :func:`create_schema`.
+    """
+    with cancellation(timeout, cancel) as token:
+        token.check()
+        constraints = [SchemaItem(label, key)
+                       for label, keys, type_ in schema_constraints(graph)
+                       if type_ == 'UNIQUENESS'
+                       for key in keys]
+        token.check()
+        indexes = [SchemaItem(label, key)
+                   for label, keys in schema_indexes(graph)
+                   for key in keys
+                   if SchemaItem(label, key) not in constraints]
+    return {'uniqueness_constraints': constraints, 'indexes': indexes}
+
+
+def schema_diff(current, wanted):
+    # type: (SchemaMap, SchemaMap) -> Tuple[SchemaMap, SchemaMap]
+    """Items to drop from and create in *current* to make it *wanted*.
+
+    :return: Schema maps of items to drop and items to create; schema types
+        with nothing to do are omitted.
+    """
+    drop, create = {}, {}
+    for schema_type in set(current) | set(wanted):
+        have = current.get(schema_type, [])
+        want = wanted.get(schema_type, [])
+        extra = [item for item in have if item not in want]
+        missing = [item for item in want if item not in have]
+        if extra:
+            drop[schema_type] = extra
+        if missing:
+            create[schema_type] = missing
+    return drop, create
+
+
+def sync_schema(graph, wanted, timeout=None, cancel=None):
+    # type: (Graph, SchemaMap, Optional[float], Optional[CancellationToken]) -> Tuple[SchemaMap, SchemaMap]
+    """Make the schema of *graph* exactly *wanted*.
+
+    Only items which differ are dropped or created, so syncing a graph
+    which already has the wanted schema makes no changes.  *timeout* and
+    *cancel* are as for :func:`create_schema`.
+
+    :return: Items dropped and items created, as for :func:`schema_diff`.
+    """
+    with cancellation(timeout, cancel) as token:
+        return _sync_schema(graph, wanted, token)
+
+
+def _sync_schema(graph, wanted, token):
+    # type: (Graph, SchemaMap, CancellationToken) -> Tuple[SchemaMap, SchemaMap]
+    drop, create = schema_diff(schema_map(graph, cancel=token), wanted)
+
+    batch = _batch(graph)
+    for item in drop.get('uniqueness_constraints', []):
+        log.debug('dropping schema constraint for label="%s" property="%s"',
+                  item.label, item.property_key)
+        if batch is not None:
+            batch.drop_constraint('uniqueness', item.label, item.property_key)
+        else:
+            token.check()
+            getattr(graph.schema, 'drop_uniqueness_constraint',
+                    partial(drop_constraint, graph, 'uniqueness'))(
+                        item.label, item.property_key)
+    for item in drop.get('indexes', []):
+        log.debug('dropping schema index for label="%s" property="%s"',
+                  item.label, item.property_key)
+        if batch is not None:
+            batch.drop_index(item.label, item.property_key)
+        else:
+            token.check()
+            graph.schema.drop_index(item.label, item.property_key)
+    if batch is not None:
+        token.check()
+        batch.submit()
+
+    _create_schema(graph, create, True, token)
+    return drop, create
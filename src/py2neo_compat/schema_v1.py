@@ -66,6 +66,29 @@ def schema_indexes(graph):
             index_resource.get().content]
 
 
+# noinspection PyPep8Naming
+_CR = _ConditionRecord = NamedTuple('ConditionRecord', [
+    ('label', bool),
+    ('property_key', bool),
+    ('constraint_type', bool),
+])
+
+_condition_map = {
+    _CR(label=False, property_key=False, constraint_type=False): '',
+    _CR(True,        property_key=False, constraint_type=False): '{label}/',
+
+    _CR(True,        True,               constraint_type=False):
+        '{label}/{property_key}',
+
+    _CR(True,        property_key=False, constraint_type=True):
+        '{label}/%(constraint_type)s',
+
+    _CR(True,        True,               True):
+        '{label}/%(constraint_type)s/{property_key}',
+
+}
+
+
 def schema_template_subpath(label='', property_key='', constraint_type=''):
     # type: (OptionalStrBool, OptionalStrBool, OptionalStrBool) -> str
     """Get a string URI template by looking up in a map.
@@ -85,32 +108,10 @@ def schema_template_subpath(label='', property_key='', constraint_type=''):
     * A particular constraint for a given label, constraint type and key (DELETE)
     """
 
-    # noinspection PyPep8Naming
-    CR = ConditionRecord = NamedTuple('ConditionRecord', [
-        ('label', bool),
-        ('property_key', bool),
-        ('constraint_type', bool),
-    ])
-
-    condition_map = {
-        CR(label=False, property_key=False, constraint_type=False): '',
-        CR(True,        property_key=False, constraint_type=False): '{label}/',
-
-        CR(True,        True,               constraint_type=False):
-            '{label}/{property_key}',
-
-        CR(True,        property_key=False, constraint_type=True):
-            '{label}/%(constraint_type)s',
-
-        CR(True,        True,               True):
-            '{label}/%(constraint_type)s/{property_key}',
-
-    }
-
-    condition_key = CR(bool(label), bool(property_key), bool(constraint_type))
+    condition_key = _CR(bool(label), bool(property_key), bool(constraint_type))
 
     try:
-        template = condition_map[condition_key]
+        template = _condition_map[condition_key]
     except KeyError:
         raise ValueError('Invalid params for schema subpath condition_key="%s"'
                          % (condition_key,))
@@ -122,7 +123,18 @@ def schema_template_subpath(label='', property_key='', constraint_type=''):
 
 def _schema_template(graph, schema_type, label=None, property_key=None,
                      constraint_type=''):
-    """Generate a URITemplate for schema."""
+    """Generate a URITemplate for schema.
+
+    Templates are cached per graph by schema type and URI shape, and
+    dropped along with the cached metadata by
+    :func:`invalidate_graph_metadata`.
+    """
+    key = (schema_type, bool(label), bool(property_key), constraint_type)
+    templates = graph.__dict__.setdefault('_compat_schema_templates', {})
+    try:
+        return templates[key]
+    except KeyError:
+        pass
 
     subpath = schema_template_subpath(label=label,
                                       property_key=property_key,
@@ -130,7 +142,7 @@ def _schema_template(graph, schema_type, label=None, property_key=None,
 
     uri = graph_metadata(graph, schema_type)
     uri = urljoin(uri + '/', subpath)
-    key_template = URITemplate(uri)
+    key_template = templates[key] = URITemplate(uri)
 
     return key_template
 
@@ -166,9 +178,9 @@ def _create_constraint(graph, constraint_type, label, property_key):
     resource.post({"property_keys": [property_key]})
 
 
-def graph_metadata(graph, key=None):
-    # type: (Graph, Optional[str]) -> Union[Dict, str]
-    """Get graph metadata or a key in the metadata."""
+def _fetch_graph_metadata(graph):
+    # type: (Graph) -> Dict
+    """Get graph metadata from the server."""
 
     # v1.6 has Graph.__metadata__
     metadata = getattr(graph, '__metadata__', None)
@@ -180,8 +192,28 @@ def graph_metadata(graph, key=None):
         metadata = graph.resource.metadata
     elif hasattr(graph, '__remote__'):
         metadata = graph.__remote__.metadata
+    return metadata
+
+
+def graph_metadata(graph, key=None):
+    # type: (Graph, Optional[str]) -> Union[Dict, str]
+    """Get graph metadata or a key in the metadata.
+
+    The metadata is fetched once per graph and cached on it; call
+    :func:`invalidate_graph_metadata` if the server may have changed.
+    """
+    metadata = graph.__dict__.get('_compat_metadata')
+    if metadata is None:
+        metadata = graph._compat_metadata = _fetch_graph_metadata(graph)
 
     if key is not None:
         return metadata[key]
     else:
         return metadata
+
+
+def invalidate_graph_metadata(graph):
+    # type: (Graph) -> None
+    """Forget the cached metadata and schema URI templates of *graph*."""
+    graph.__dict__.pop('_compat_metadata', None)
+    graph.__dict__.pop('_compat_schema_templates', None)
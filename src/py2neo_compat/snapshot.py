@@ -0,0 +1,663 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Local compressed-sparse-row (CSR) snapshot of a (sub)graph.
+
+Requires :mod:`numpy` (the ``analytics`` extra).
+
+Nodes are indexed ``0..n-1`` in order of ID, so that the index of a node
+ID is found with a binary search of :attr:`Snapshot.node_ids` rather than a
+dictionary.  Outgoing relationships of the node at index ``i`` are
+``indices[indptr[i]:indptr[i+1]]`` (the indexes of their end nodes), with
+matching relationship IDs in :attr:`Snapshot.rel_ids`.
+"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import logging
+import os
+from array import array
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import (
+        Any, Dict, Iterable, List, NamedTuple, Optional, Tuple,  # noqa
+    )
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+import numpy as np
+
+from .bulk import exists_many
+from .py2neo_compat import Graph, cypher_stream
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+_ARRAYS = ('node_ids', 'indptr', 'indices', 'rel_ids')
+_NODE_PROP_PREFIX = 'node.'
+_REL_PROP_PREFIX = 'rel.'
+
+
+def _objects(values):
+    # type: (List[Any]) -> np.ndarray
+    """1-D object array of *values*, even if they are equal-length lists."""
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+def _as_column(values):
+    # type: (Any) -> np.ndarray
+    """*values* as a 1-D array; arrays are kept as they are."""
+    if isinstance(values, np.ndarray):
+        return values
+    values = list(values)
+    if any(isinstance(v, (list, tuple)) for v in values):
+        return _objects(values)
+    return np.asarray(values)
+
+
+def _column(values):
+    # type: (List[Any]) -> np.ndarray
+    """Property values as an array: float (NaN for missing) if numeric."""
+    if all(v is None or (isinstance(v, (int, float))
+                         and not isinstance(v, bool)) for v in values):
+        return np.array([np.nan if v is None else v for v in values],
+                        dtype=np.float64)
+    return _objects(values)
+
+
+def _index_of(node_ids, sort_order, identities):
+    # type: (np.ndarray, Optional[np.ndarray], Any) -> np.ndarray
+    """Positions of *identities* in *node_ids*, or -1.
+
+    *node_ids* must be sorted, or else *sort_order* must sort it.
+    """
+    identities = np.asarray(identities, dtype=np.int64)
+    flat = identities.reshape(-1)
+    sorted_ids = node_ids if sort_order is None else node_ids[sort_order]
+    idx = np.searchsorted(sorted_ids, flat)
+    found = idx < len(sorted_ids)
+    found[found] = sorted_ids[idx[found]] == flat[found]
+    if sort_order is not None:
+        idx[found] = sort_order[idx[found]]
+    return np.where(found, idx, -1).reshape(identities.shape)
+
+
+def _assign(column, positions, values):
+    # type: (np.ndarray, np.ndarray, List[Any]) -> np.ndarray
+    """Set *column* at *positions*, promoting to object if need be."""
+    if not len(values):
+        return column
+    values = _column(values)
+    if values.dtype != column.dtype:
+        column = column.astype(object)
+    column[positions] = values
+    return column
+
+
+def _append(column, values):
+    # type: (np.ndarray, List[Any]) -> np.ndarray
+    if not len(values):
+        return column
+    values = _column(values)
+    if values.dtype != column.dtype:
+        column = column.astype(object)
+    return np.concatenate([column, values.astype(column.dtype)])
+
+
+def _to_saved(arr):
+    # type: (np.ndarray) -> np.ndarray
+    """*arr* as saved: object arrays as JSON text where possible.
+
+    Object arrays can only be loaded by unpickling, which may run arbitrary
+    code, so string & list properties and the metadata are stored as a
+    0-d text array instead.  Values JSON cannot hold (e.g. temporal types)
+    are left pickled, and need ``allow_pickle`` to load.
+    """
+    if arr.dtype != object:
+        return arr
+    try:
+        return np.array(json.dumps(arr.tolist()))
+    except (TypeError, ValueError):
+        log.warning('snapshot column not JSON serialisable, so pickled')
+        return arr
+
+
+def _from_saved(arr):
+    # type: (np.ndarray) -> np.ndarray
+    """Undo :func:`_to_saved`."""
+    if arr.ndim or arr.dtype.kind != 'U':
+        return arr
+    values = json.loads(arr.item())
+    if not isinstance(values, list):
+        return np.array(values, dtype=object)  # The 0-d metadata
+    return _objects(values)
+
+
+def _load_npy(path, mmap_mode, allow_pickle):
+    # type: (str, Optional[str], bool) -> np.ndarray
+    """Load a ``.npy`` file, memory-mapped unless it holds objects."""
+    try:
+        return np.load(path, mmap_mode=mmap_mode, allow_pickle=allow_pickle)
+    except ValueError:
+        if not allow_pickle:
+            raise
+        # Pickled object arrays cannot be mapped
+        return np.load(path, allow_pickle=True)
+
+
+class Snapshot(object):
+    """CSR adjacency of a subgraph, as :mod:`numpy` ``int64`` arrays.
+
+    After a :func:`refresh`, relationships may also be held outside the CSR
+    arrays until the next :meth:`compact`, and deleted entities may be
+    masked out by :attr:`node_alive` and :attr:`rel_alive`; use
+    :meth:`edges` rather than the raw CSR arrays to see them all.  Deleted
+    nodes keep their index, with no relationships, until compacted.
+    """
+
+    def __init__(self, node_ids, indptr, indices, rel_ids,
+                 node_properties=None, rel_properties=None):
+        # type: (np.ndarray, np.ndarray, np.ndarray, np.ndarray, Optional[Dict[str, np.ndarray]], Optional[Dict[str, np.ndarray]]) -> None
+        self.node_ids = node_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.rel_ids = rel_ids
+        self.node_properties = dict(node_properties or {})
+        self.rel_properties = dict(rel_properties or {})
+        self.node_alive = np.ones(len(node_ids), dtype=bool)
+        self.rel_alive = np.ones(len(indices), dtype=bool)
+        self.source = None  # type: Optional[Dict[str, Any]]
+        self.watermark = None  # type: Any
+        self._sort_order = None  # type: Optional[np.ndarray]
+        self._extra = {
+            'starts': np.zeros(0, dtype=np.int64),
+            'ends': np.zeros(0, dtype=np.int64),
+            'rel_ids': np.zeros(0, dtype=np.int64),
+        }  # type: Dict[str, np.ndarray]
+        self._extra_properties = {
+            k: v[:0] for k, v in self.rel_properties.items()
+        }  # type: Dict[str, np.ndarray]
+
+    def __repr__(self):
+        return '<%s nodes=%d rels=%d>' % (type(self).__name__,
+                                          self.num_nodes, self.num_rels)
+
+    @property
+    def num_nodes(self):
+        # type: () -> int
+        """Number of node indexes, including deleted but uncompacted."""
+        return len(self.node_ids)
+
+    @property
+    def num_rels(self):
+        # type: () -> int
+        """Number of live relationships."""
+        return int(self.rel_alive.sum()) + len(self._extra['rel_ids'])
+
+    @property
+    def num_dead(self):
+        # type: () -> int
+        """Number of deleted nodes and relationships awaiting compaction."""
+        return int((~self.node_alive).sum() + (~self.rel_alive).sum())
+
+    @classmethod
+    def from_edges(cls, node_ids, start_ids, end_ids, rel_ids,
+                   node_properties=None, rel_properties=None):
+        # type: (Iterable[int], Iterable[int], Iterable[int], Iterable[int], Optional[Dict[str, Any]], Optional[Dict[str, Any]]) -> Snapshot
+        """Build from node IDs and parallel relationship start/end/ID lists.
+
+        Node property columns are parallel to *node_ids*, relationship
+        property columns to *rel_ids*.  Relationships with an end outside
+        *node_ids* are dropped.
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        order = np.argsort(node_ids, kind='stable')
+        node_ids = node_ids[order]
+        node_properties = {k: _as_column(v)[order]
+                           for k, v in (node_properties or {}).items()}
+
+        starts = _index_of(node_ids, None, start_ids)
+        ends = _index_of(node_ids, None, end_ids)
+        keep = (starts >= 0) & (ends >= 0)
+        if not keep.all():
+            log.debug('dropping %d relationships outside snapshot',
+                      len(keep) - keep.sum())
+
+        starts, ends = starts[keep], ends[keep]
+        order = np.argsort(starts, kind='stable')
+        rel_ids = np.asarray(rel_ids, dtype=np.int64)[keep][order]
+        rel_properties = {k: _as_column(v)[keep][order]
+                          for k, v in (rel_properties or {}).items()}
+        counts = np.bincount(starts, minlength=len(node_ids))
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        return cls(node_ids, indptr, ends[order], rel_ids,
+                   node_properties, rel_properties)
+
+    def index_of(self, identities):
+        # type: (Any) -> np.ndarray
+        """Indexes of node IDs (scalar or array), with -1 for absent IDs."""
+        idx = _index_of(self.node_ids, self._sort_order, identities)
+        flat = idx.reshape(-1)
+        flat[flat >= 0] = np.where(self.node_alive[flat[flat >= 0]],
+                                   flat[flat >= 0], -1)
+        return idx
+
+    def edges(self):
+        # type: () -> Tuple[np.ndarray, np.ndarray, np.ndarray]
+        """Start indexes, end indexes & IDs of all live relationships."""
+        starts = np.repeat(np.arange(self.num_nodes, dtype=np.int64),
+                           np.diff(self.indptr))
+        alive = self.rel_alive
+        return (np.concatenate([starts[alive], self._extra['starts']]),
+                np.concatenate([np.asarray(self.indices)[alive],
+                                self._extra['ends']]),
+                np.concatenate([np.asarray(self.rel_ids)[alive],
+                                self._extra['rel_ids']]))
+
+    def out_degree(self):
+        # type: () -> np.ndarray
+        return np.bincount(self.edges()[0], minlength=self.num_nodes)
+
+    def neighbours(self, identity):
+        # type: (int) -> np.ndarray
+        """Node IDs at the end of relationships from node *identity*."""
+        i = int(self.index_of(identity))
+        if i < 0:
+            raise KeyError(identity)
+        row = slice(self.indptr[i], self.indptr[i + 1])
+        ends = np.concatenate([
+            self.indices[row][self.rel_alive[row]],
+            self._extra['ends'][self._extra['starts'] == i],
+        ])
+        return self.node_ids[ends]
+
+    def compact(self):
+        # type: () -> None
+        """Rebuild the CSR arrays without deleted entities.
+
+        Node indexes change: live nodes are renumbered in order of ID.
+        """
+        starts, ends, rel_ids = self.edges()
+        alive = self.rel_alive
+        rel_properties = {
+            k: np.concatenate([np.asarray(v)[alive],
+                               self._extra_properties[k]])
+            for k, v in self.rel_properties.items()
+        }
+        live = self.node_alive
+        compacted = type(self).from_edges(
+            np.asarray(self.node_ids)[live],
+            self.node_ids[starts], self.node_ids[ends], rel_ids,
+            {k: np.asarray(v)[live] for k, v in self.node_properties.items()},
+            rel_properties,
+        )
+        log.debug('compacted snapshot dead=%d extra=%d',
+                  self.num_dead, len(self._extra['rel_ids']))
+        source, watermark = self.source, self.watermark
+        self.__dict__.update(compacted.__dict__)
+        self.source, self.watermark = source, watermark
+
+    def _arrays(self):
+        arrays = {name: getattr(self, name) for name in _ARRAYS}
+        arrays.update((_NODE_PROP_PREFIX + k, v)
+                      for k, v in self.node_properties.items())
+        arrays.update((_REL_PROP_PREFIX + k, v)
+                      for k, v in self.rel_properties.items())
+        arrays['meta'] = np.array({'source': self.source,
+                                   'watermark': self.watermark},
+                                  dtype=object)
+        return {name: _to_saved(arr) for name, arr in arrays.items()}
+
+    def save(self, path):
+        # type: (str) -> None
+        """Save to a ``.npz`` file, or else a directory of ``.npy`` files.
+
+        Only the latter can be loaded memory-mapped.  The snapshot is
+        compacted first if it has changes from :func:`refresh`, including
+        added nodes, whose IDs are out of order until then.
+        """
+        if (self.num_dead or len(self._extra['rel_ids'])
+                or self._sort_order is not None):
+            self.compact()
+
+        if path.endswith('.npz'):
+            np.savez(path, **self._arrays())
+            return
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        for name, arr in self._arrays().items():
+            np.save(os.path.join(path, name + '.npy'), arr)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None, allow_pickle=False):
+        # type: (str, Optional[str], bool) -> Snapshot
+        """Load from :meth:`save` output.
+
+        :param str path: ``.npz`` file or directory.
+        :param str mmap_mode: (optional) Memory-map a directory's arrays
+            with this :func:`numpy.load` mode, e.g. ``'r'``.
+        :param bool allow_pickle: Load pickled arrays, i.e. properties
+            which JSON cannot hold and files saved by earlier versions.
+            Unpickling can run arbitrary code, so only for trusted files.
+        :raises ValueError: If the file has pickled arrays and
+            *allow_pickle* is false.
+        """
+        if path.endswith('.npz'):
+            with np.load(path, allow_pickle=allow_pickle) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        else:
+            arrays = {
+                name[:-len('.npy')]: _load_npy(os.path.join(path, name),
+                                               mmap_mode, allow_pickle)
+                for name in os.listdir(path) if name.endswith('.npy')
+            }
+        arrays = {name: _from_saved(arr) for name, arr in arrays.items()}
+
+        meta = arrays.pop('meta', np.array({}, dtype=object)).item()
+        node_properties, rel_properties = {}, {}
+        for name, arr in arrays.items():
+            if name.startswith(_NODE_PROP_PREFIX):
+                node_properties[name[len(_NODE_PROP_PREFIX):]] = arr
+            elif name.startswith(_REL_PROP_PREFIX):
+                rel_properties[name[len(_REL_PROP_PREFIX):]] = arr
+
+        snap = cls(*(arrays[name] for name in _ARRAYS),
+                   node_properties=node_properties,
+                   rel_properties=rel_properties)
+        snap.source = meta.get('source')
+        snap.watermark = meta.get('watermark')
+        return snap
+
+
+def _label_condition(var, labels):
+    if not labels:
+        return 'true'
+    return 'any(l IN labels(%s) WHERE l IN {labels})' % var
+
+
+def _max_watermark(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+_Nodes = NamedTuple('_Nodes', [
+    ('ids', np.ndarray),
+    ('columns', List[List[Any]]),
+    ('watermark', Any),
+])
+
+_Rels = NamedTuple('_Rels', [
+    ('ids', np.ndarray),
+    ('start_ids', np.ndarray),
+    ('end_ids', np.ndarray),
+    ('columns', List[List[Any]]),
+    ('watermark', Any),
+])
+
+
+def _stream_nodes(graph, source, since=None):
+    # type: (Graph, Dict[str, Any], Any) -> _Nodes
+    """Stream the source's nodes, only those changed after *since* if given.
+
+    IDs are accumulated in compact :class:`array.array` buffers rather than
+    lists of Python objects, so memory use is close to the final arrays.
+    """
+    watermark = source['watermark']
+    conditions = [_label_condition('n', source['labels'])]
+    if since is not None:
+        conditions.append('n.`%s` > {since}' % watermark)
+
+    # language=cypher
+    query = """
+        MATCH (n)
+        WHERE %s
+        RETURN ID(n) AS id, %s AS wm%s
+    """ % (' AND '.join(conditions),
+           'n.`%s`' % watermark if watermark else 'null',
+           ''.join(', n.`%s` AS p%d' % (k, i)
+                   for i, k in enumerate(source['node_properties'])))
+
+    ids = array('q')
+    columns = [[] for _ in source['node_properties']]
+    high_water = None
+    for row in cypher_stream(graph, query, labels=source['labels'],
+                             since=since):
+        ids.append(row['id'])
+        for i, column in enumerate(columns):
+            column.append(row['p%d' % i])
+        high_water = _max_watermark(high_water, row['wm'])
+
+    return _Nodes(np.frombuffer(ids, dtype=np.int64), columns, high_water)
+
+
+def _stream_rels(graph, source, since=None):
+    # type: (Graph, Dict[str, Any], Any) -> _Rels
+    """Stream the source's relationships, as for :func:`_stream_nodes`."""
+    watermark = source['watermark']
+    conditions = [_label_condition('a', source['labels']),
+                  _label_condition('b', source['labels'])]
+    if source['rel_types']:
+        conditions.append('type(r) IN {rel_types}')
+    if since is not None:
+        conditions.append('r.`%s` > {since}' % watermark)
+
+    # language=cypher
+    query = """
+        MATCH (a)-[r]->(b)
+        WHERE %s
+        RETURN ID(r) AS id, ID(a) AS start, ID(b) AS end, %s AS wm%s
+    """ % (' AND '.join(conditions),
+           'r.`%s`' % watermark if watermark else 'null',
+           ''.join(', r.`%s` AS p%d' % (k, i)
+                   for i, k in enumerate(source['rel_properties'])))
+
+    ids, start_ids, end_ids = array('q'), array('q'), array('q')
+    columns = [[] for _ in source['rel_properties']]
+    high_water = None
+    for row in cypher_stream(graph, query, labels=source['labels'],
+                             rel_types=source['rel_types'], since=since):
+        ids.append(row['id'])
+        start_ids.append(row['start'])
+        end_ids.append(row['end'])
+        for i, column in enumerate(columns):
+            column.append(row['p%d' % i])
+        high_water = _max_watermark(high_water, row['wm'])
+
+    return _Rels(np.frombuffer(ids, dtype=np.int64),
+                 np.frombuffer(start_ids, dtype=np.int64),
+                 np.frombuffer(end_ids, dtype=np.int64),
+                 columns, high_water)
+
+
+def snapshot(graph, labels=None, rel_types=None, node_properties=(),
+             rel_properties=(), watermark=None):
+    # type: (Graph, Optional[Iterable[str]], Optional[Iterable[str]], Iterable[str], Iterable[str], Optional[str]) -> Snapshot
+    """Stream a subgraph into a :class:`Snapshot`.
+
+    :param Graph graph: Graph session/connection.
+    :param labels: (optional) Only nodes with any of these labels.
+    :param rel_types: (optional) Only relationships of these types.
+    :param node_properties: Node properties to load as columns.
+    :param rel_properties: Relationship properties to load as columns.
+    :param str watermark: (optional) Property, on both nodes and
+        relationships, that increases whenever they change (e.g. an
+        updated-at timestamp); required for :func:`refresh`.
+    """
+    source = {
+        'labels': list(labels or []),
+        'rel_types': list(rel_types or []),
+        'node_properties': list(node_properties),
+        'rel_properties': list(rel_properties),
+        'watermark': watermark,
+    }
+
+    nodes = _stream_nodes(graph, source)
+    rels = _stream_rels(graph, source)
+    log.debug('snapshot nodes=%d rels=%d', len(nodes.ids), len(rels.ids))
+
+    snap = Snapshot.from_edges(
+        nodes.ids, rels.start_ids, rels.end_ids, rels.ids,
+        node_properties={k: _column(v) for k, v in
+                         zip(source['node_properties'], nodes.columns)},
+        rel_properties={k: _column(v) for k, v in
+                        zip(source['rel_properties'], rels.columns)},
+    )
+    snap.source = source
+    snap.watermark = _max_watermark(nodes.watermark, rels.watermark)
+    return snap
+
+
+RefreshStats = NamedTuple('RefreshStats', [
+    ('nodes_changed', int),
+    ('nodes_added', int),
+    ('nodes_deleted', int),
+    ('rels_changed', int),
+    ('rels_added', int),
+    ('rels_deleted', int),
+    ('compacted', bool),
+])
+
+
+def _exists(graph, ids, kind, batch_size):
+    # type: (Graph, np.ndarray, str, int) -> np.ndarray
+    return np.array(exists_many(graph, ids.tolist(), kind, batch_size),
+                    dtype=bool).reshape(-1)
+
+
+def _writable(arr):
+    # type: (np.ndarray) -> np.ndarray
+    """*arr*, or a copy if it is read-only (e.g. memory-mapped)."""
+    return arr if arr.flags.writeable else np.array(arr)
+
+
+def refresh(graph, snap, check_deleted=True, compact_ratio=0.25,
+            batch_size=10000):
+    # type: (Graph, Snapshot, bool, float, int) -> RefreshStats
+    """Update *snap* in place with entities changed since it was taken.
+
+    Only nodes and relationships whose watermark property is greater than
+    :attr:`Snapshot.watermark` are read.  Changed entities are patched in
+    place; new relationships are held beside the CSR arrays and deleted
+    entities masked out until the snapshot is compacted, which happens
+    once they make up more than *compact_ratio* of it.
+
+    Deletions cannot be seen through the watermark, so when *check_deleted*
+    is true the IDs of all live entities are checked, *batch_size* at a
+    time; this is much cheaper than a full snapshot but not free.  Nodes
+    which lose all the snapshot's labels are not noticed.
+
+    :param Graph graph: Graph session/connection.
+    :param Snapshot snap: Snapshot taken with a *watermark* property.
+    :raises ValueError: If *snap* has no watermark property.
+    """
+    source = snap.source
+    if not source or not source.get('watermark'):
+        raise ValueError('Snapshot has no watermark property to refresh by')
+
+    since = snap.watermark
+    nodes = _stream_nodes(graph, source, since)
+    rels = _stream_rels(graph, source, since)
+
+    for name in ('node_ids', 'indptr', 'indices', 'rel_ids'):
+        setattr(snap, name, _writable(getattr(snap, name)))
+    for props in (snap.node_properties, snap.rel_properties):
+        for k, v in props.items():
+            props[k] = _writable(v)
+
+    # Nodes: update in place (reviving reused IDs), append new
+    idx = _index_of(snap.node_ids, snap._sort_order, nodes.ids)
+    known = idx >= 0
+    snap.node_alive[idx[known]] = True
+    for k, column in zip(source['node_properties'], nodes.columns):
+        values = _objects(column)
+        snap.node_properties[k] = _append(
+            _assign(snap.node_properties[k], idx[known],
+                    values[known].tolist()),
+            values[~known].tolist())
+    if (~known).any():
+        snap.node_ids = np.concatenate([snap.node_ids, nodes.ids[~known]])
+        snap.node_alive = np.concatenate(
+            [snap.node_alive, np.ones((~known).sum(), dtype=bool)])
+        snap.indptr = np.concatenate(
+            [snap.indptr, np.repeat(snap.indptr[-1:], (~known).sum())])
+        snap._sort_order = np.argsort(snap.node_ids, kind='stable')
+
+    # Relationships: update in place where endpoints are unchanged, else
+    # (new, or a reused ID) mask any old one and add to the extras
+    csr_starts = np.repeat(np.arange(snap.num_nodes, dtype=np.int64),
+                           np.diff(snap.indptr))
+    starts = snap.index_of(rels.start_ids)
+    ends = snap.index_of(rels.end_ids)
+    extra = snap._extra
+    pos = _index_of(snap.rel_ids, np.argsort(snap.rel_ids), rels.ids)
+    in_csr = pos >= 0
+    in_csr[in_csr] = ((csr_starts[pos[in_csr]] == starts[in_csr])
+                      & (snap.indices[pos[in_csr]] == ends[in_csr]))
+    snap.rel_alive[pos[(pos >= 0) & ~in_csr]] = False
+    snap.rel_alive[pos[in_csr]] = True
+
+    xpos = _index_of(extra['rel_ids'], np.argsort(extra['rel_ids']), rels.ids)
+    in_extra = xpos >= 0
+    in_extra[in_extra] = ((extra['starts'][xpos[in_extra]] == starts[in_extra])
+                          & (extra['ends'][xpos[in_extra]] == ends[in_extra]))
+    stale = np.zeros(len(extra['rel_ids']), dtype=bool)
+    stale[xpos[(xpos >= 0) & ~in_extra]] = True
+
+    added = ~in_csr & ~in_extra & (starts >= 0) & (ends >= 0)
+    for k, column in zip(source['rel_properties'], rels.columns):
+        values = _objects(column)
+        snap.rel_properties[k] = _assign(snap.rel_properties[k],
+                                         pos[in_csr],
+                                         values[in_csr].tolist())
+        snap._extra_properties[k] = _append(
+            _assign(snap._extra_properties[k], xpos[in_extra],
+                    values[in_extra].tolist())[~stale],
+            values[added].tolist())
+    snap._extra = {
+        'starts': np.concatenate([extra['starts'][~stale], starts[added]]),
+        'ends': np.concatenate([extra['ends'][~stale], ends[added]]),
+        'rel_ids': np.concatenate([extra['rel_ids'][~stale],
+                                   rels.ids[added]]),
+    }
+
+    nodes_deleted = rels_deleted = 0
+    if check_deleted:
+        live = np.flatnonzero(snap.node_alive)
+        gone = live[~_exists(graph, snap.node_ids[live], 'node', batch_size)]
+        snap.node_alive[gone] = False
+        nodes_deleted = len(gone)
+
+        live = np.flatnonzero(snap.rel_alive)
+        gone = live[~_exists(graph, snap.rel_ids[live], 'rel', batch_size)]
+        snap.rel_alive[gone] = False
+        kept = _exists(graph, snap._extra['rel_ids'], 'rel', batch_size)
+        snap._extra = {k: v[kept] for k, v in snap._extra.items()}
+        snap._extra_properties = {k: v[kept] for k, v in
+                                  snap._extra_properties.items()}
+        rels_deleted = len(gone) + int((~kept).sum())
+
+    snap.watermark = _max_watermark(since, nodes.watermark, rels.watermark)
+
+    size = snap.num_nodes + len(snap.rel_alive) + len(snap._extra['rel_ids'])
+    compacted = (snap.num_dead + len(snap._extra['rel_ids'])
+                 > compact_ratio * size)
+    if compacted:
+        snap.compact()
+
+    stats = RefreshStats(
+        nodes_changed=int(known.sum()), nodes_added=int((~known).sum()),
+        nodes_deleted=nodes_deleted,
+        rels_changed=int(in_csr.sum() + in_extra.sum()),
+        rels_added=int(added.sum()), rels_deleted=rels_deleted,
+        compacted=compacted,
+    )
+    log.debug('refreshed snapshot %s', stats)
+    return stats
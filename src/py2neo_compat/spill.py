@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Query results which spill to disk past a size threshold.
+
+See the *spill_threshold* argument of :func:`~py2neo_compat.cypher_execute`.
+Each row is pickled on its own as it arrives.  While the pickles' total
+size is under the threshold they are kept in memory; past it they are all
+written, unchanged, to an anonymous temporary file, followed by an array of
+their byte offsets.  Rows are then unpickled one at a time from a memory
+map of that file as they are read.  The file is scratch space for this
+process only, not a portable format.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import mmap
+import pickle
+import tempfile
+from array import array
+from collections.abc import Sequence
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Any, Dict, Iterable, Iterator, List, Optional  # noqa
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+from .py2neo_compat import Node, Relationship, record_keys
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+class Row(tuple):
+    """Record of plain values, indexable by position or column name."""
+
+    __slots__ = ()
+    _index = {}  # type: Dict[str, int]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._index[key]
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        # type: () -> List[str]
+        return list(self._index)
+
+
+def _row_class(columns):
+    # type: (Iterable[str]) -> type
+    return type('Row', (Row,), {
+        '__slots__': (),
+        '_index': {column: i for i, column in enumerate(columns)},
+    })
+
+
+def plain(value):
+    # type: (Any) -> Any
+    """*value* with nodes & relationships replaced by :class:`dict`\\s.
+
+    A node becomes ``{'id', 'labels', 'properties'}`` and a relationship
+    ``{'id', 'type', 'start', 'end', 'properties'}``.
+    """
+    if isinstance(value, Node):
+        return {'id': value._id,
+                'labels': sorted(value.labels),
+                'properties': dict(value.to_dict())}
+    if isinstance(value, Relationship):
+        return {'id': value._id,
+                'type': value.reltype,
+                'start': value.start_node._id,
+                'end': value.end_node._id,
+                'properties': dict(value.to_dict())}
+    if isinstance(value, dict):
+        return {k: plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    return value
+
+
+class SpillableResult(Sequence):
+    """Sequence of :class:`Row`, in memory or memory-mapped from disk.
+
+    Supports :func:`len`, indexing, slicing and repeated iteration.  Call
+    :meth:`close` (or use as a context manager) to release the file and
+    map early; rows cannot be read after closing.
+    """
+
+    def __init__(self, columns, threshold):
+        # type: (List[str], int) -> None
+        self.columns = list(columns)
+        self.threshold = threshold
+        self._row = _row_class(self.columns)
+        self._chunks = []  # type: List[bytes]  # Until spilled
+        self._size = 0
+        self._file = None
+        self._offsets = array('q', [0])
+        self._map = None  # type: Optional[mmap.mmap]
+        self._view = None  # type: Optional[memoryview]
+        self._index = None  # type: Optional[memoryview]
+
+    @property
+    def spilled(self):
+        # type: () -> bool
+        """Whether the rows are on disk."""
+        return self._file is not None
+
+    def _append(self, values):
+        # type: (Iterable[Any]) -> None
+        data = pickle.dumps(tuple(values), pickle.HIGHEST_PROTOCOL)
+        self._size += len(data)
+        self._offsets.append(self._size)
+        if self._file is not None:
+            self._file.write(data)
+            return
+
+        self._chunks.append(data)
+        if self._size > self.threshold:
+            log.debug('spilling rows=%d bytes=%d',
+                      len(self._chunks), self._size)
+            self._file = tempfile.TemporaryFile(prefix='py2neo_compat-')
+            self._file.writelines(self._chunks)
+            self._chunks = []
+
+    def _finish(self):
+        # type: () -> None
+        if self._file is None:
+            self._offsets = None
+            return
+        # Pad so the index of offsets is aligned, then map the lot
+        self._file.write(b'\0' * (-self._size % self._offsets.itemsize))
+        self._file.write(self._offsets.tobytes())
+        self._file.flush()
+        data_size = self._size + (-self._size % self._offsets.itemsize)
+        count = len(self._offsets)
+        self._offsets = None
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._index = self._view[data_size:].cast('q')
+        assert len(self._index) == count
+
+    def __len__(self):
+        if self._index is not None:
+            return len(self._index) - 1
+        return len(self._chunks)
+
+    def _load(self, i):
+        # type: (int) -> Row
+        if self._index is not None:
+            data = self._view[self._index[i]:self._index[i + 1]]
+        else:
+            data = self._chunks[i]
+        return self._row(pickle.loads(data))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._load(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('row index out of range')
+        return self._load(i)
+
+    def __iter__(self):
+        # type: () -> Iterator[Row]
+        for i in range(len(self)):
+            yield self._load(i)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        # type: () -> None
+        """Release the memory map and delete the file, if spilled."""
+        if self._index is not None:
+            self._index.release()
+            self._view.release()
+            self._map.close()
+            self._index = self._view = self._map = None
+        if self._file is not None:
+            self._file.close()
+        self._chunks = []
+
+
+def spill_records(records, threshold):
+    # type: (Iterable, int) -> SpillableResult
+    """Collect *records* into a :class:`SpillableResult`.
+
+    :param records: Records, as from :func:`~py2neo_compat.cypher_stream`.
+    :param int threshold: Bytes of pickled rows to keep in memory before
+        spilling to disk.
+    """
+    result = None
+    for record in records:
+        if result is None:
+            result = SpillableResult(record_keys(record), threshold)
+        keys = result.columns
+        result._append(plain(record[key]) for key in keys)
+    if result is None:
+        result = SpillableResult([], threshold)
+    result._finish()
+    return result
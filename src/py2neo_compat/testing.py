@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Resetting a graph between tests.
+
+:func:`reset_graph` empties a graph with batched deletes, optionally syncs
+its schema and restores a baseline :class:`GraphDump`.  Fixtures built on it
+are in :mod:`py2neo_compat.pytest_plugin`.
+"""
+
+from __future__ import absolute_import, print_function
+
+import json
+import logging
+from collections import OrderedDict
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import Any, Dict, List, NamedTuple, Optional, Tuple  # noqa
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+from boltons.iterutils import chunked_iter
+
+from .bulk import delete_all
+from .py2neo_compat import Graph, cypher_execute, cypher_stream, to_dict
+from .schema import SchemaItem, SchemaMap, schema_map, sync_schema
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+GraphDump = NamedTuple('GraphDump', [
+    # (key, labels, properties); keys are the IDs the nodes had when dumped
+    ('nodes', List[Tuple[int, List[str], Dict[str, Any]]]),
+    # (start key, end key, type, properties)
+    ('rels', List[Tuple[int, int, str, Dict[str, Any]]]),
+    ('schema', Optional[SchemaMap]),
+])
+
+
+def dump_graph(graph, with_schema=True):
+    # type: (Graph, bool) -> GraphDump
+    """Copy every node, relationship and (optionally) the schema of *graph*.
+
+    Only meant for small fixture graphs; the dump is held in memory.
+    """
+    # language=cypher
+    nodes = [(row['id'], sorted(row['labels']), to_dict(row['n']))
+             for row in cypher_stream(graph, """
+                 MATCH (n) RETURN ID(n) AS id, labels(n) AS labels, n
+             """)]
+    # language=cypher
+    rels = [(row['start'], row['end'], row['type'], to_dict(row['r']))
+            for row in cypher_stream(graph, """
+                MATCH (a)-[r]->(b)
+                RETURN ID(a) AS start, ID(b) AS end, type(r) AS type, r
+            """)]
+
+    return GraphDump(nodes, rels, schema_map(graph) if with_schema else None)
+
+
+def save_dump(dump, path):
+    # type: (GraphDump, str) -> None
+    """Write *dump* to *path* as JSON."""
+    schema = None
+    if dump.schema is not None:
+        schema = {schema_type: [list(item) for item in items]
+                  for schema_type, items in dump.schema.items()}
+    with open(path, 'w') as fp:
+        json.dump({'nodes': dump.nodes, 'rels': dump.rels, 'schema': schema},
+                  fp)
+
+
+def load_dump(path):
+    # type: (str) -> GraphDump
+    """Read a dump written by :func:`save_dump`."""
+    with open(path) as fp:
+        data = json.load(fp)
+    schema = data['schema']
+    if schema is not None:
+        schema = {schema_type: [SchemaItem(*item) for item in items]
+                  for schema_type, items in schema.items()}
+    return GraphDump([tuple(n) for n in data['nodes']],
+                     [tuple(r) for r in data['rels']],
+                     schema)
+
+
+def restore_graph(graph, dump, batch_size=1000):
+    # type: (Graph, GraphDump, int) -> Dict[int, int]
+    """Create the nodes & relationships of *dump* in *graph*.
+
+    Nodes are created ``UNWIND`` *batch_size* at a time per label set, and
+    relationships per type.  The schema of the dump is not restored; see
+    :func:`reset_graph`.
+
+    :return: Mapping of dumped node key to created node ID.
+    """
+    by_labels = OrderedDict()  # type: Dict[Tuple[str, ...], List[Dict]]
+    for key, labels, properties in dump.nodes:
+        by_labels.setdefault(tuple(labels), []).append(
+            {'key': key, 'properties': properties})
+
+    ids = {}
+    for labels, rows in by_labels.items():
+        # language=cypher
+        query = """
+            UNWIND {rows} AS row
+            CREATE (n%s)
+            SET n = row.properties
+            RETURN row.key AS key, ID(n) AS id
+        """ % ''.join(':`%s`' % label for label in labels)
+        for batch in chunked_iter(rows, batch_size):
+            ids.update((row['key'], row['id'])
+                       for row in cypher_execute(graph, query, rows=batch))
+
+    by_type = OrderedDict()  # type: Dict[str, List[Dict]]
+    for start, end, rel_type, properties in dump.rels:
+        by_type.setdefault(rel_type, []).append(
+            {'start': ids[start], 'end': ids[end], 'properties': properties})
+
+    for rel_type, rows in by_type.items():
+        # language=cypher
+        query = """
+            UNWIND {rows} AS row
+            MATCH (a), (b)
+            WHERE ID(a) = row.start AND ID(b) = row.end
+            CREATE (a)-[r:`%s`]->(b)
+            SET r = row.properties
+        """ % rel_type
+        for batch in chunked_iter(rows, batch_size):
+            cypher_execute(graph, query, rows=batch)
+
+    log.debug('restore_graph nodes=%d rels=%d',
+              len(dump.nodes), len(dump.rels))
+    return ids
+
+
+def reset_graph(graph, keep_schema=True, schema=None, baseline=None,
+                batch_size=10000):
+    # type: (Graph, bool, Optional[SchemaMap], Optional[GraphDump], int) -> None
+    """Return *graph* to a known state.
+
+    All nodes and relationships are deleted in batches with
+    :func:`~py2neo_compat.bulk.delete_all`.  Unless *keep_schema*, the
+    schema is then synced with :func:`~py2neo_compat.schema.sync_schema` to
+    *schema*, the schema of *baseline* or, failing both, no schema at all;
+    only differing items are dropped or created.  Finally *baseline*, if
+    any, is restored.
+
+    :param Graph graph: Graph session/connection.
+    :param bool keep_schema: Leave constraints & indexes untouched.
+    :param schema: (optional) Schema map to reset to.
+    :param GraphDump baseline: (optional) Graph to restore, e.g. from
+        :func:`dump_graph` or :func:`load_dump`.
+    :param int batch_size: Maximum number of entities per query.
+    """
+    deleted = delete_all(graph, batch_size=batch_size)
+    log.debug('reset_graph deleted nodes=%d rels=%d',
+              deleted.nodes, deleted.rels)
+
+    if not keep_schema:
+        if schema is None and baseline is not None:
+            schema = baseline.schema
+        sync_schema(graph, schema or {})
+
+    if baseline is not None:
+        restore_graph(graph, baseline, batch_size=batch_size)
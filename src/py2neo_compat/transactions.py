@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Cross-version explicit transactions.
+
+py2neo 1.6 has ``CypherTransaction`` (via ``cypher.Session``), 2.0 has
+``graph.cypher.begin()`` with ``append``/``process`` and 2021 has
+``graph.begin()`` with ``run``, committed through ``graph.commit``.
+:class:`Transaction` gives them all the ``execute``/``stream`` interface
+of :func:`~py2neo_compat.cypher_execute` and
+:func:`~py2neo_compat.cypher_stream`, and :func:`cypher_execute_many`
+sends statements in groups, one round trip per group where possible.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+from functools import partial
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import (
+        Any, Dict, FrozenSet, Iterable, List, Optional, Tuple,  # noqa
+    )
+    Statement = Tuple[str, Optional[Dict[str, Any]]]
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+import six
+from boltons.iterutils import chunked
+
+from .cancel import CancellationToken, QueryCancelled, cancellation, checked
+from .py2neo_compat import (
+    Graph, _written_tags, begin_transaction, commit_transaction,
+    interrupt_transaction, invalidate_queries, query_cache,
+    rollback_transaction, transaction_run, transaction_run_many,
+)
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+def _merge_tags(a, b):
+    # type: (Optional[FrozenSet[str]], Optional[FrozenSet[str]]) -> Optional[FrozenSet[str]]
+    """Union of query tags, where *None* means any."""
+    if a is None or b is None:
+        return None
+    return a | b
+
+
+class Transaction(object):
+    """Explicit transaction, committed every *commit_every* statements.
+
+    The server transaction is begun lazily by the first statement.  As a
+    context manager, the transaction is committed on leaving the block or
+    rolled back if it raises.
+
+    With *commit_every*, the server transaction is committed (and a new one
+    begun) before each statement once that many statements have run in it,
+    so a rollback only undoes statements since the last such commit.
+
+    With *timeout* (in seconds, for the whole :class:`Transaction`) or a
+    *cancel* token, cancellation rolls back the open server transaction and
+    the next statement, record or commit raises
+    :class:`~py2neo_compat.cancel.QueryCancelled`; see
+    :mod:`py2neo_compat.cancel`.
+    """
+
+    def __init__(self, graph, commit_every=None, timeout=None, cancel=None):
+        # type: (Graph, Optional[int], Optional[float], Optional[CancellationToken]) -> None
+        self.graph = graph
+        self.commit_every = commit_every
+        self.committed = 0  # Statements committed so far
+        self._tx = None
+        self._pending = 0
+        self._written = frozenset()  # Tags to invalidate in the query cache
+        self._token = None  # type: Optional[CancellationToken]
+        if timeout is not None or cancel is not None:
+            self._token = CancellationToken(timeout, parent=cancel)
+
+    def __enter__(self):
+        # type: () -> Transaction
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            if self._token is not None:
+                self._token.close()
+
+    def _interrupt(self):
+        tx = self._tx
+        if tx is not None:
+            interrupt_transaction(self.graph, tx)
+
+    def _check(self, cause=None):
+        # type: (Optional[Exception]) -> None
+        """If cancelled, roll back and raise the cancellation."""
+        token = self._token
+        if token is None or not token.cancelled:
+            return
+        self.rollback()
+        if cause is None or isinstance(cause, QueryCancelled):
+            token.check()
+        six.raise_from(token.error(), cause)
+
+    def stream(self, query, **params):
+        # type: (str, **Any) -> Iterable
+        """Run *query* in the transaction, returning an iterable of records.
+
+        Records may be fetched lazily, so read them before the next
+        statement.
+        """
+        self._check()
+        if self.commit_every and self._pending >= self.commit_every:
+            self.commit()
+        if self._tx is None:
+            self._tx = begin_transaction(self.graph,
+                                         eager=self._token is not None)
+            if self._token is not None:
+                self._token.on_cancel(self._interrupt)
+        self._pending += 1
+        if query_cache(self.graph) is not None:
+            self._written = _merge_tags(self._written, _written_tags(query))
+        if self._token is None:
+            return transaction_run(self._tx, query, params)
+
+        try:
+            records = transaction_run(self._tx, query, params)
+        except Exception as excp:
+            self._check(excp)
+            raise
+        return checked(records, self._token)
+
+    def execute(self, query, **params):
+        # type: (str, **Any) -> List
+        """Run *query* in the transaction, returning a list of records."""
+        return list(self.stream(query, **params))
+
+    def commit(self):
+        # type: () -> None
+        """Commit the statements run so far; later ones begin a new one."""
+        if self._tx is None:
+            return
+        self._check()
+        if self._token is not None:
+            self._token.discard(self._interrupt)
+        tx, self._tx = self._tx, None
+        try:
+            commit_transaction(self.graph, tx)
+        except Exception as excp:
+            if self._token is not None and self._token.cancelled:
+                six.raise_from(self._token.error(), excp)
+            raise
+        if self._written is None or self._written:
+            invalidate_queries(self.graph, self._written)
+        self._written = frozenset()
+        self.committed += self._pending
+        log.debug('committed statements=%d total=%d',
+                  self._pending, self.committed)
+        self._pending = 0
+
+    def rollback(self):
+        # type: () -> None
+        """Roll back the statements run since the last commit."""
+        if self._tx is None:
+            return
+        if self._token is not None:
+            self._token.discard(self._interrupt)
+        tx, self._tx = self._tx, None
+        log.debug('rolling back statements=%d', self._pending)
+        self._pending = 0
+        self._written = frozenset()
+        try:
+            rollback_transaction(self.graph, tx)
+        except Exception:  # pylint: disable=broad-except
+            if self._token is None or not self._token.cancelled:
+                raise
+            # Already rolled back by the interrupt
+            log.debug('rollback after cancellation', exc_info=True)
+
+
+def transaction(graph, commit_every=None, timeout=None, cancel=None):
+    # type: (Graph, Optional[int], Optional[float], Optional[CancellationToken]) -> Transaction
+    """Begin an explicit transaction on *graph*.
+
+    e.g.::
+
+        with transaction(graph, commit_every=1000) as tx:
+            for row in rows:
+                tx.execute('CREATE (n:thingy {name: {name}})', name=row)
+
+    :param Graph graph: Graph session/connection.
+    :param int commit_every: (optional) Commit after this many statements.
+    :param float timeout: (optional) Seconds to allow for all statements.
+    :param cancel: (optional) Token to cancel the transaction.
+    :rtype: Transaction
+    """
+    return Transaction(graph, commit_every, timeout, cancel)
+
+
+class StatementError(Exception):
+    """A statement of :func:`cypher_execute_many` failed.
+
+    If no statement fails when the group is re-run one by one (e.g. the
+    group hit a deadlock or other transient error), which statement failed
+    is unknown, and *index*, *query* and *params* are *None*.
+
+    :ivar int index: Index of the failing statement, or *None*.
+    :ivar str query: Its query.
+    :ivar dict params: Its parameters.
+    :ivar range group: Indexes of the statements of the failing group.
+    :ivar list results: Results of the statements before the failing
+        statement's group, which were committed.
+    """
+
+    def __init__(self, index, query, params, results, cause, group=None):
+        # type: (Optional[int], Optional[str], Optional[Dict[str, Any]], List[List], Exception, Optional[range]) -> None
+        if index is None:
+            message = 'statement in %d..%d failed: %s' % (
+                group[0], group[-1], cause)
+        else:
+            message = 'statement %d failed: %s' % (index, cause)
+        super(StatementError, self).__init__(message)
+        self.index = index
+        self.query = query
+        self.params = params
+        self.group = group
+        self.results = results
+
+
+def _failing_statement(graph, statements):
+    # type: (Graph, List[Statement]) -> Optional[int]
+    """Index of the first of *statements* to fail, run one by one.
+
+    Everything is rolled back afterwards.  If none fails on this run,
+    returns *None*.
+    """
+    tx = begin_transaction(graph)
+    try:
+        for index, (query, params) in enumerate(statements):
+            try:
+                list(transaction_run(tx, query, params))
+            except Exception:  # pylint: disable=broad-except
+                return index
+        return None
+    finally:
+        try:
+            rollback_transaction(graph, tx)
+        except Exception:  # pylint: disable=broad-except
+            # The failure may already have closed the transaction
+            log.debug('rollback after failing statement', exc_info=True)
+
+
+def cypher_execute_many(graph, statements, group_size=100, timeout=None,
+                        cancel=None):
+    # type: (Graph, Iterable[Statement], int, Optional[float], Optional[CancellationToken]) -> List[List]
+    """Execute many Cypher statements, *group_size* per round trip.
+
+    Each group of statements is sent together (in one HTTP request on
+    py2neo 1.6 & 2.0) and committed as one transaction.  Execution stops at
+    the first failing statement, and its group is rolled back.  On 1.6 &
+    2.0, where the whole request fails at once, the group is then re-run
+    statement by statement in a transaction that is also rolled back, to
+    find which statement failed; on 2021, statements already run one by
+    one, so no re-run is needed.
+
+    :param Graph graph: Graph session/connection.
+    :param statements: ``(query, params)`` pairs; *params* may be *None*.
+    :param int group_size: Maximum number of statements per transaction.
+    :param float timeout: (optional) Seconds to allow for all statements.
+    :param cancel: (optional) Token to cancel the remaining statements.
+    :return: List of records for each statement.
+    :raises StatementError: if a statement fails.
+    :raises py2neo_compat.cancel.QueryCancelled: if cancelled or timed out;
+        the group being run is rolled back, earlier groups stay committed.
+    """
+    results = []  # type: List[List]
+    cancellable = timeout is not None or cancel is not None
+    with cancellation(timeout, cancel) as token:
+        for group in chunked(list(statements), group_size):
+            token.check()
+            tx = begin_transaction(graph, eager=cancellable)
+            interrupt = partial(interrupt_transaction, graph, tx)
+            token.on_cancel(interrupt)
+            try:
+                group_results = transaction_run_many(tx, group)
+                token.discard(interrupt)
+                token.check()
+                commit_transaction(graph, tx)
+                if query_cache(graph) is not None:
+                    written = frozenset()  # type: Optional[FrozenSet[str]]
+                    for query, _ in group:
+                        written = _merge_tags(written, _written_tags(query))
+                    if written is None or written:
+                        invalidate_queries(graph, written)
+            except Exception as excp:  # pylint: disable=broad-except
+                token.discard(interrupt)
+                try:
+                    rollback_transaction(graph, tx)
+                except Exception:  # pylint: disable=broad-except
+                    log.debug('rollback after failing group', exc_info=True)
+                if isinstance(excp, QueryCancelled):
+                    raise
+                if token.cancelled:
+                    six.raise_from(token.error(), excp)
+                indexes = range(len(results), len(results) + len(group))
+                # Known if the statements ran one by one (2021)
+                offset = getattr(excp, 'statement_index', None)
+                if offset is None:
+                    offset = _failing_statement(graph, group)
+                if offset is None:
+                    index, query, params = None, None, None
+                else:
+                    index = indexes[offset]
+                    query, params = group[offset]
+                log.debug('statement failed index=%s', index)
+                six.raise_from(
+                    StatementError(index, query, params, results, excp,
+                                   indexes), excp)
+            results.extend(group_results)
+            log.debug('executed statements=%d', len(results))
+    return results
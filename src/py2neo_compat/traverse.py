@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Client-side breadth- & depth-first traversal.
+
+Both traversals are generators of :class:`Step`, expanding nodes with
+:func:`py2neo_compat.bulk.expand` so that a whole frontier (or, depth-first,
+a batch of pending nodes) costs one query rather than one per node.
+
+*prune* and *until* are predicates on a :class:`Step`: when *prune* is true
+the step's node is not expanded further; when *until* is true the traversal
+stops after yielding that step.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+from itertools import islice
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import (
+        Callable, Iterable, Iterator, NamedTuple, Optional, Set, Union,  # noqa
+    )
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+from .bulk import expand
+from .py2neo_compat import Graph, Node, Relationship
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+Step = NamedTuple('Step', [
+    ('node', Node),
+    ('depth', int),
+    ('rel', Optional[Relationship]),  # Relationship followed to reach node
+    ('parent', Optional[int]),        # ID of the node expanded to reach node
+])
+
+StepPredicate = Callable[[Step], bool]
+
+
+class IdentitySet(object):
+    """Set of non-negative integer IDs stored as a bitmap.
+
+    Neo4j allocates IDs densely, so one bit per ID up to the largest seen
+    is far smaller than a :class:`set` of :class:`int`.  If the IDs turn
+    out sparse, i.e. the bitmap would outgrow a set of the same IDs, they
+    are moved to a :class:`set` instead.
+    """
+
+    # Bitmaps up to this size are always fine
+    _min_bitmap_bytes = 4096
+    # Rough memory cost of an int in a set
+    _set_bytes_per_id = 64
+
+    def __init__(self, identities=()):
+        # type: (Iterable[int]) -> None
+        self._bits = bytearray()
+        self._set = None  # type: Optional[Set[int]]
+        self._len = 0
+        for identity in identities:
+            self.add(identity)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        # type: () -> Iterator[int]
+        if self._set is not None:
+            return iter(self._set)
+        return (byte * 8 + bit
+                for byte, value in enumerate(self._bits) if value
+                for bit in range(8) if value & (1 << bit))
+
+    def __contains__(self, identity):
+        # type: (int) -> bool
+        if self._set is not None:
+            return identity in self._set
+        if identity < 0:
+            return False
+        byte, bit = divmod(identity, 8)
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << bit))
+
+    def add(self, identity):
+        # type: (int) -> bool
+        """Add *identity*, returning whether it was not already present.
+
+        :raises ValueError: If *identity* is negative.
+        """
+        if identity < 0:
+            raise ValueError('IDs are non-negative: %r' % identity)
+        if self._set is None:
+            byte, bit = divmod(identity, 8)
+            if byte >= len(self._bits):
+                size = max(byte + 1, 2 * len(self._bits))
+                if size > max(self._min_bitmap_bytes,
+                              self._set_bytes_per_id * (self._len + 1)):
+                    log.debug('IdentitySet too sparse for a bitmap, '
+                              'size=%d max_id=%d', self._len, identity)
+                    self._set = set(self)
+                    self._bits = bytearray()
+                else:
+                    self._bits.extend(bytes(size - len(self._bits)))
+        if self._set is not None:
+            if identity in self._set:
+                return False
+            self._set.add(identity)
+            self._len += 1
+            return True
+        if self._bits[byte] & (1 << bit):
+            return False
+        self._bits[byte] |= 1 << bit
+        self._len += 1
+        return True
+
+
+def bfs(graph, start_nodes, rel_types=None, direction='out', max_depth=None,
+        prune=None, until=None, batch_size=1000):
+    # type: (Graph, Iterable[Node], Union[str, Iterable[str], None], str, Optional[int], Optional[StepPredicate], Optional[StepPredicate], int) -> Iterator[Step]
+    """Breadth-first traversal, expanding each frontier in batched queries.
+
+    :param Graph graph: Graph session/connection.
+    :param start_nodes: Nodes to start from, yielded at depth 0.
+    :param rel_types: (optional) Relationship type(s) to follow.
+    :param str direction: ``'out'``, ``'in'`` or ``'both'``.
+    :param int max_depth: (optional) Do not expand nodes at this depth.
+    :param prune: (optional) Do not expand nodes of steps matching this.
+    :param until: (optional) Stop after the first step matching this.
+    :param int batch_size: Maximum number of nodes per query.
+    """
+    visited = IdentitySet()
+    frontier = []
+    for node in start_nodes:
+        if not visited.add(node._id):
+            continue
+        step = Step(node, 0, None, None)
+        yield step
+        if until is not None and until(step):
+            return
+        if prune is None or not prune(step):
+            frontier.append(node._id)
+
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        log.debug('bfs depth=%d frontier=%d visited=%d',
+                  depth, len(frontier), len(visited))
+        adjacency = expand(graph, frontier, rel_type=rel_types,
+                           direction=direction, batch_size=batch_size)
+        frontier = []
+        for parent, pairs in adjacency.items():
+            for rel, node in pairs:
+                if not visited.add(node._id):
+                    continue
+                step = Step(node, depth, rel, parent)
+                yield step
+                if until is not None and until(step):
+                    return
+                if prune is None or not prune(step):
+                    frontier.append(node._id)
+
+
+def dfs(graph, start_nodes, rel_types=None, direction='out', max_depth=None,
+        prune=None, until=None, batch_size=1000):
+    # type: (Graph, Iterable[Node], Union[str, Iterable[str], None], str, Optional[int], Optional[StepPredicate], Optional[StepPredicate], int) -> Iterator[Step]
+    """Depth-first traversal, expanding pending nodes in batched queries.
+
+    When a node needs expanding, up to *batch_size* - 1 other unexpanded
+    nodes from the top of the stack are expanded in the same query.
+
+    Parameters are as for :func:`bfs`.
+    """
+    visited = IdentitySet()
+    adjacency = {}
+    stack = [Step(node, 0, None, None) for node in reversed(list(start_nodes))]
+
+    def expandable(step):
+        return ((max_depth is None or step.depth < max_depth)
+                and step.node._id not in visited
+                and step.node._id not in adjacency)
+
+    while stack:
+        step = stack.pop()
+        node_id = step.node._id
+        if not visited.add(node_id):
+            adjacency.pop(node_id, None)
+            continue
+
+        yield step
+        if until is not None and until(step):
+            return
+        if ((max_depth is not None and step.depth >= max_depth)
+                or (prune is not None and prune(step))):
+            adjacency.pop(node_id, None)
+            continue
+
+        if node_id not in adjacency:
+            pending = [s.node._id for s in
+                       islice(filter(expandable, reversed(stack)),
+                              batch_size - 1)]
+            log.debug('dfs depth=%d expanding=%d visited=%d',
+                      step.depth, len(pending) + 1, len(visited))
+            adjacency.update(expand(graph, [node_id] + pending,
+                                    rel_type=rel_types, direction=direction,
+                                    batch_size=batch_size))
+
+        for rel, node in reversed(adjacency.pop(node_id)):
+            if node._id not in visited:
+                stack.append(Step(node, step.depth + 1, rel, node_id))
@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Writes queued and applied in batches on a background thread.
+
+A :class:`WriteBehindQueue` accepts ``create_node``, ``update_properties``
+and ``create_unique_rel`` calls without waiting for the server: each
+returns a :class:`~concurrent.futures.Future` at once, and a worker thread
+merges the queued writes into one ``UNWIND`` query per kind (and label set
+or relationship type).  Only use it for writes which nothing needs to read
+back straight away.
+"""
+
+from __future__ import absolute_import, print_function
+
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+
+import six
+from six.moves import queue
+
+try:
+    # noinspection PyUnresolvedReferences
+    from typing import (
+        Any, Callable, Dict, Hashable, Iterable, List, Mapping,  # noqa
+        Optional, Tuple, Union,
+    )
+except ImportError:  # pragma: no cover
+    """Module :mod:`typing` not required for Py27-compatible type comments."""
+
+from .batching import AdaptiveBatcher, as_batcher
+from .bulk import _entity_patterns
+from .metrics import Metrics, registry
+from .py2neo_compat import (
+    Graph, Node, Relationship, _canonical, _freeze, _invalidate,
+    call_with_retry, cypher_execute, entity_key, invalidate_queries,
+)
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+log.addHandler(logging.NullHandler())
+
+
+PendingWrite = namedtuple('PendingWrite', ['operation', 'args', 'future'])
+PendingWrite.__doc__ = """A queued write: the method called, its arguments
+(as a dict) and the future for its result."""
+
+ErrorCallback = Callable[[BaseException, List[PendingWrite]], Any]
+
+_STOP = object()
+
+
+def _bound_key(entity):
+    # type: (Union[Node, Relationship]) -> Tuple[str, int]
+    """:func:`~py2neo_compat.entity_key` of *entity*, which must be bound."""
+    try:
+        key = entity_key(entity)
+    except Exception as excp:  # pylint: disable=broad-except
+        # e.g. BindError on 2.0
+        six.raise_from(ValueError('%r is not bound' % (entity,)), excp)
+    if key[1] is None:
+        raise ValueError('%r is not bound' % (entity,))
+    return key
+
+
+class WriteBehindQueue(object):
+    """Bounded queue of writes applied in batches by a background thread.
+
+    Queued writes are applied once *batch_size* of them are waiting, or
+    *flush_interval* seconds after the first of them was queued, whichever
+    comes first.  Updates of the same entity are merged (later properties
+    win) and identical ``create_unique_rel`` calls share one row.  Within a
+    batch, nodes are created first, then properties updated, then
+    relationships created, so the order of writes to different entities is
+    not kept.
+
+    At most *maxsize* writes wait in the queue; beyond that, queueing
+    blocks until the worker catches up (backpressure), for up to
+    *put_timeout* seconds before raising :class:`queue.Full`.
+
+    A failed query fails the futures of its writes, and is reported to the
+    error callbacks with the writes (see :meth:`on_error`), or logged if
+    there are none.  Updates and unique relationships are safe to repeat,
+    so are retried per :func:`~py2neo_compat.enable_retry`, and split into
+    smaller batches by an adaptive *batch_size* after an overload.  Node
+    creation is not: its batches keep the size they started with, and an
+    error (even one after which the server may have created the nodes)
+    fails the whole batch.
+
+    Counts ``write_behind.queued``, ``write_behind.batches``,
+    ``write_behind.written`` and ``write_behind.failed`` in *metrics*.
+
+    :param Graph graph: Graph session/connection.
+    :param int maxsize: Maximum number of queued writes.
+    :param batch_size: Writes per batch, or an
+        :class:`~py2neo_compat.batching.AdaptiveBatcher`.
+    :param float flush_interval: Maximum seconds a write waits to be
+        applied.
+    :param float put_timeout: (optional) Seconds to wait for room in a full
+        queue, default forever.
+    :param on_error: (optional) Error callback.
+    :param Metrics metrics: (optional) Default
+        :data:`py2neo_compat.metrics.registry`.
+    """
+
+    def __init__(self, graph, maxsize=10000, batch_size=1000,
+                 flush_interval=1.0, put_timeout=None, on_error=None,
+                 metrics=None, clock=time.monotonic):
+        # type: (Graph, int, Union[int, AdaptiveBatcher], float, Optional[float], Optional[ErrorCallback], Optional[Metrics], Callable[[], float]) -> None
+        self.graph = graph
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.metrics = registry if metrics is None else metrics
+        self.clock = clock
+        self._batcher = as_batcher(batch_size)
+        self._queue = queue.Queue(maxsize)
+        self._callbacks = []  # type: List[ErrorCallback]
+        if on_error is not None:
+            self.on_error(on_error)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run,
+                                        name='py2neo-compat-write-behind')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def closed(self):
+        # type: () -> bool
+        return self._closed
+
+    def on_error(self, callback):
+        # type: (ErrorCallback) -> None
+        """Call ``callback(error, writes)`` when writes fail.
+
+        Called on the worker thread, with the :class:`PendingWrite` tuples
+        whose query raised *error*.
+        """
+        self._callbacks.append(callback)
+
+    def _put(self, item):
+        self._queue.put(item, timeout=self.put_timeout)
+
+    def _submit(self, operation, **args):
+        # type: (str, **Any) -> Future
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('WriteBehindQueue is closed')
+            self._put(PendingWrite(operation, args, future))
+        self.metrics.incr('write_behind.queued')
+        return future
+
+    def create_node(self, labels=None, properties=None):
+        # type: (Optional[Iterable[str]], Optional[Mapping[str, Any]]) -> Future
+        """Queue creating a node.
+
+        :return: Future of the created node.
+        """
+        return self._submit('create_node', labels=tuple(labels or ()),
+                            properties=dict(properties or {}))
+
+    def update_properties(self, entity, properties):
+        # type: (Union[Node, Relationship], Mapping[str, Any]) -> Future
+        """Queue setting *properties* on a bound node or relationship.
+
+        Only the server copy is updated; any cached copy is invalidated
+        once written.
+
+        :return: Future of *None*.
+        :raises ValueError: If *entity* is not bound.
+        """
+        return self._submit('update_properties', entity=entity,
+                            key=_bound_key(entity),
+                            properties=dict(properties))
+
+    def create_unique_rel(self, start_node, rel_type, end_node,
+                          prop_key=None, prop_val=None):
+        # type: (Node, str, Node, Optional[str], Optional[Any]) -> Future
+        """Queue getting or creating a unique relationship.
+
+        See :func:`py2neo_compat.create_unique_rel`; both nodes must be
+        bound.
+
+        :return: Future of the relationship, or *None* if either node no
+            longer exists.
+        :raises ValueError: If either node is not bound.
+        """
+        return self._submit('create_unique_rel', start_node=start_node,
+                            start_id=_bound_key(start_node)[1],
+                            rel_type=rel_type, end_node=end_node,
+                            end_id=_bound_key(end_node)[1],
+                            prop_key=prop_key, prop_val=prop_val)
+
+    def flush(self, timeout=None):
+        # type: (Optional[float]) -> bool
+        """Wait until the writes queued so far have been applied.
+
+        :return: False if *timeout* seconds passed first.
+        """
+        done = threading.Event()
+        with self._lock:
+            if self._closed:
+                return not self._thread.is_alive()
+            self._put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        # type: (Optional[float]) -> None
+        """Apply the queued writes and stop the worker.
+
+        Further writes raise :class:`RuntimeError`.  Safe to call again,
+        including after :class:`queue.Full` was raised because the queue
+        stayed full for *put_timeout*, which leaves the queue open.
+        """
+        with self._lock:
+            if not self._closed:
+                self._put(_STOP)
+                self._closed = True
+        self._thread.join(timeout)
+
+    def _run(self):
+        pending = []  # type: List[PendingWrite]
+        deadline = None
+        while True:
+            wait = None if deadline is None else max(0, deadline - self.clock())
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, PendingWrite):
+                pending.append(item)
+                if deadline is None:
+                    deadline = self.clock() + self.flush_interval
+                if (len(pending) < self._batcher.size
+                        and self.clock() < deadline):
+                    continue
+
+            if pending:
+                try:
+                    self._apply(pending)
+                except Exception as excp:  # pylint: disable=broad-except
+                    # e.g. an unbound entity; keep the worker alive
+                    self._fail(excp, pending)
+                pending, deadline = [], None
+            if item is _STOP:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _apply(self, writes):
+        # type: (List[PendingWrite]) -> None
+        """Merge *writes* into as few queries as possible and run them."""
+        creates = OrderedDict()  # type: Dict[Tuple[str, ...], List[Tuple[Dict, List[PendingWrite]]]]
+        updates = OrderedDict()  # type: Dict[Tuple[str, int], Tuple[Dict, List[PendingWrite]]]
+        rels = OrderedDict()  # type: Dict[Tuple[str, Optional[str]], Dict[Hashable, Tuple[Dict, List[PendingWrite]]]]
+
+        for write in writes:
+            if not write.future.set_running_or_notify_cancel():
+                continue
+            args = write.args
+            if write.operation == 'create_node':
+                creates.setdefault(args['labels'], []).append(
+                    ({'properties': args['properties']}, [write]))
+            elif write.operation == 'update_properties':
+                key = args['key']
+                row, merged = updates.setdefault(
+                    key, ({'id': key[1], 'properties': {}}, []))
+                row['properties'].update(args['properties'])
+                merged.append(write)
+            else:
+                prop_key = args['prop_key']
+                if args['prop_val'] is None:
+                    prop_key = None
+                row = {'start_id': args['start_id'],
+                       'end_id': args['end_id'],
+                       'prop_val': args['prop_val']}
+                group = rels.setdefault((args['rel_type'], prop_key),
+                                        OrderedDict())
+                group.setdefault(_freeze(row), (row, []))[1].append(write)
+
+        self.metrics.incr('write_behind.batches')
+        for labels, entries in creates.items():
+            self._create_nodes(labels, entries)
+        for kind in ('node', 'rel'):
+            entries = [entry for key, entry in updates.items()
+                       if key[0] == kind]
+            if entries:
+                self._update_properties(kind, entries)
+        for (rel_type, prop_key), group in rels.items():
+            self._create_unique_rels(rel_type, prop_key, list(group.values()))
+
+    def _create_nodes(self, labels, entries):
+        # language=cypher
+        query = """
+            UNWIND {rows} AS row
+            CREATE (e%s)
+            SET e = row.properties
+            RETURN row.i AS i, e
+        """ % ''.join(':`%s`' % label for label in labels)
+        if self._write('create_node', query, entries, result='e',
+                       retry=False):
+            invalidate_queries(self.graph, labels)
+
+    def _update_properties(self, kind, entries):
+        # language=cypher
+        query = """
+            UNWIND {rows} AS row
+            MATCH %s
+            WHERE ID(e) = row.id
+            SET e += row.properties
+            RETURN row.i AS i
+        """ % _entity_patterns[kind]
+        self._write('update_properties', query, entries)
+        for _, writes in entries:
+            for write in writes:
+                _invalidate(write.args['entity'])
+
+    def _create_unique_rels(self, rel_type, prop_key, entries):
+        if prop_key is None:
+            pattern = '[e:`%s`]' % rel_type
+        else:
+            pattern = '[e:`%s` {`%s`: row.prop_val}]' % (rel_type, prop_key)
+        # language=cypher
+        query = """
+            UNWIND {rows} AS row
+            MATCH (start_node), (end_node)
+            WHERE ID(start_node) = row.start_id
+              AND ID(end_node) = row.end_id
+            CREATE UNIQUE (start_node)-%s->(end_node)
+            RETURN row.i AS i, e
+        """ % pattern
+        if self._write('create_unique_rel', query, entries, result='e'):
+            invalidate_queries(self.graph, [rel_type])
+
+    def _write(self, operation, query, entries, result=None, retry=True):
+        # type: (str, str, List[Tuple[Dict, List[PendingWrite]]], Optional[str], bool) -> bool
+        """Run *query* for the rows of *entries*, resolving their futures.
+
+        Each row is numbered ``i`` so the *result* column of each record
+        can be matched to it; rows without a record (e.g. of a deleted
+        entity) resolve to *None*.
+
+        Unless *retry*, rows are written in batches of the current size,
+        which are neither retried nor split after an overload.
+
+        :return: Whether any row was written, even if others failed.
+        """
+        graph = self.graph
+        rows = [dict(row, i=i) for i, (row, _) in enumerate(entries)]
+        batcher = (self._batcher if retry
+                   else AdaptiveBatcher.fixed(self._batcher.size))
+        written = [0]
+
+        def write_batch(batch):
+            log.debug('write_behind operation=%s batch=%d',
+                      operation, len(batch))
+            if retry:
+                records = call_with_retry(graph, 'write_behind',
+                                          cypher_execute, graph, query,
+                                          rows=batch)
+            else:
+                records = cypher_execute(graph, query, rows=batch)
+            results = {record['i']: (None if result is None
+                                     else _canonical(graph, record[result]))
+                       for record in records}
+            for row in batch:
+                for write in entries[row['i']][1]:
+                    write.future.set_result(results.get(row['i']))
+            written[0] += len(batch)
+            self.metrics.incr('write_behind.written', len(batch))
+
+        try:
+            batcher.run(rows, write_batch)
+        except Exception as excp:  # pylint: disable=broad-except
+            self._fail(excp, [write for _, writes in entries
+                              for write in writes])
+        return written[0] > 0
+
+    def _fail(self, error, writes):
+        # type: (BaseException, List[PendingWrite]) -> None
+        """Fail the unfinished *writes* with *error* and report them."""
+        writes = [write for write in writes if not write.future.done()]
+        for write in writes:
+            write.future.set_exception(error)
+        self.metrics.incr('write_behind.failed', len(writes))
+        if not self._callbacks:
+            log.error('write_behind failed writes=%d: %r', len(writes), error)
+        for callback in self._callbacks:
+            try:
+                callback(error, writes)
+            except Exception:  # pylint: disable=broad-except
+                log.exception('write_behind error callback failed')
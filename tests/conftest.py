@@ -68,12 +68,15 @@ def neo4j_graph_empty(neo4j_graph_object):
     return graph
 
 
-# noinspection PyShadowingNames,PyUnusedLocal
+# noinspection PyShadowingNames
 @pytest.fixture
-def neo4j_graph(neo4j_graph_schemaless, neo4j_graph_empty):
-    # type: (Graph, Graph) -> Graph
-    """Test Neo4j graph fixture."""
-    return neo4j_graph_schemaless
+def neo4j_graph(neo4j_graph_object):
+    # type: (Graph) -> Graph
+    """Test Neo4j graph fixture, with no schema, nodes or relationships."""
+    from py2neo_compat.testing import reset_graph
+
+    reset_graph(neo4j_graph_object, keep_schema=False)
+    return neo4j_graph_object
 
 
 # noinspection PyShadowingNames
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.algo`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from py2neo_compat import cypher_execute  # noqa: E402
+from py2neo_compat.algo import (  # noqa: E402
+    connected_components, degree, khop_counts, pagerank, write_back,
+)
+from py2neo_compat.snapshot import Snapshot, snapshot  # noqa: E402
+
+
+@pytest.fixture
+def chain_and_pair():
+    """Snapshot of 0 -> 1 -> 2 -> 3 and, separately, 4 -> 5."""
+    return Snapshot.from_edges(node_ids=range(6),
+                               start_ids=[0, 1, 2, 4],
+                               end_ids=[1, 2, 3, 5],
+                               rel_ids=range(4))
+
+
+@pytest.mark.unit
+def test_degree(chain_and_pair):
+    assert degree(chain_and_pair).tolist() == [1, 1, 1, 0, 1, 0]
+    assert degree(chain_and_pair, 'in').tolist() == [0, 1, 1, 1, 0, 1]
+    assert degree(chain_and_pair, 'both').tolist() == [1, 2, 2, 1, 1, 1]
+    with pytest.raises(ValueError):
+        degree(chain_and_pair, 'up')
+
+
+@pytest.mark.unit
+def test_pagerank():
+    # A 3-cycle is symmetric; a node pointing into it adds rank to node 0
+    cycle = Snapshot.from_edges(range(4), [0, 1, 2, 3], [1, 2, 0, 0], range(4))
+
+    rank = pagerank(cycle)
+
+    assert rank.sum() == pytest.approx(1.0)
+    assert rank[3] == pytest.approx(0.15 / 4)
+    assert rank[0] > rank[2]
+
+
+@pytest.mark.unit
+def test_pagerank_dangling(chain_and_pair):
+    assert pagerank(chain_and_pair).sum() == pytest.approx(1.0)
+
+
+@pytest.mark.unit
+def test_pagerank_deleted_node(chain_and_pair):
+    """Nodes deleted but not compacted take no share of the rank."""
+    live = Snapshot.from_edges(range(5), [0, 1, 2], [1, 2, 3], range(3))
+    chain_and_pair.node_alive[5] = False
+    chain_and_pair.rel_alive[3] = False
+
+    rank = pagerank(chain_and_pair)
+
+    assert rank[5] == 0
+    assert rank[:5] == pytest.approx(pagerank(live))
+
+
+@pytest.mark.unit
+def test_connected_components(chain_and_pair):
+    assert connected_components(chain_and_pair).tolist() == [0, 0, 0, 0, 4, 4]
+
+
+@pytest.mark.unit
+def test_khop_counts(chain_and_pair):
+    assert khop_counts(chain_and_pair, 1).tolist() == [1, 1, 1, 0, 1, 0]
+    assert khop_counts(chain_and_pair, 2, batch_size=4).tolist() == \
+        [2, 2, 1, 0, 1, 0]
+    assert khop_counts(chain_and_pair, 5, 'both').tolist() == \
+        [3, 3, 3, 3, 1, 1]
+
+
+@pytest.mark.unit
+def test_write_back_length_mismatch(chain_and_pair):
+    with pytest.raises(ValueError):
+        write_back(None, chain_and_pair, 'x', [1, 2, 3])
+
+
+@pytest.mark.integration
+def test_write_back(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    snap = snapshot(g, labels=['thingy'])
+
+    write_back(g, snap, 'in_degree', degree(snap, 'in'))
+
+    rows = cypher_execute(g, 'MATCH (n:thingy) RETURN n.name AS name,'
+                             ' n.in_degree AS in_degree')
+    assert {r['name']: r['in_degree'] for r in rows} == {'a': 0, 'b': 1}
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.batch_v1`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest
+
+from py2neo_compat import cypher_execute
+from py2neo_compat.util import SimpleNamespace
+
+BatchRequest = pytest.importorskip('py2neo_compat.batch_v1',
+                                   reason='py2neo v1/v2 only').BatchRequest
+
+
+@pytest.fixture
+def fake_graph():
+    root = 'http://localhost:7474/db/data/'
+    return SimpleNamespace(uri=root, __metadata__={
+        'batch': root + 'batch',
+        'constraints': root + 'schema/constraint',
+        'indexes': root + 'schema/index',
+    })
+
+
+@pytest.mark.unit
+def test_batch_entity_jobs(fake_graph):
+    batch = BatchRequest(fake_graph)
+
+    a = batch.create_node({'name': 'a'}, labels=['thingy'])
+    rel = batch.create_rel(batch.job_ref(a), 'points_to', 7, {'x': 1})
+    batch.delete_rel(8)
+    batch.delete_node(9)
+
+    assert (a, rel, len(batch)) == (0, 2, 5)
+    assert batch.jobs == [
+        {'id': 0, 'method': 'POST', 'to': '/node', 'body': {'name': 'a'}},
+        {'id': 1, 'method': 'POST', 'to': '{0}/labels', 'body': ['thingy']},
+        {'id': 2, 'method': 'POST', 'to': '{0}/relationships',
+         'body': {'to': '/node/7', 'type': 'points_to', 'data': {'x': 1}}},
+        {'id': 3, 'method': 'DELETE', 'to': '/relationship/8'},
+        {'id': 4, 'method': 'DELETE', 'to': '/node/9'},
+    ]
+
+
+@pytest.mark.unit
+def test_batch_schema_jobs(fake_graph):
+    batch = BatchRequest(fake_graph)
+
+    batch.create_index('thingy', 'name')
+    batch.drop_index('thingy', 'name')
+    batch.create_constraint('uniqueness', 'person', 'username')
+    batch.drop_constraint('uniqueness', 'person', 'username')
+
+    assert [(job['method'], job['to'], job.get('body'))
+            for job in batch.jobs] == [
+        ('POST', '/schema/index/thingy', {'property_keys': ['name']}),
+        ('DELETE', '/schema/index/thingy/name', None),
+        ('POST', '/schema/constraint/person/uniqueness',
+         {'property_keys': ['username']}),
+        ('DELETE', '/schema/constraint/person/uniqueness/username', None),
+    ]
+
+
+@pytest.mark.integration
+def test_batch_submit(neo4j_graph):
+    g = neo4j_graph
+    batch = BatchRequest(g)
+    a = batch.create_node({'name': 'a'}, labels=['thingy'])
+    b = batch.create_node({'name': 'b'}, labels=['thingy'])
+    batch.create_rel(batch.job_ref(a), 'points_to', batch.job_ref(b))
+
+    responses = batch.submit()
+
+    assert [r['id'] for r in responses] == [0, 1, 2, 3, 4]
+    assert len(batch) == 0
+    assert (g.order, g.size) == (2, 1)
+
+    rel_id = cypher_execute(g, 'MATCH ()-[r]->() RETURN ID(r) AS id')[0]['id']
+    batch.delete_rel(rel_id)
+    assert len(batch.submit()) == 1
+    assert g.size == 0
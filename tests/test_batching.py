@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.batching`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+import py2neo_compat.bulk
+from py2neo_compat.batching import AdaptiveBatcher, as_batcher, is_overload
+from py2neo_compat.bulk import delete_rels_where, exists_many
+from py2neo_compat.cancel import QueryTimeout
+from py2neo_compat.metrics import Metrics
+from py2neo_compat.util import SimpleNamespace
+
+
+class CodedError(Exception):
+    def __init__(self, code):
+        super(CodedError, self).__init__(code)
+        self.code = code
+
+
+class FakeClock(object):
+    """Clock advanced by *per_item* seconds for each item processed."""
+
+    def __init__(self, per_item):
+        self.per_item = per_item
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def work(self, count):
+        self.now += count * self.per_item
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('error, overload', [
+    (MemoryError(), True),
+    (QueryTimeout(), True),
+    (CodedError('Neo.TransientError.General.OutOfMemoryError'), True),
+    (CodedError('Neo.TransientError.General.TransactionMemoryLimit'), True),
+    (CodedError('Neo.ClientError.Statement.SyntaxError'), False),
+    (ValueError(), False),
+])
+def test_is_overload(error, overload):
+    assert is_overload(error) is overload
+
+
+@pytest.mark.unit
+def test_batcher_converges():
+    clock = FakeClock(0.001)
+    metrics = Metrics()
+    batcher = AdaptiveBatcher(initial=100, target_latency=1.0, name='test',
+                              metrics=metrics, clock=clock)
+    sizes = []
+
+    def func(batch):
+        sizes.append(len(batch))
+        clock.work(len(batch))
+
+    batcher.run(range(10000), func)
+    assert sizes[:4] == [100, 200, 400, 800]
+    assert batcher.size == 1000
+    assert metrics.get('batch.test.size') == 1000
+    assert sum(sizes) == 10000
+
+    clock.per_item = 0.01  # slower server
+    batcher.run(range(5000), func)
+    assert batcher.size == 100
+
+
+@pytest.mark.unit
+def test_batcher_bounds():
+    batcher = AdaptiveBatcher(initial=10, minimum=5, maximum=15)
+    batcher.record(1000, 0.1)
+    assert batcher.size == 15
+    batcher.failed()
+    batcher.failed()
+    assert batcher.size == 5
+
+    batcher = AdaptiveBatcher.fixed(10)
+    batcher.record(1, 10.0)
+    batcher.failed()
+    assert batcher.size == 10
+    assert as_batcher(batcher) is batcher
+    assert as_batcher(7).size == 7
+
+
+@pytest.mark.unit
+def test_batcher_splits_after_overload():
+    metrics = Metrics()
+    batcher = AdaptiveBatcher(initial=8, name='test', metrics=metrics,
+                              clock=lambda: 0.0)
+    done = []
+
+    def func(batch):
+        if len(batch) > 2:
+            raise MemoryError()
+        done.extend(batch)
+        return len(batch)
+
+    assert batcher.run(range(10), func) == [2, 2, 2, 2, 2]
+    assert done == list(range(10))
+    assert metrics.get('batch.test.backoffs') == 2
+
+
+@pytest.mark.unit
+def test_batcher_raises():
+    batcher = AdaptiveBatcher(initial=8, minimum=4)
+
+    def func(batch):
+        raise MemoryError()
+
+    with pytest.raises(MemoryError):
+        batcher.run(range(10), func)
+    assert batcher.size == 4
+
+    def func(batch):
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        batcher.run(range(10), func)
+    assert batcher.size == 4
+
+
+@pytest.mark.unit
+def test_batcher_repeat():
+    clock = FakeClock(0.001)
+    batcher = AdaptiveBatcher(initial=100, clock=clock)
+    remaining = [2000]
+    sizes = []
+
+    def func(size):
+        sizes.append(size)
+        count = min(size, remaining[0])
+        remaining[0] -= count
+        clock.work(count)
+        return count
+
+    assert batcher.repeat(func) == 2000
+    assert sizes == [100, 200, 400, 800, 1000]
+    assert batcher.size == 1000  # unchanged by the short final batch
+
+
+@pytest.mark.unit
+def test_bulk_adaptive(monkeypatch):
+    calls = []
+
+    def fake_stream(graph, query, ids):
+        calls.append(len(ids))
+        if len(ids) > 2:
+            raise CodedError('Neo.TransientError.General.OutOfMemoryError')
+        return [{'id': i} for i in ids if i % 2]
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_stream', fake_stream)
+    batcher = AdaptiveBatcher(initial=4, clock=lambda: 0.0)
+
+    assert exists_many(None, range(6), batch_size=batcher) == \
+        [False, True, False, True, False, True]
+    assert calls == [4, 2, 2, 2]
+
+
+@pytest.mark.unit
+def test_bulk_delete_adaptive(monkeypatch):
+    remaining = [5]
+    sizes = []
+
+    def fake_execute(graph, query, batch_size, **params):
+        sizes.append(batch_size)
+        if batch_size > 2:
+            raise MemoryError()
+        count = min(batch_size, remaining[0])
+        remaining[0] -= count
+        return [{'id': i} for i in range(count)]
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_execute', fake_execute)
+    batcher = AdaptiveBatcher(initial=4, max_growth=1)
+
+    assert delete_rels_where(SimpleNamespace(), batch_size=batcher) == 5
+    assert sizes == [4, 2, 2, 2]
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.bulk`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+import py2neo_compat
+import py2neo_compat.bulk
+from py2neo_compat.batching import AdaptiveBatcher
+from py2neo_compat.cancel import CancellationToken, QueryTimeout
+from py2neo_compat.util import SimpleNamespace
+from py2neo_compat import (
+    create_node, cypher_execute, delete_all, delete_rels, delete_rels_where,
+    exists_many, expand, find_many, foremost, get_nodes, get_rels, pull_all,
+    push_all, update_properties,
+)
+
+
+@pytest.mark.integration
+def test_find_many(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+
+    result = find_many(g, 'thingy', 'name', ['b', 'a', 'zz', 'a', 'b'],
+                       batch_size=1)
+
+    assert result.nodes == {'a': node_a, 'b': node_b}
+    assert result.missing == ['zz']
+
+
+@pytest.mark.integration
+def test_find_many_no_values(sample_graph):
+    result = find_many(sample_graph, 'thingy', 'name', [])
+
+    assert result.nodes == {}
+    assert result.missing == []
+
+
+@pytest.mark.unit
+def test_expand_bad_direction():
+    with pytest.raises(ValueError):
+        expand(None, [], direction='sideways')
+
+
+@pytest.mark.integration
+def test_expand(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+
+    outgoing = expand(g, [node_a, node_b], rel_type='points_to')
+    assert list(outgoing) == [node_a._id, node_b._id]
+    (rel, neighbour), = outgoing[node_a._id]
+    assert rel.reltype == 'points_to'
+    assert neighbour == node_b
+    assert outgoing[node_b._id] == []
+
+    incoming = expand(g, [node_b._id], direction='in', limit_per_node=1)
+    assert [n for _, n in incoming[node_b._id]] == [node_a]
+
+
+@pytest.mark.integration
+def test_push_all_pull_all(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    rel = g.match_one(start_node=node_a, rel_type='points_to')
+
+    update_properties(node_a, {'foo': 1})
+    update_properties(rel, {'sample': 'changed'})
+    node_b.add_labels('extra')
+    push_all(g, [node_a, node_b, rel, node_a])
+
+    a2, b2, rel2 = foremost(cypher_execute(g, """
+        MATCH (a)-[r]->(b) WHERE ID(r) = {id} RETURN a, b, r
+    """, id=rel._id))
+    assert a2['foo'] == 1
+    assert rel2['sample'] == 'changed'
+    assert b2.labels == {'thingy', 'extra'}
+
+    cypher_execute(g, 'MATCH (n:thingy) SET n.foo = 2')
+    pull_all(g, [node_a, node_b])
+    assert node_a['foo'] == node_b['foo'] == 2
+
+
+@pytest.mark.unit
+def test_push_all_pull_all_missing(monkeypatch):
+    """Local state is pushed without reading the server per entity, and
+    entities deleted on the server are reported."""
+    entities = [SimpleNamespace(_id=i, properties={'n': i},
+                                labels=frozenset(['x'])) for i in (1, 2, 3)]
+    queries, pushed, pulled = [], [], []
+
+    def fake_execute(graph, query, **params):
+        queries.append(query)
+        rows = params.get('rows', [])
+        return [{'id': row['id']} for row in rows if row['id'] != 2]
+
+    def fake_stream(graph, query, ids):
+        queries.append(query)
+        return [{'id': i, 'e': i, 'labels': ['x']} for i in ids if i != 2]
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_execute', fake_execute)
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_stream', fake_stream)
+    monkeypatch.setattr(py2neo_compat.bulk, 'entity_state',
+                        lambda e: (e.properties, e.labels))
+    monkeypatch.setattr(py2neo_compat.bulk, 'mark_entity_pushed',
+                        pushed.append)
+    monkeypatch.setattr(py2neo_compat.bulk, 'copy_entity_state',
+                        lambda dst, src: pulled.append(dst))
+
+    assert push_all(None, entities) == [entities[1]]
+    assert len(queries) == 2  # Properties, then current labels
+    assert pushed == [entities[0], entities[2]]
+
+    assert pull_all(None, entities, batch_size=2) == [entities[1]]
+    assert pulled == [entities[0], entities[2]]
+
+
+@pytest.mark.unit
+def test_push_all_nothing_local(monkeypatch):
+    """Without local state (py2neo 1.6) no query is run."""
+    monkeypatch.setattr(py2neo_compat.bulk, 'entity_state', lambda e: None)
+
+    assert push_all(None, [SimpleNamespace(_id=1)]) == []
+
+
+@pytest.mark.unit
+def test_mark_entity_pushed_remote_labels():
+    if py2neo_compat.py2neo_ver != 2021:
+        pytest.skip('only py2neo 2021 tracks remote labels')
+    from py2neo_compat.py2neo_compat_v2021 import (
+        Node, copy_entity_state, entity_state, mark_entity_pushed,
+    )
+
+    node = Node('a', 'b', name='x')
+    assert entity_state(node) == ({'name': 'x'}, frozenset(['a', 'b']))
+    mark_entity_pushed(node)
+    assert node._remote_labels == frozenset(['a', 'b'])
+
+    copy = Node()
+    copy_entity_state(copy, node)
+    assert copy._remote_labels == node._remote_labels
+
+
+@pytest.mark.unit
+def test_exists_many_bad_kind():
+    with pytest.raises(ValueError):
+        exists_many(None, [1], kind='edge')
+
+
+@pytest.mark.unit
+def test_exists_many_numpy_ids(monkeypatch):
+    np = pytest.importorskip('numpy')
+    queried = []
+
+    def fake_stream(graph, query, ids):
+        queried.extend(ids)
+        return [{'id': i} for i in ids]
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_stream', fake_stream)
+
+    assert exists_many(None, np.array([3, 1, 3])) == [True, True, True]
+    assert queried == [3, 1]
+    assert all(type(i) is int for i in queried)
+
+
+@pytest.mark.integration
+def test_exists_many_get_nodes_get_rels(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    rel = g.match_one(start_node=node_a, rel_type='points_to')
+    missing = max(node_a._id, node_b._id, rel._id) + 1000
+
+    ids = [node_b._id, missing, node_a._id, node_b._id]
+    assert exists_many(g, ids) == [True, False, True, True]
+    assert get_nodes(g, ids) == [node_b, None, node_a, node_b]
+
+    assert exists_many(g, [missing, rel._id], kind='rel') == [False, True]
+    assert get_rels(g, [rel._id, missing]) == [rel, None]
+
+
+@pytest.mark.unit
+def test_delete_rels_where_batches(monkeypatch):
+    remaining = [5]
+    calls = []
+
+    def fake_execute(graph, query, **params):
+        calls.append((query, params))
+        count = min(remaining[0], params['batch_size'])
+        remaining[0] -= count
+        return [{'id': i} for i in range(count)]
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_execute', fake_execute)
+
+    deleted = delete_rels_where(None, 'points_to', {'sample': 'x'},
+                                where='r.n > 1', batch_size=2)
+
+    assert deleted == 5
+    assert len(calls) == 3
+    query, params = calls[0]
+    assert '[r:`points_to`]' in query
+    assert 'r.`sample` = {p0} AND (r.n > 1)' in query
+    assert params == {'batch_size': 2, 'p0': 'x'}
+
+
+@pytest.mark.integration
+def test_delete_rels(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    rel = g.match_one(start_node=node_a, rel_type='points_to')
+    g.create((node_b, 'points_to', node_a))
+
+    assert delete_rels(g, [rel, rel._id], batch_size=1) == 1
+    assert exists_many(g, [rel._id], kind='rel') == [False]
+    assert g.size == 1
+
+
+@pytest.mark.integration
+def test_delete_rels_where(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    node_c = create_node(graph=g, labels=['thingy'], properties={'name': 'c'})
+    g.create((node_b, 'points_to', node_c))
+    g.create((node_c, 'points_to', node_a))
+
+    assert delete_rels_where(g, 'points_to', {'sample': 'property'}) == 1
+    assert g.size == 2
+    assert delete_rels_where(g, ['points_to', 'other'], batch_size=1) == 2
+    assert g.size == 0
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('workers', [1, 2])
+def test_delete_all_batches(monkeypatch, workers):
+    remaining = {('rel', 'a'): 3, ('rel', 'b'): 0,
+                 ('node', 'a'): 2, ('node', 'b'): 4}
+
+    def fake_execute(graph, query, batch_size):
+        kind = 'rel' if 'DELETE r' in query else 'node'
+        label = 'a' if '`a`' in query else 'b'
+        count = min(remaining[kind, label], batch_size)
+        remaining[kind, label] -= count
+        return [{'id': i} for i in range(count)]
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_execute', fake_execute)
+    reports = []
+
+    result = delete_all(None, batch_size=2, labels=['a', 'b'],
+                        workers=workers,
+                        progress=lambda *args: reports.append(args))
+
+    assert result == (6, 3)
+    assert not any(remaining.values())
+    assert sorted(reports) == [
+        ('node', 'a', 2), ('node', 'a', 2),
+        ('node', 'b', 2), ('node', 'b', 4), ('node', 'b', 4),
+        ('rel', 'a', 2), ('rel', 'a', 3), ('rel', 'b', 0),
+    ]
+
+
+@pytest.mark.unit
+def test_bulk_cancel(monkeypatch):
+    """One token, child of *cancel*, is passed to each query."""
+    tokens = []
+
+    def fake_stream(graph, query, ids, cancel):
+        tokens.append(cancel)
+        return [{'id': i} for i in ids]
+
+    def fake_execute(graph, query, batch_size, cancel):
+        tokens.append(cancel)
+        return []
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_stream', fake_stream)
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_execute', fake_execute)
+    parent = CancellationToken()
+
+    assert exists_many(None, range(3), batch_size=2, cancel=parent) == \
+        [True, True, True]
+    assert delete_all(None, labels=['a', 'b'], timeout=60) == (0, 0)
+    assert len(tokens) == 6
+    assert tokens[0] is tokens[1] and tokens[0]._parent is parent
+    assert all(token is tokens[2] for token in tokens[2:])
+    assert tokens[2].timeout == 60
+
+
+@pytest.mark.unit
+def test_bulk_timeout_not_overload(monkeypatch):
+    """Running out of time does not split batches."""
+    sizes = []
+
+    def fake_execute(graph, query, batch_size, cancel):
+        sizes.append(batch_size)
+        cancel._fire(QueryTimeout('timed out'))  # The deadline passes
+        cancel.check()
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_execute', fake_execute)
+    batcher = AdaptiveBatcher(initial=4)
+
+    with pytest.raises(QueryTimeout):
+        delete_rels_where(None, batch_size=batcher, timeout=60)
+    assert sizes == [4]
+    assert batcher.size == 4
+
+
+@pytest.mark.integration
+def test_delete_all(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    create_node(graph=g, labels=['other'], properties={'name': 'c'})
+
+    assert delete_all(g, batch_size=1, labels=['thingy']) == (2, 1)
+    assert g.order == 1
+    assert delete_all(g) == (1, 0)
+    assert g.order == g.size == 0
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.cache`."""
+
+from __future__ import absolute_import, print_function
+
+import threading
+import time
+
+import pytest  # noqa
+
+import py2neo_compat
+from py2neo_compat.cache import IdentityMap, QueryCache, SingleFlight
+
+
+class FakeClock(object):
+    """Manually-advanced clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_identity_map_lru_eviction():
+    imap = IdentityMap(maxsize=2)
+    a, b, c = object(), object(), object()
+
+    imap.put('a', a)
+    imap.put('b', b)
+    assert imap.get('a') is a   # 'a' is now most-recently used
+    imap.put('c', c)
+
+    assert len(imap) == 2
+    assert imap.get('b') is None
+    assert imap.get('a') is a
+    assert imap.get('c') is c
+    assert imap.evictions == 1
+
+
+@pytest.mark.unit
+def test_identity_map_ttl():
+    clock = FakeClock()
+    imap = IdentityMap(ttl=10, clock=clock)
+    a = object()
+
+    imap.put('a', a)
+    clock.now = 10
+    assert imap.is_fresh('a', a)
+    clock.now = 10.5
+    assert not imap.is_fresh('a', a)
+    assert 'a' not in imap
+
+
+@pytest.mark.unit
+def test_identity_map_canonical_merges_into_cached():
+    imap = IdentityMap()
+    cached, loaded = {'v': 1}, {'v': 2}
+    merged = []
+
+    assert imap.canonical('k', cached) is cached
+    result = imap.canonical('k', loaded,
+                            merge=lambda d, s: merged.append((d, s)))
+
+    assert result is cached
+    assert merged == [(cached, loaded)]
+
+
+@pytest.mark.unit
+def test_identity_map_invalidate():
+    imap = IdentityMap()
+    imap.put('a', object())
+    imap.invalidate('a')
+    imap.invalidate('missing')
+    assert 'a' not in imap
+
+
+@pytest.mark.integration
+def test_find_one_returns_same_object(sample_graph_and_nodes):
+    g, node_a, _ = sample_graph_and_nodes
+    py2neo_compat.enable_identity_map(g)
+    try:
+        found1 = g.find_one('thingy', 'name', 'a')
+        found2 = g.find_one('thingy', 'name', 'a')
+        assert found1 is found2
+        assert found1 == node_a
+    finally:
+        py2neo_compat.disable_identity_map(g)
+
+
+@pytest.mark.integration
+def test_update_properties_invalidates(sample_graph_and_nodes):
+    g, _, _ = sample_graph_and_nodes
+    imap = py2neo_compat.enable_identity_map(g)
+    try:
+        found = g.find_one('thingy', 'name', 'a')
+        assert py2neo_compat.entity_key(found) in imap
+
+        py2neo_compat.update_properties(found, {'foo': 'bar'})
+        assert py2neo_compat.entity_key(found) not in imap
+    finally:
+        py2neo_compat.disable_identity_map(g)
+
+
+@pytest.mark.unit
+def test_single_flight_shares_concurrent_calls():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ['result']
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(
+        flight.do('key', slow)))
+    leader.start()
+    started.wait(5)
+
+    followers = [threading.Thread(target=lambda: results.append(
+        flight.do('key', slow))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.shared < 3 and time.monotonic() < deadline:
+        release.wait(0.001)  # until all followers are waiting
+    assert flight.shared == 3
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 4
+    assert all(result is results[0] for result in results)
+    assert (flight.calls, flight.shared) == (1, 3)
+
+    # Completed calls are not cached
+    assert flight.do('key', lambda: 'again') == 'again'
+
+
+@pytest.mark.unit
+def test_single_flight_error():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 1) == 1
+
+
+@pytest.mark.unit
+def test_query_cache_invalidate_by_tag():
+    cache = QueryCache()
+    cache.put('a', ['a'], frozenset(['thingy']))
+    cache.put('b', ['b'], frozenset(['points_to']))
+    cache.put('any', ['any'], None)
+
+    cache.invalidate(['thingy', 'other'])
+
+    assert cache.get('a') is None
+    assert cache.get('b') == ['b']
+    assert cache.get('any') is None
+    assert cache.invalidations == 2
+
+    cache.invalidate()
+    assert len(cache) == 0
+    assert cache.bytes == 0
+
+
+@pytest.mark.unit
+def test_query_cache_bounds():
+    clock = FakeClock()
+    cache = QueryCache(maxsize=3, maxbytes=10, ttl=5, sizeof=len,
+                       clock=clock)
+
+    cache.put('a', 'aaaa')
+    cache.put('b', 'bbbb')
+    cache.get('a')
+    cache.put('c', 'cc')    # 10 bytes: at the limit
+    cache.put('d', 'd')     # 11 bytes: evicts b, the least recently used
+    assert cache.get('b') is None
+    assert cache.bytes == 7
+
+    cache.put('e', 'e' * 11)  # Larger than maxbytes: not kept
+    assert cache.get('e') is None
+    assert len(cache) == 3
+
+    clock.now = 6
+    assert cache.get('a') is None
+    assert cache.evictions == 1
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.cancel` and cancellable queries."""
+
+from __future__ import absolute_import, print_function
+
+import threading
+
+import pytest  # noqa
+
+import py2neo_compat
+import py2neo_compat.py2neo_compat
+from py2neo_compat.cancel import (
+    CancellationToken, QueryCancelled, QueryTimeout,
+)
+
+
+@pytest.fixture
+def fake_tx(monkeypatch):
+    """Record calls to the version-specific transaction functions."""
+    log = []
+
+    def begin(graph, eager=False):
+        log.append('begin eager=%s' % eager)
+        return object()
+
+    def run(tx, query, params):
+        log.append(query)
+        if query == 'bad':
+            raise ValueError(query)
+        return iter([params, params])
+
+    for name, func in [
+        ('begin_transaction', begin),
+        ('transaction_run', run),
+        ('commit_transaction', lambda graph, tx: log.append('commit')),
+        ('rollback_transaction', lambda graph, tx: log.append('rollback')),
+        ('interrupt_transaction', lambda graph, tx: log.append('interrupt')),
+    ]:
+        monkeypatch.setattr(py2neo_compat.py2neo_compat, name, func)
+    return log
+
+
+@pytest.mark.unit
+def test_token_cancel():
+    token = CancellationToken()
+    called = []
+    token.on_cancel(lambda: called.append(1))
+    token.check()
+
+    token.cancel()
+    token.cancel()
+    assert token.cancelled
+    assert called == [1]
+    with pytest.raises(QueryCancelled):
+        token.check()
+
+    token.on_cancel(lambda: called.append(2))
+    assert called == [1, 2]
+
+
+@pytest.mark.unit
+def test_token_timeout():
+    timed_out = threading.Event()
+    token = CancellationToken(timeout=0.01)
+    token.on_cancel(timed_out.set)
+
+    assert timed_out.wait(5)
+    with pytest.raises(QueryTimeout):
+        token.check()
+
+
+@pytest.mark.unit
+def test_token_parent():
+    parent = CancellationToken()
+    child = CancellationToken(parent=parent)
+    closed = CancellationToken(parent=parent)
+    closed.close()
+
+    parent.cancel()
+    assert child.cancelled
+    assert not closed.cancelled
+
+
+@pytest.mark.unit
+def test_stream_commits(fake_tx):
+    records = py2neo_compat.cypher_stream(None, 'a', cancel=CancellationToken(),
+                                          x=1)
+    assert list(records) == [{'x': 1}, {'x': 1}]
+    assert fake_tx == ['begin eager=True', 'a', 'commit']
+
+
+@pytest.mark.unit
+def test_stream_commits_on_close(fake_tx):
+    records = py2neo_compat.cypher_stream(None, 'a', timeout=60)
+    next(records)
+    records.close()
+    assert fake_tx == ['begin eager=True', 'a', 'commit']
+
+
+@pytest.mark.unit
+def test_stream_cancel(fake_tx):
+    token = CancellationToken()
+    records = py2neo_compat.cypher_stream(None, 'a', cancel=token)
+    next(records)
+    token.cancel()
+    with pytest.raises(QueryCancelled):
+        next(records)
+
+    assert fake_tx == ['begin eager=True', 'a', 'interrupt', 'rollback']
+    assert list(records) == []
+
+
+@pytest.mark.unit
+def test_execute_failure_after_cancel(fake_tx, monkeypatch):
+    token = CancellationToken()
+
+    def run(tx, query, params):
+        # As when an interrupt aborts the statement on the server
+        token.cancel()
+        fake_tx.append(query)
+        raise ZeroDivisionError
+
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, 'transaction_run', run)
+
+    with pytest.raises(QueryCancelled) as excinfo:
+        py2neo_compat.cypher_execute(None, 'a', cancel=token)
+    assert isinstance(excinfo.value.__cause__, ZeroDivisionError)
+    assert fake_tx == ['begin eager=True', 'interrupt', 'a', 'rollback']
+
+
+@pytest.mark.unit
+def test_execute_without_cancel(fake_tx):
+    with pytest.raises(ValueError):
+        py2neo_compat.cypher_execute(None, 'bad', timeout=60)
+    assert fake_tx == ['begin eager=True', 'bad', 'rollback']
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.metrics`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+from py2neo_compat.metrics import Metrics
+
+
+@pytest.mark.unit
+def test_metrics():
+    metrics = Metrics()
+    metrics.incr('a')
+    metrics.incr('a', 2)
+    metrics.set('b', 1.5)
+    metrics.set('b', 2.5)
+
+    assert metrics.get('a') == 3
+    assert metrics.get('b') == 2.5
+    assert metrics.get('c') == 0
+    assert metrics.snapshot() == {'a': 3, 'b': 2.5}
+
+    metrics.reset()
+    assert metrics.snapshot() == {}
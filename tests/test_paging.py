@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.paging`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+import py2neo_compat.paging
+from py2neo_compat import create_node, iter_find, iter_match
+from py2neo_compat.cancel import CancellationToken
+from py2neo_compat.util import SimpleNamespace
+
+
+@pytest.fixture
+def fake_entities(monkeypatch):
+    """Serve pages of fake entities with IDs 0..6 from `cypher_execute`."""
+    entities = [SimpleNamespace(_id=i) for i in range(7)]
+    queries = []
+
+    def fake_execute(graph, query, after, page_size, **params):
+        queries.append(after)
+        page = [e for e in entities if e._id > after][:page_size]
+        return [{'e': e} for e in page]
+
+    monkeypatch.setattr(py2neo_compat.paging, 'cypher_execute', fake_execute)
+    return entities, queries
+
+
+@pytest.mark.unit
+def test_keyset_iterator_pages(fake_entities):
+    entities, queries = fake_entities
+
+    assert list(iter_find(None, 'thingy', page_size=3)) == entities
+    assert queries == [-1, 2, 5]
+
+
+@pytest.mark.unit
+def test_keyset_iterator_resumes_from_cursor(fake_entities):
+    entities, _ = fake_entities
+
+    walk = iter_match(None, rel_type='points_to', page_size=2)
+    consumed = []
+    for entity in walk:
+        consumed.append(entity)
+        if len(consumed) == 3:
+            break
+
+    resumed = iter_match(None, rel_type='points_to', page_size=2,
+                         cursor=walk.cursor)
+    assert consumed + list(resumed) == entities
+
+
+@pytest.mark.unit
+def test_keyset_iterator_timeout(monkeypatch):
+    """Each page's query gets the timeout, cancel token and parameters."""
+    calls = []
+
+    def fake_execute(graph, query, params, after, page_size, **kwargs):
+        calls.append((params, kwargs))
+        return []
+
+    monkeypatch.setattr(py2neo_compat.paging, 'cypher_execute', fake_execute)
+    token = CancellationToken()
+
+    assert list(iter_find(None, 'thingy', 'name', 'a', timeout=5,
+                          cancel=token)) == []
+    assert calls == [({'value': 'a'}, {'timeout': 5, 'cancel': token})]
+
+
+@pytest.mark.integration
+def test_iter_find(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    node_c = create_node(g, labels=['thingy'], properties={'name': 'c'})
+
+    assert list(iter_find(g, 'thingy', page_size=2)) == \
+        sorted([node_a, node_b, node_c], key=lambda n: n._id)
+    assert list(iter_find(g, 'thingy', 'name', 'c', page_size=2)) == [node_c]
+
+
+@pytest.mark.integration
+def test_iter_match(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+
+    results = list(iter_match(g, start_node=node_a, rel_type='points_to'))
+    assert len(results) == 1
+    assert results[0].end_node == node_b
@@ -6,6 +6,8 @@
 from __future__ import absolute_import, print_function
 
 import inspect
+import threading
+import time
 
 import pytest
 import py2neo
@@ -504,3 +506,355 @@ def test_can_delete_unbound_rel():
 
     assert n1 is not None
     assert n2 is not None
+
+
+@pytest.mark.unit
+def test_find_one_sends_limit(monkeypatch):
+    """:meth:`Graph.find_one` limits on the server and closes the cursor."""
+    calls = []
+
+    class Cursor(list):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    def fake_stream(graph, query, timeout=None, cancel=None, params=None):
+        cursor = Cursor([{'n': 'first'}, {'n': 'second'}])
+        calls.append((query, params, cursor))
+        return cursor
+
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, 'cypher_stream',
+                        fake_stream)
+    graph = py2neo_compat.util.SimpleNamespace()
+
+    assert py2neo_compat.Graph.find_one(graph, 'thingy', 'name', 'a') == 'first'
+
+    (query, params, cursor), = calls
+    assert 'LIMIT {limit}' in query
+    assert params == {'value': 'a', 'limit': 1}
+    assert cursor.closed
+
+
+@pytest.mark.unit
+def test_cypher_params_mapping(monkeypatch):
+    """Parameters named like keyword arguments go in *params*."""
+    calls = []
+
+    def fake(graph, query, **params):
+        calls.append(params)
+        return []
+
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_execute',
+                        fake)
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_stream',
+                        fake)
+    graph = py2neo_compat.util.SimpleNamespace()
+    params = {'timeout': 5, 'cancel': 'x', 'spill_threshold': 1, 'n': 1}
+
+    py2neo_compat.cypher_execute(graph, 'RETURN 1', params=params, n=2)
+    py2neo_compat.cypher_stream(graph, 'RETURN 1', params=params)
+    py2neo_compat.cypher_stream(graph, 'RETURN 1', n=3)
+    assert calls == [dict(params, n=2), params, {'n': 3}]
+
+
+@pytest.mark.unit
+def test_single_flight_cypher_execute(monkeypatch):
+    """Only read queries go through the single-flight group."""
+    keys = []
+
+    class Flight(object):
+        def do(self, key, func):
+            keys.append(key)
+            return func()
+
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_execute',
+                        lambda graph, query, **params: [query])
+    graph = py2neo_compat.util.SimpleNamespace()
+    py2neo_compat.enable_single_flight(graph)
+    graph._compat_single_flight = Flight()
+
+    read = 'MATCH (n) WHERE n.x IN {xs} RETURN n'
+    assert py2neo_compat.cypher_execute(graph, read, xs=[1, 2]) == [read]
+    assert py2neo_compat.cypher_execute(graph, 'MATCH (n) SET n.x = 1') \
+        == ['MATCH (n) SET n.x = 1']
+    assert keys == [(read, (('xs', (1, 2)),))]
+
+    py2neo_compat.disable_single_flight(graph)
+    py2neo_compat.cypher_execute(graph, read)
+    assert len(keys) == 1
+
+
+@pytest.mark.unit
+def test_single_flight_find_one(monkeypatch):
+    """Concurrent identical :meth:`Graph.find_one` calls share one query."""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_execute(graph, query, **params):
+        calls.append((query, params))
+        started.set()
+        release.wait(5)
+        return [{'n': 'found'}]
+
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_execute',
+                        slow_execute)
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, 'cypher_stream', None)
+    graph = py2neo_compat.util.SimpleNamespace()
+    flight = py2neo_compat.enable_single_flight(graph)
+
+    results = []
+
+    def find_one():
+        results.append(
+            py2neo_compat.Graph.find_one(graph, 'thingy', 'name', 'a'))
+
+    threads = [threading.Thread(target=find_one) for _ in range(4)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.shared < 3 and time.monotonic() < deadline:
+        release.wait(0.001)  # until all followers are waiting
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ['found'] * 4
+    assert len(calls) == 1
+    assert (flight.calls, flight.shared) == (1, 3)
+
+
+@pytest.mark.unit
+def test_single_flight_graph_order(monkeypatch):
+    """``Graph.order`` and ``Graph.size`` go through the flight."""
+    keys = []
+
+    class Flight(object):
+        def do(self, key, func):
+            keys.append(key)
+            return 42
+
+    graph = py2neo_compat.Graph.__new__(py2neo_compat.Graph)
+    graph.__dict__['_compat_single_flight'] = Flight()
+    for name in ('order', 'size'):
+        value = getattr(graph, name)
+        if callable(value):
+            value = value()
+        assert value == 42
+    assert keys == [('Graph', 'order'), ('Graph', 'size')]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(('query', 'expected'), [
+    ('MATCH (n) RETURN n.offset', True),
+    ('MATCH (n) DETACH DELETE n', False),
+    ('merge (n:thingy)', False),
+    ('LOAD CSV FROM {url} AS row RETURN row', False),
+    ('CALL db.labels()', False),
+])
+def test_is_read_only(query, expected):
+    assert py2neo_compat.is_read_only(query) is expected
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(('query', 'expected'), [
+    ('MATCH (n:`thingy`) WHERE n.`name` = {value} RETURN n', {'thingy'}),
+    ('MATCH (a:x:y)-[r:T|:U {w: 1}]->(b:z {name: "a"}) RETURN count(r)',
+     {'x', 'y', 'z', 'T', 'U'}),
+    ('MATCH (n) WHERE ID(n) = {id} RETURN n', None),
+    ('MATCH (a:x)-[*1..3]->(b:y) RETURN b', None),
+    ('RETURN 1', set()),
+    ('MATCH (n:x) WHERE n.name = "(a:b)" RETURN n', {'x'}),
+])
+def test_query_tags(query, expected):
+    tags = py2neo_compat.query_tags(query)
+    assert tags == (None if expected is None else frozenset(expected))
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(('query', 'expected'), [
+    ('MATCH (n:thingy) WHERE ID(n) = {id} SET n:archived', {'thingy',
+                                                           'archived'}),
+    ('MATCH (n:x) REMOVE n:`a b`:c SET n += {k: 1}, n.s = "n:d"',
+     {'x', 'a b', 'c'}),
+    ('MERGE (n:x) ON CREATE SET n:y RETURN {k: n}', {'x', 'y'}),
+    ('MATCH (n) SET n:y', None),
+    ('MATCH (n:x) RETURN n', set()),
+])
+def test_written_tags(query, expected):
+    tags = py2neo_compat.py2neo_compat._written_tags(query)
+    assert tags == (None if expected is None else frozenset(expected))
+
+
+def _cache_with(graph, *tags):
+    cache = py2neo_compat.enable_query_cache(graph)
+    for tag in tags:
+        cache.put(tag, [], frozenset([tag]))
+    return cache
+
+
+@pytest.mark.unit
+def test_pull_with_identity_map(monkeypatch):
+    """``pull()`` reaches the server even for a fresh cached entity."""
+    graph = py2neo_compat.util.SimpleNamespace()
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, 'entity_graph',
+                        lambda entity: graph)
+    pulls = []
+    monkeypatch.setattr(py2neo_compat.Node, '_orig_pull',
+                        lambda self: pulls.append(self))
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, 'entity_key',
+                        lambda entity: ('node', 1))
+    imap = py2neo_compat.enable_identity_map(graph)
+    node = py2neo_compat.create_node()
+    imap.put(('node', 1), node)
+
+    node.pull()
+    node.pull()
+    assert pulls == [node, node]
+    assert imap.is_fresh(('node', 1), node)
+
+
+@pytest.mark.unit
+def test_push_invalidates_removed_labels(monkeypatch):
+    graph = py2neo_compat.util.SimpleNamespace()
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, 'entity_graph',
+                        lambda entity: graph)
+    monkeypatch.setattr(py2neo_compat.Node, '_orig_push', lambda self: None)
+    cache = _cache_with(graph, 'old', 'new', 'other')
+    node = py2neo_compat.create_node(labels=['new'])
+    # Only py2neo 2021 knows the labels on the server
+    known = hasattr(node, '_remote_labels')
+    if known:
+        node._remote_labels = frozenset(['old'])
+
+    node.push()
+    assert cache.get('old') is None and cache.get('new') is None
+    assert cache.get('other') == ([] if known else None)
+
+
+@pytest.mark.unit
+def test_query_cache_stream_write(monkeypatch):
+    """A write stream invalidates when done, not just when started."""
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_stream',
+                        lambda graph, query, **params: iter([1, 2]))
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_execute',
+                        lambda graph, query, **params: ['read'])
+    graph = py2neo_compat.util.SimpleNamespace()
+    cache = py2neo_compat.enable_query_cache(graph)
+    read = 'MATCH (n:thingy) RETURN n'
+
+    stream = py2neo_compat.cypher_stream(graph, 'CREATE (n:thingy)')
+    py2neo_compat.cypher_execute(graph, read)  # as if concurrent
+    assert len(cache) == 1
+    assert list(stream) == [1, 2]
+    assert len(cache) == 0
+
+    stream = py2neo_compat.cypher_stream(graph, 'CREATE (n:thingy)')
+    py2neo_compat.cypher_execute(graph, read)
+    stream.close()
+    assert len(cache) == 0
+
+    assert not isinstance(py2neo_compat.cypher_stream(graph, read),
+                          py2neo_compat.py2neo_compat._WriteCursor)
+
+
+@pytest.mark.unit
+def test_query_cache_execute_label_write(monkeypatch):
+    """Labels set or removed by a write invalidate their cached reads."""
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_execute',
+                        lambda graph, query, **params: [])
+    graph = py2neo_compat.util.SimpleNamespace()
+    cache = _cache_with(graph, 'A', 'B', 'C', 'D')
+
+    py2neo_compat.cypher_execute(graph, 'MATCH (n:A) SET n:B')
+    assert cache.get('B') is None
+    py2neo_compat.cypher_execute(graph, 'MATCH (n:A) REMOVE n:C')
+    assert cache.get('C') is None
+    assert cache.get('D') == []
+
+
+@pytest.mark.unit
+def test_query_cache_skips_read_overlapping_write(monkeypatch):
+    graph = py2neo_compat.util.SimpleNamespace()
+    cache = py2neo_compat.enable_query_cache(graph)
+
+    def fake_execute(g, query, **params):
+        # A write completes while the read is running
+        py2neo_compat.invalidate_queries(graph, ['thingy'])
+        return ['stale']
+
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_execute',
+                        fake_execute)
+    read = 'MATCH (n:thingy) RETURN n'
+    assert py2neo_compat.cypher_execute(graph, read) == ['stale']
+    assert len(cache) == 0
+
+
+@pytest.mark.unit
+def test_query_cache_cypher_execute(monkeypatch):
+    """Reads are cached; writes invalidate their labels."""
+    sent = []
+
+    def fake_execute(graph, query, **params):
+        sent.append(query)
+        return [len(sent)]
+
+    monkeypatch.setattr(py2neo_compat.py2neo_compat, '_orig_cypher_execute',
+                        fake_execute)
+    graph = py2neo_compat.util.SimpleNamespace()
+    cache = py2neo_compat.enable_query_cache(graph)
+
+    thingy = 'MATCH (n:thingy) RETURN n'
+    other = 'MATCH (n:other) RETURN n'
+    assert py2neo_compat.cypher_execute(graph, thingy) == [1]
+    assert py2neo_compat.cypher_execute(graph, thingy) == [1]
+    assert py2neo_compat.cypher_execute(graph, other) == [2]
+
+    py2neo_compat.cypher_execute(graph, 'CREATE (n:thingy)')
+    assert py2neo_compat.cypher_execute(graph, thingy) == [4]
+    assert py2neo_compat.cypher_execute(graph, other) == [2]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+    py2neo_compat.disable_query_cache(graph)
+    assert py2neo_compat.cypher_execute(graph, thingy) == [5]
+
+
+@pytest.mark.integration
+def test_query_cache(sample_graph_and_nodes):
+    """Writes through the compat helpers invalidate cached reads."""
+    g, node_a, node_b = sample_graph_and_nodes
+    py2neo_compat.enable_query_cache(g)
+    try:
+        names = lambda: sorted(n['name'] for n in
+                               py2neo_compat.find(g, 'thingy'))
+        assert names() == ['a', 'b']
+
+        py2neo_compat.create_node(g, ['thingy'], {'name': 'c'})
+        assert names() == ['a', 'b', 'c']
+
+        py2neo_compat.update_properties(node_a, {'name': 'aa'})
+        node_a.push()
+        assert names() == ['aa', 'b', 'c']
+
+        rel = foremost(g.match(start_node=node_a, rel_type='points_to'))
+        py2neo_compat.delete_rel(rel)
+        assert list(g.match(start_node=node_a, rel_type='points_to')) == []
+    finally:
+        py2neo_compat.disable_query_cache(g)
+
+
+@pytest.mark.integration
+def test_find_limit_skip(sample_graph_and_nodes):
+    """Test :func:`~py2neo_compat.find` with *limit* and *skip*."""
+    g, node_a, node_b = sample_graph_and_nodes
+
+    assert list(py2neo_compat.find(g, 'thingy')) in ([node_a, node_b],
+                                                     [node_b, node_a])
+    assert list(py2neo_compat.find(g, 'thingy', 'name', 'b')) == [node_b]
+    assert len(list(py2neo_compat.find(g, 'thingy', limit=1))) == 1
+
+    first, second = sorted([node_a, node_b], key=lambda n: n._id)
+    assert list(py2neo_compat.find(g, 'thingy', skip=1)) == [second]
+    assert list(py2neo_compat.find(g, 'thingy', skip=0, limit=1)) == [first]
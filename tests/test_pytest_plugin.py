@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.pytest_plugin`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+from py2neo_compat.schema import SchemaItem
+from py2neo_compat.testing import GraphDump
+
+pytest_plugins = ['py2neo_compat.pytest_plugin']
+
+WITH_SCHEMA = GraphDump(nodes=[], rels=[],
+                        schema={'indexes': [SchemaItem('thingy', 'name')]})
+WITHOUT_SCHEMA = GraphDump(nodes=[], rels=[], schema={})
+
+
+@pytest.fixture
+def resets(monkeypatch):
+    """Keyword arguments of each ``reset_graph`` call."""
+    calls = []
+    monkeypatch.setattr('py2neo_compat.pytest_plugin.reset_graph',
+                        lambda graph, **kwargs: calls.append(kwargs))
+    return calls
+
+
+@pytest.fixture
+def compat_session_graph(resets):
+    return 'graph'
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(('compat_baseline', 'keep_schema'), [
+    (None, True),
+    (WITHOUT_SCHEMA, True),
+    (WITH_SCHEMA, False),
+])
+def test_compat_graph_baseline_schema(compat_graph, compat_baseline,
+                                      keep_schema, resets):
+    assert compat_graph == 'graph'
+    assert resets == [{'keep_schema': keep_schema, 'schema': None,
+                       'baseline': compat_baseline}]
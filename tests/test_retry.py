@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.retry`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+import py2neo_compat
+import py2neo_compat.bulk
+from py2neo_compat import py2neo_ver
+from py2neo_compat.bulk import delete_rels_where
+from py2neo_compat.metrics import Metrics
+from py2neo_compat.retry import RetryPolicy, is_transient
+from py2neo_compat.util import SimpleNamespace
+
+
+class CodedError(Exception):
+    def __init__(self, code):
+        super(CodedError, self).__init__(code)
+        self.code = code
+
+
+class LegacyError(Exception):
+    exception = 'DeadlockDetectedException'
+
+
+class ConnectionBroken(Exception):
+    """Named like the py2neo 2021 exception."""
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('error, transient', [
+    (CodedError('Neo.TransientError.Transaction.DeadlockDetected'), True),
+    (CodedError('Neo.ClientError.Statement.SyntaxError'), False),
+    (LegacyError('deadlock'), True),
+    (ConnectionBroken(), True),
+    (ConnectionResetError(), True),
+    (ValueError(), False),
+    (py2neo_compat.QueryTimeout(), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+@pytest.mark.unit
+def test_is_transient_py2neo_errors():
+    data = {'code': 'Neo.TransientError.Transaction.DeadlockDetected',
+            'message': 'deadlock'}
+    if py2neo_ver == 2021:
+        from py2neo.errors import Neo4jError
+        errors = [Neo4jError.hydrate(data)]
+    elif py2neo_ver == 2:
+        from py2neo import GraphError
+        from py2neo.cypher.error.core import CypherTransactionError
+        errors = [CypherTransactionError.hydrate(data),
+                  GraphError('deadlock',
+                             exception='DeadlockDetectedException')]
+    else:
+        pytest.skip('py2neo %s errors need a server' % py2neo_ver)
+
+    for error in errors:
+        assert is_transient(error), error
+
+
+def flaky(failures, error=None):
+    """Function failing *failures* times before returning ``'ok'``."""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error or ConnectionResetError()
+        return 'ok'
+    func.calls = calls
+    return func
+
+
+@pytest.mark.unit
+def test_retry_policy_recovers():
+    metrics, sleeps = Metrics(), []
+    policy = RetryPolicy(attempts=4, base_delay=0.1, max_delay=0.3,
+                         jitter=False, metrics=metrics, sleep=sleeps.append)
+    func = flaky(3)
+
+    assert policy.call(func) == 'ok'
+    assert sleeps == [0.1, 0.2, 0.3]
+    assert metrics.snapshot() == {'retry.retries': 3,
+                                  'retry.retries.func': 3,
+                                  'retry.recovered': 1}
+
+
+@pytest.mark.unit
+def test_retry_policy_gives_up():
+    metrics = Metrics()
+    policy = RetryPolicy(attempts=3, metrics=metrics, sleep=lambda _: None)
+    func = flaky(5)
+
+    with pytest.raises(ConnectionResetError):
+        policy.call(func)
+    assert len(func.calls) == 3
+    assert metrics.get('retry.exhausted') == 1
+
+    func = flaky(1, ValueError())
+    with pytest.raises(ValueError):
+        policy.call(func)
+    assert len(func.calls) == 1
+
+
+@pytest.mark.unit
+def test_retry_policy_jitter():
+    policy = RetryPolicy(base_delay=1, max_delay=10)
+    for retry in range(1, 10):
+        assert 0 <= policy.delay(retry) <= min(10, 2 ** (retry - 1))
+
+
+@pytest.mark.unit
+def test_bulk_delete_retried(monkeypatch):
+    failures = [CodedError('Neo.TransientError.Transaction.DeadlockDetected')]
+
+    def fake_execute(graph, query, **params):
+        if failures:
+            raise failures.pop()
+        return [{'id': 1}]
+
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_execute', fake_execute)
+    graph = SimpleNamespace()
+    metrics = Metrics()
+    py2neo_compat.enable_retry(
+        graph, RetryPolicy(metrics=metrics, sleep=lambda _: None))
+
+    assert delete_rels_where(graph, batch_size=2) == 1
+    assert metrics.get('retry.retries.delete_rels') == 1
+
+    py2neo_compat.disable_retry(graph)
+    failures.append(CodedError('Neo.TransientError.Transaction.Outdated'))
+    with pytest.raises(CodedError):
+        delete_rels_where(graph, batch_size=2)
@@ -15,7 +15,9 @@ from py2neo_compat.schema import \
     drop_schema, \
     schema_constraints, \
     schema_indexes, \
+    schema_map, \
     SchemaItem
+from py2neo_compat.cancel import CancellationToken, QueryCancelled
 
 
 def test_schema_indexes(sample_graph):
@@ -130,3 +132,13 @@ def test_create_schema_dup_indexes(neo4j_graph, schema1, schema2):
 
     create_schema(g, schema_map=schema1)
     create_schema(g, schema_map=schema2)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('helper', [drop_schema, schema_map])
+def test_schema_cancelled(helper):
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(QueryCancelled):
+        # Raised before the graph is used
+        helper(None, cancel=token)
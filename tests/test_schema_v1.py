@@ -9,7 +9,7 @@ pytest.importorskip('py2neo_compat.schema_v1',
 from py2neo_compat.schema_v1 import (
     _create_constraint,
     _schema_template,
-    graph_metadata, schema_constraints,
+    graph_metadata, invalidate_graph_metadata, schema_constraints,
     schema_indexes, schema_template_subpath,
 )
 
@@ -78,3 +78,46 @@ def test_graph_metadata(neo4j_graph_object):
     assert len(graph_metadata(neo4j_graph_object)) > 0
     assert graph_metadata(neo4j_graph_object, 'indexes')\
         .endswith('/schema/index')
+
+
+class CountingGraph(object):
+    """Fake graph counting reads of its v1.6-style metadata."""
+
+    uri = 'http://localhost:7474/db/data/'
+
+    def __init__(self):
+        self.fetches = 0
+
+    @property
+    def __metadata__(self):
+        self.fetches += 1
+        return {'constraints': self.uri + 'schema/constraint'}
+
+
+@pytest.mark.unit
+def test_graph_metadata_cached():
+    graph = CountingGraph()
+
+    assert graph_metadata(graph, 'constraints').endswith('/schema/constraint')
+    graph_metadata(graph)
+    assert graph.fetches == 1
+
+    invalidate_graph_metadata(graph)
+    graph_metadata(graph)
+    assert graph.fetches == 2
+
+
+@pytest.mark.unit
+def test__schema_template_cached():
+    graph = CountingGraph()
+
+    t = _schema_template(graph, 'constraints', label='a', property_key='b',
+                         constraint_type='uniqueness')
+    assert _schema_template(graph, 'constraints', label='c',
+                            property_key='d',
+                            constraint_type='uniqueness') is t
+    assert _schema_template(graph, 'constraints', label='c') is not t
+
+    invalidate_graph_metadata(graph)
+    assert _schema_template(graph, 'constraints', label='a', property_key='b',
+                            constraint_type='uniqueness') is not t
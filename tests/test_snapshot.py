@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.snapshot`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import py2neo_compat.bulk  # noqa: E402
+import py2neo_compat.snapshot  # noqa: E402
+from py2neo_compat import create_node  # noqa: E402
+from py2neo_compat.snapshot import Snapshot, refresh, snapshot  # noqa: E402
+
+
+@pytest.fixture
+def sample_snapshot():
+    """Snapshot of 30 -> 10, 10 -> 20, 10 -> 30 & a dangling 10 -> 99."""
+    return Snapshot.from_edges(
+        node_ids=[30, 10, 20],
+        start_ids=[10, 30, 10, 10],
+        end_ids=[20, 10, 30, 99],
+        rel_ids=[1, 2, 3, 4],
+        node_properties={'name': ['c', 'a', 'b']},
+        rel_properties={'weight': [0.5, 1.0, 2.0, 3.0]},
+    )
+
+
+@pytest.mark.unit
+def test_from_edges(sample_snapshot):
+    snap = sample_snapshot
+
+    assert (snap.num_nodes, snap.num_rels) == (3, 3)
+    assert snap.node_ids.tolist() == [10, 20, 30]
+    assert snap.indptr.tolist() == [0, 2, 2, 3]
+    assert snap.rel_ids.tolist() == [1, 3, 2]
+    assert snap.node_properties['name'].tolist() == ['a', 'b', 'c']
+    assert snap.rel_properties['weight'].tolist() == [0.5, 2.0, 1.0]
+    assert snap.out_degree().tolist() == [2, 0, 1]
+    assert snap.neighbours(10).tolist() == [20, 30]
+    assert snap.index_of([20, 99, 5]).tolist() == [1, -1, -1]
+    with pytest.raises(KeyError):
+        snap.neighbours(99)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(('filename', 'mmap_mode'), [
+    ('snap.npz', None),
+    ('snapdir', 'r'),
+])
+def test_save_load(sample_snapshot, tmpdir, filename, mmap_mode):
+    path = str(tmpdir.join(filename))
+    sample_snapshot.save(path)
+
+    loaded = Snapshot.load(path, mmap_mode=mmap_mode)
+
+    for name in ('node_ids', 'indptr', 'indices', 'rel_ids'):
+        assert getattr(loaded, name).tolist() == \
+            getattr(sample_snapshot, name).tolist()
+    assert loaded.node_properties['name'].tolist() == ['a', 'b', 'c']
+    assert loaded.rel_properties['weight'].tolist() == [0.5, 2.0, 1.0]
+    if mmap_mode:
+        assert isinstance(loaded.indices, np.memmap)
+
+
+@pytest.mark.unit
+def test_list_properties_stay_1d(tmpdir):
+    """Equal-length list properties are one list per node, not a matrix."""
+    snap = Snapshot.from_edges(
+        node_ids=[2, 1, 3], start_ids=[], end_ids=[], rel_ids=[],
+        node_properties={'tags': [['c', 'd'], ['a', 'b'], ['e', 'f']]})
+    column = py2neo_compat.snapshot._column([['a', 'b'], ['c', 'd']])
+    assert column.shape == (2,)
+    assert snap.node_properties['tags'].shape == (3,)
+
+    path = str(tmpdir.join('snap.npz'))
+    snap.save(path)
+    loaded = Snapshot.load(path)
+    assert loaded.node_properties['tags'].shape == (3,)
+    assert loaded.node_properties['tags'].tolist() == \
+        [['a', 'b'], ['c', 'd'], ['e', 'f']]
+
+
+@pytest.mark.unit
+def test_load_without_pickle(sample_snapshot, tmpdir):
+    sample_snapshot.node_properties['tags'] = np.array(
+        [['x'], [], ['y', 'z']] + [None], dtype=object)[:3]
+    path = str(tmpdir.join('snap.npz'))
+    sample_snapshot.save(path)
+
+    loaded = Snapshot.load(path)
+    assert loaded.node_properties['tags'].tolist() == [['x'], [], ['y', 'z']]
+
+    sample_snapshot.node_properties['tags'] = np.array(
+        [object(), None, None], dtype=object)
+    sample_snapshot.save(path)
+    with pytest.raises(ValueError):
+        Snapshot.load(path)
+    assert Snapshot.load(path, allow_pickle=True).num_nodes == 3
+
+
+@pytest.mark.integration
+def test_snapshot(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    create_node(g, labels=['other'], properties={'name': 'x'})
+
+    snap = snapshot(g, labels=['thingy'], rel_types=['points_to'],
+                    node_properties=['name'], rel_properties=['sample'])
+
+    assert sorted(snap.node_ids.tolist()) == sorted([node_a._id, node_b._id])
+    assert snap.num_rels == 1
+    assert snap.neighbours(node_a._id).tolist() == [node_b._id]
+    assert sorted(snap.node_properties['name'].tolist()) == ['a', 'b']
+    assert snap.rel_properties['sample'].tolist() == ['property']
+
+
+class FakeStore(object):
+    """Just enough of a graph to answer the queries of :func:`refresh`."""
+
+    def __init__(self):
+        self.nodes = {}  # id -> (watermark, name)
+        self.rels = {}   # id -> (start, end, watermark, weight)
+
+    def stream(self, graph, query, **params):
+        since = params.get('since')
+        if 'IN {ids}' in query:
+            table = self.rels if '-[e]->' in query else self.nodes
+            return [{'id': i} for i in params['ids'] if i in table]
+        elif 'MATCH (n)' in query:
+            return [{'id': i, 'wm': wm, 'p0': name}
+                    for i, (wm, name) in sorted(self.nodes.items())
+                    if since is None or wm > since]
+        return [{'id': i, 'start': a, 'end': b, 'wm': wm, 'p0': weight}
+                for i, (a, b, wm, weight) in sorted(self.rels.items())
+                if since is None or wm > since]
+
+
+@pytest.fixture
+def fake_store(monkeypatch):
+    store = FakeStore()
+    store.nodes.update({1: (1, 'a'), 2: (1, 'b'), 3: (1, 'c')})
+    store.rels.update({10: (1, 2, 1, 0.5), 11: (2, 3, 2, 1.5)})
+    monkeypatch.setattr(py2neo_compat.snapshot, 'cypher_stream', store.stream)
+    monkeypatch.setattr(py2neo_compat.bulk, 'cypher_stream', store.stream)
+    return store
+
+
+def _take(store):
+    return snapshot(None, node_properties=['name'],
+                    rel_properties=['weight'], watermark='version')
+
+
+@pytest.mark.unit
+def test_refresh_without_watermark(sample_snapshot):
+    with pytest.raises(ValueError):
+        refresh(None, sample_snapshot)
+
+
+@pytest.mark.unit
+def test_refresh_patches_in_place(fake_store):
+    snap = _take(fake_store)
+    assert snap.watermark == 2
+
+    fake_store.nodes[2] = (3, 'B')
+    fake_store.nodes[4] = (3, 'd')
+    fake_store.rels[11] = (2, 3, 3, 9.0)
+    fake_store.rels[12] = (3, 4, 3, 2.5)
+
+    stats = refresh(None, snap, compact_ratio=1)
+
+    assert (stats.nodes_changed, stats.nodes_added) == (1, 1)
+    assert (stats.rels_changed, stats.rels_added) == (1, 1)
+    assert not stats.compacted
+    assert snap.watermark == 3
+    assert snap.node_properties['name'].tolist() == ['a', 'B', 'c', 'd']
+    assert snap.neighbours(3).tolist() == [4]
+    assert snap.num_rels == 3
+    starts, ends, rel_ids = snap.edges()
+    assert sorted(rel_ids.tolist()) == [10, 11, 12]
+    assert snap.rel_properties['weight'].tolist() == [0.5, 9.0]
+
+
+@pytest.mark.unit
+def test_refresh_deletes_and_compacts(fake_store):
+    snap = _take(fake_store)
+
+    del fake_store.rels[11]
+    del fake_store.nodes[3]
+
+    stats = refresh(None, snap, compact_ratio=1)
+    assert (stats.nodes_deleted, stats.rels_deleted) == (1, 1)
+    assert snap.num_dead == 2
+    assert snap.index_of(3) == -1
+
+    refresh(None, snap, compact_ratio=0)
+    assert snap.num_dead == 0
+    assert snap.node_ids.tolist() == [1, 2]
+    assert snap.rel_ids.tolist() == [10]
+    assert snap.node_properties['name'].tolist() == ['a', 'b']
+
+
+@pytest.mark.unit
+def test_refresh_after_load(fake_store, tmpdir):
+    path = str(tmpdir.join('snapdir'))
+    _take(fake_store).save(path)
+    snap = Snapshot.load(path, mmap_mode='r')
+    assert snap.watermark == 2
+
+    fake_store.nodes[1] = (5, 'A')
+    refresh(None, snap)
+
+    assert snap.node_properties['name'].tolist() == ['A', 'b', 'c']
+
+
+@pytest.mark.unit
+def test_refresh_list_properties(fake_store):
+    fake_store.nodes.update({1: (1, ['a', 'b']), 2: (1, ['c', 'd']),
+                             3: (1, ['e', 'f'])})
+    snap = _take(fake_store)
+
+    fake_store.nodes[2] = (3, ['x', 'y', 'z'])
+    fake_store.nodes[4] = (3, ['w', 'v', 'u'])
+    refresh(None, snap)
+    fake_store.nodes[5] = (4, ['t'])
+    refresh(None, snap)
+
+    assert snap.node_properties['name'].shape == (5,)
+    assert snap.node_properties['name'].tolist() == [
+        ['a', 'b'], ['x', 'y', 'z'], ['e', 'f'], ['w', 'v', 'u'], ['t']]
+
+
+@pytest.mark.unit
+def test_save_after_nodes_added(fake_store, tmpdir):
+    fake_store.nodes.update({5: (1, 'e')})
+    snap = _take(fake_store)
+    fake_store.nodes[4] = (3, 'd')
+    fake_store.nodes[0] = (3, 'z')
+    refresh(None, snap)
+    assert snap.node_ids.tolist() == [1, 2, 3, 5, 0, 4]
+
+    path = str(tmpdir.join('snapdir'))
+    snap.save(path)
+    loaded = Snapshot.load(path)
+
+    assert loaded.node_ids.tolist() == [0, 1, 2, 3, 4, 5]
+    assert loaded.index_of([5, 0, 4, 1]).tolist() == [5, 0, 4, 1]
+    assert loaded.node_properties['name'].tolist() == \
+        ['z', 'a', 'b', 'c', 'd', 'e']
+    assert loaded.neighbours(2).tolist() == [3]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.spill`."""
+
+from __future__ import absolute_import, print_function
+
+from collections import OrderedDict
+
+import pytest  # noqa
+
+import py2neo_compat
+import py2neo_compat.spill
+from py2neo_compat.spill import spill_records
+
+
+@pytest.fixture
+def dict_records(monkeypatch):
+    """Use ordered dicts as records."""
+    monkeypatch.setattr(py2neo_compat.spill, 'record_keys', list)
+
+    def make(count):
+        return [OrderedDict([('i', i), ('name', 'row %d' % i),
+                             ('tags', ('a', 'b'))])
+                for i in range(count)]
+    return make
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('threshold, spilled', [(10 ** 9, False), (100, True)])
+def test_spill_records(dict_records, threshold, spilled):
+    with spill_records(dict_records(50), threshold) as result:
+        assert result.spilled is spilled
+        assert len(result) == 50
+        assert result.columns == ['i', 'name', 'tags']
+
+        assert result[0]['name'] == 'row 0'
+        assert result[0][0] == 0
+        assert result[0]['tags'] == ['a', 'b']
+        assert result[-1]['i'] == 49
+        assert [row['i'] for row in result[10:20:5]] == [10, 15]
+        assert result[3].keys() == ['i', 'name', 'tags']
+        with pytest.raises(IndexError):
+            result[50]
+
+        # Iterable more than once
+        assert [row['i'] for row in result] == list(range(50))
+        assert [row['i'] for row in result] == list(range(50))
+
+    assert len(result) == 0
+
+
+@pytest.mark.unit
+def test_spill_records_empty(dict_records):
+    result = spill_records(dict_records(0), 0)
+    assert not result.spilled
+    assert len(result) == 0
+    assert list(result) == []
+
+
+@pytest.mark.integration
+def test_cypher_execute_spill_threshold(sample_graph_and_nodes):
+    graph, _, _ = sample_graph_and_nodes
+    # language=cypher
+    query = 'MATCH (n) RETURN n, ID(n) AS id ORDER BY id'
+
+    expected = py2neo_compat.cypher_execute(graph, query)
+    with py2neo_compat.cypher_execute(graph, query,
+                                      spill_threshold=0) as result:
+        assert result.spilled
+        assert len(result) == len(expected)
+        assert [row['id'] for row in result] == \
+            [row['id'] for row in expected]
+        assert result[0]['n']['properties'] == \
+            py2neo_compat.to_dict(expected[0]['n'])
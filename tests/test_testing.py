@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.testing`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+import py2neo_compat.testing
+from py2neo_compat.schema import (
+    SchemaItem, create_schema, schema_constraints, schema_diff, schema_indexes,
+)
+from py2neo_compat.testing import (
+    GraphDump, dump_graph, load_dump, reset_graph, restore_graph, save_dump,
+)
+
+SAMPLE_DUMP = GraphDump(
+    nodes=[(10, ['thingy'], {'name': 'a'}),
+           (11, [], {}),
+           (12, ['thingy'], {'name': 'b'})],
+    rels=[(10, 12, 'points_to', {'sample': 'property'})],
+    schema={'indexes': [SchemaItem('thingy', 'name')]},
+)
+
+
+@pytest.mark.unit
+def test_schema_diff():
+    a, b, c = (SchemaItem('thingy', key) for key in 'abc')
+
+    drop, create = schema_diff(
+        {'indexes': [a, b], 'uniqueness_constraints': [c]},
+        {'indexes': [b, c]})
+
+    assert drop == {'indexes': [a], 'uniqueness_constraints': [c]}
+    assert create == {'indexes': [c]}
+    assert schema_diff({'indexes': [a]}, {'indexes': [a]}) == ({}, {})
+
+
+@pytest.mark.unit
+def test_save_load_dump(tmpdir):
+    path = str(tmpdir.join('dump.json'))
+    save_dump(SAMPLE_DUMP, path)
+
+    assert load_dump(path) == SAMPLE_DUMP
+
+
+@pytest.mark.unit
+def test_restore_graph_batches(monkeypatch):
+    calls = []
+
+    def fake_execute(graph, query, rows):
+        calls.append((query, rows))
+        return [{'key': row['key'], 'id': row['key'] + 100}
+                for row in rows if 'key' in row]
+
+    monkeypatch.setattr(py2neo_compat.testing, 'cypher_execute', fake_execute)
+
+    ids = restore_graph(None, SAMPLE_DUMP, batch_size=1)
+
+    assert ids == {10: 110, 11: 111, 12: 112}
+    assert [len(rows) for _, rows in calls] == [1, 1, 1, 1]
+    assert 'CREATE (n:`thingy`)' in calls[0][0]
+    assert 'CREATE (n)' in calls[2][0]
+    assert calls[3][1] == [{'start': 110, 'end': 112,
+                            'properties': {'sample': 'property'}}]
+
+
+@pytest.mark.integration
+def test_dump_reset_restore(sample_graph):
+    g = sample_graph
+    create_schema(g, {'indexes': [SchemaItem('thingy', 'name')]})
+    dump = dump_graph(g)
+
+    reset_graph(g, keep_schema=False)
+    assert g.order == g.size == 0
+    assert not schema_indexes(g)
+
+    reset_graph(g, keep_schema=False, baseline=dump)
+    assert (g.order, g.size) == (2, 1)
+    assert schema_indexes(g) == [('thingy', ['name'])]
+    assert not schema_constraints(g)
+    assert sorted(props['name'] for _, _, props in dump_graph(g).nodes) \
+        == ['a', 'b']
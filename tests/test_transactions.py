@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.transactions`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+import py2neo_compat.transactions
+from py2neo_compat import (
+    cypher_execute, cypher_execute_many, enable_query_cache, transaction,
+)
+from py2neo_compat.cancel import CancellationToken, QueryCancelled
+from py2neo_compat.transactions import StatementError
+from py2neo_compat.util import SimpleNamespace
+
+
+@pytest.fixture
+def fake_tx(monkeypatch):
+    """Record calls to the version-specific transaction functions."""
+    log = []
+
+    def begin(graph, eager=False):
+        log.append('begin')
+        return SimpleNamespace(statements=[])
+
+    def run(tx, query, params):
+        log.append(query)
+        if query == 'bad':
+            raise ValueError(query)
+        return iter([params])
+
+    def run_many(tx, statements):
+        return [list(run(tx, query, params)) for query, params in statements]
+
+    for name, func in [
+        ('begin_transaction', begin),
+        ('transaction_run', run),
+        ('transaction_run_many', run_many),
+        ('commit_transaction', lambda graph, tx: log.append('commit')),
+        ('rollback_transaction', lambda graph, tx: log.append('rollback')),
+        ('interrupt_transaction', lambda graph, tx: log.append('interrupt')),
+    ]:
+        monkeypatch.setattr(py2neo_compat.transactions, name, func)
+    return log
+
+
+@pytest.mark.unit
+def test_transaction_commit_every(fake_tx):
+    with transaction(None, commit_every=2) as tx:
+        assert tx.execute('a', x=1) == [{'x': 1}]
+        tx.execute('b')
+        tx.execute('c')
+
+    assert fake_tx == ['begin', 'a', 'b', 'commit', 'begin', 'c', 'commit']
+    assert tx.committed == 3
+
+
+@pytest.mark.unit
+def test_transaction_rollback(fake_tx):
+    with pytest.raises(RuntimeError):
+        with transaction(None) as tx:
+            tx.execute('a')
+            raise RuntimeError
+
+    assert fake_tx == ['begin', 'a', 'rollback']
+    assert tx.committed == 0
+
+
+@pytest.mark.unit
+def test_transaction_unused(fake_tx):
+    with transaction(None):
+        pass
+
+    assert fake_tx == []
+
+
+@pytest.mark.unit
+def test_transaction_invalidates_query_cache(fake_tx):
+    graph = SimpleNamespace()
+    cache = enable_query_cache(graph)
+    cache.put('thingy', [], frozenset(['thingy']))
+    cache.put('other', [], frozenset(['other']))
+
+    with transaction(graph) as tx:
+        tx.execute('MATCH (n:other) RETURN n')
+        tx.execute('CREATE (n:thingy)')
+        assert len(cache) == 2
+
+    assert cache.get('thingy') is None
+    assert cache.get('other') == []
+
+
+@pytest.mark.unit
+def test_cypher_execute_many(fake_tx):
+    results = cypher_execute_many(None, [('a', {'x': 1}), ('b', None),
+                                         ('c', {})], group_size=2)
+
+    assert results == [[{'x': 1}], [None], [{}]]
+    assert fake_tx == ['begin', 'a', 'b', 'commit', 'begin', 'c', 'commit']
+
+
+@pytest.mark.unit
+def test_cypher_execute_many_error(fake_tx):
+    statements = [('a', {}), ('b', {}), ('c', {}), ('bad', {'y': 2}),
+                  ('d', {})]
+
+    with pytest.raises(StatementError) as excinfo:
+        cypher_execute_many(None, statements, group_size=2)
+
+    assert excinfo.value.index == 3
+    assert excinfo.value.params == {'y': 2}
+    assert list(excinfo.value.group) == [2, 3]
+    assert excinfo.value.results == [[{}], [{}]]
+    assert isinstance(excinfo.value.__cause__, ValueError)
+    assert fake_tx[-4:] == ['begin', 'c', 'bad', 'rollback']
+    assert 'd' not in fake_tx
+
+
+@pytest.mark.unit
+def test_cypher_execute_many_error_unknown(fake_tx, monkeypatch):
+    failures = [ValueError('deadlock')]
+
+    def run_many(tx, statements):
+        if failures:
+            raise failures.pop()
+        return [[] for _ in statements]
+
+    monkeypatch.setattr(py2neo_compat.transactions, 'transaction_run_many',
+                        run_many)
+    statements = [('a', {}), ('b', {}), ('c', {})]
+
+    with pytest.raises(StatementError) as excinfo:
+        cypher_execute_many(None, statements, group_size=2)
+
+    assert excinfo.value.index is None
+    assert excinfo.value.query is None
+    assert list(excinfo.value.group) == [0, 1]
+    assert 'statement in 0..1 failed' in str(excinfo.value)
+
+
+@pytest.mark.unit
+def test_cypher_execute_many_error_index_known(fake_tx, monkeypatch):
+    """A failure which says which statement failed is not replayed."""
+    def run_many(tx, statements):
+        fake_tx.append('run_many')
+        error = ValueError('bad')
+        error.statement_index = 1
+        raise error
+
+    monkeypatch.setattr(py2neo_compat.transactions, 'transaction_run_many',
+                        run_many)
+
+    with pytest.raises(StatementError) as excinfo:
+        cypher_execute_many(None, [('a', {}), ('b', {'y': 2})])
+
+    assert excinfo.value.index == 1
+    assert excinfo.value.params == {'y': 2}
+    assert fake_tx == ['begin', 'run_many', 'rollback']
+
+
+@pytest.mark.unit
+def test_transaction_run_many_index():
+    if py2neo_compat.py2neo_ver != 2021:
+        pytest.skip('statements only run one by one on py2neo 2021')
+    from py2neo_compat.py2neo_compat_v2021 import transaction_run_many
+
+    def run(query, params):
+        if query == 'bad':
+            raise ValueError(query)
+        return [params]
+
+    tx = SimpleNamespace(run=run)
+    with pytest.raises(ValueError) as excinfo:
+        transaction_run_many(tx, [('a', {}), ('b', {}), ('bad', {})])
+    assert excinfo.value.statement_index == 2
+
+
+@pytest.mark.integration
+def test_cypher_execute_many_integration(neo4j_graph):
+    g = neo4j_graph
+    create = 'CREATE (n:thingy {name: {name}}) RETURN n.name AS name'
+
+    results = cypher_execute_many(g, [(create, {'name': 'a'}),
+                                      (create, {'name': 'b'})])
+    assert [[row['name'] for row in rows] for rows in results] \
+        == [['a'], ['b']]
+
+    with pytest.raises(StatementError) as excinfo:
+        cypher_execute_many(g, [(create, {'name': 'c'}),
+                                ('RETURN 1 / 0', None)])
+    assert excinfo.value.index == 1
+    assert len(cypher_execute(g, 'MATCH (n:thingy) RETURN n')) == 2
+
+
+@pytest.mark.integration
+def test_transaction(neo4j_graph):
+    g = neo4j_graph
+
+    with transaction(g) as tx:
+        tx.execute('CREATE (n:thingy {name: {name}})', name='a')
+        names = [row['name'] for row in
+                 tx.stream('MATCH (n:thingy) RETURN n.name AS name')]
+    assert names == ['a']
+
+    with pytest.raises(RuntimeError):
+        with transaction(g) as tx:
+            tx.execute('CREATE (n:thingy {name: {name}})', name='b')
+            raise RuntimeError
+
+    with transaction(g, commit_every=1) as tx:
+        tx.execute('CREATE (n:thingy {name: {name}})', name='c')
+        tx.execute('CREATE (n:thingy {name: {name}})', name='d')
+        tx.rollback()
+
+    rows = cypher_execute(g, 'MATCH (n:thingy) RETURN n.name AS name'
+                             ' ORDER BY name')
+    assert [row['name'] for row in rows] == ['a', 'c']
+
+
+@pytest.mark.unit
+def test_transaction_cancel(fake_tx):
+    token = CancellationToken()
+    with pytest.raises(QueryCancelled):
+        with transaction(None, cancel=token) as tx:
+            records = tx.stream('a', x=1)
+            token.cancel()
+            list(records)
+
+    assert fake_tx == ['begin', 'a', 'interrupt', 'rollback']
+    assert tx.committed == 0
+
+
+@pytest.mark.unit
+def test_cypher_execute_many_cancel(fake_tx):
+    token = CancellationToken()
+    token.cancel()
+    with pytest.raises(QueryCancelled):
+        cypher_execute_many(None, [('a', None)], cancel=token)
+
+    assert fake_tx == []
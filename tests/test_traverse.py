@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.traverse`."""
+
+from __future__ import absolute_import, print_function
+
+import pytest  # noqa
+
+import py2neo_compat.traverse
+from py2neo_compat import create_node, foremost
+from py2neo_compat.traverse import IdentitySet, bfs, dfs
+from py2neo_compat.util import SimpleNamespace
+
+#      0
+#     / \
+#    1   2
+#   / \   \
+#  3   4 - 5      (4 -> 5, and 5 -> 0 closes a cycle)
+EDGES = {0: [1, 2], 1: [3, 4], 2: [5], 3: [], 4: [5], 5: [0]}
+
+
+@pytest.fixture
+def fake_graph(monkeypatch):
+    """Serve :data:`EDGES` from a fake `expand`, recording each batch."""
+    nodes = {i: SimpleNamespace(_id=i) for i in EDGES}
+    batches = []
+
+    def fake_expand(graph, ids, rel_type=None, direction='out',
+                    batch_size=1000):
+        batches.append(list(ids))
+        return {i: [('rel', nodes[j]) for j in EDGES[i]] for i in ids}
+
+    monkeypatch.setattr(py2neo_compat.traverse, 'expand', fake_expand)
+    return nodes, batches
+
+
+def _ids(steps):
+    return [step.node._id for step in steps]
+
+
+@pytest.mark.unit
+def test_identity_set():
+    ids = IdentitySet([3, 1000])
+    assert ids.add(7)
+    assert not ids.add(3)
+    assert 1000 in ids
+    assert 999 not in ids
+    assert 10 ** 6 not in ids
+    assert len(ids) == 3
+    assert sorted(ids) == [3, 7, 1000]
+    assert -1 not in ids
+    with pytest.raises(ValueError):
+        ids.add(-1)
+
+
+@pytest.mark.unit
+def test_identity_set_sparse():
+    ids = IdentitySet([5, 2 ** 31])
+    assert ids._set is not None
+    assert len(ids._bits) == 0
+    assert 5 in ids and 2 ** 31 in ids
+    assert not ids.add(5)
+    assert ids.add(6)
+    assert len(ids) == 3
+
+
+@pytest.mark.unit
+def test_bfs(fake_graph):
+    nodes, batches = fake_graph
+
+    steps = list(bfs(None, [nodes[0]]))
+
+    assert _ids(steps) == [0, 1, 2, 3, 4, 5]
+    assert [s.depth for s in steps] == [0, 1, 1, 2, 2, 2]
+    assert steps[-1].parent == 2
+    assert batches == [[0], [1, 2], [3, 4, 5]]
+
+
+@pytest.mark.unit
+def test_bfs_max_depth_prune_until(fake_graph):
+    nodes, _ = fake_graph
+
+    assert _ids(bfs(None, [nodes[0]], max_depth=1)) == [0, 1, 2]
+    assert _ids(bfs(None, [nodes[0]],
+                    prune=lambda s: s.node._id == 1)) == [0, 1, 2, 5]
+    assert _ids(bfs(None, [nodes[0]],
+                    until=lambda s: s.node._id == 2)) == [0, 1, 2]
+
+
+@pytest.mark.unit
+def test_dfs(fake_graph):
+    nodes, batches = fake_graph
+
+    steps = list(dfs(None, [nodes[0]]))
+
+    assert _ids(steps) == [0, 1, 3, 4, 5, 2]
+    assert [s.depth for s in steps] == [0, 1, 2, 2, 3, 1]
+    # Siblings still on the stack are expanded along with the popped node
+    assert batches[1] == [1, 2]
+    assert sum(len(b) for b in batches) == len(EDGES)
+
+
+@pytest.mark.unit
+def test_dfs_max_depth(fake_graph):
+    nodes, _ = fake_graph
+
+    assert _ids(dfs(None, [nodes[0]], max_depth=1)) == [0, 1, 2]
+
+
+@pytest.mark.integration
+def test_bfs_graph(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+    node_c = create_node(g, labels=['thingy'], properties={'name': 'c'})
+    foremost(g.create((node_b, 'points_to', node_c)))
+
+    steps = list(bfs(g, [node_a], rel_types=['points_to']))
+
+    assert [s.node for s in steps] == [node_a, node_b, node_c]
+    assert steps[2].rel.start_node == node_b
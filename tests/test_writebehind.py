@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for :mod:`py2neo_compat.writebehind`."""
+
+from __future__ import absolute_import, print_function
+
+import threading
+
+import pytest  # noqa
+from six.moves import queue
+
+import py2neo_compat.writebehind
+from py2neo_compat import cypher_execute, foremost
+from py2neo_compat.batching import AdaptiveBatcher
+from py2neo_compat.metrics import Metrics
+from py2neo_compat.util import SimpleNamespace
+from py2neo_compat.writebehind import WriteBehindQueue
+
+
+def entity(entity_id):
+    return SimpleNamespace(_id=entity_id, graph=None, graph_db=None,
+                           labels=set())
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    """Queries run through a fake ``cypher_execute``, as ``(query, rows)``."""
+    calls = []
+
+    def fake_execute(graph, query, rows):
+        calls.append((query, rows))
+        if 'fail' in query:
+            raise ValueError('fail')
+        if 'CREATE (e' in query:
+            return [{'i': row['i'], 'e': row['properties']} for row in rows]
+        if 'CREATE UNIQUE' in query:
+            return [{'i': row['i'], 'e': (row['start_id'], row['end_id'])}
+                    for row in rows if row['end_id'] != 404]
+        return [{'i': row['i']} for row in rows]
+
+    monkeypatch.setattr(py2neo_compat.writebehind, 'cypher_execute',
+                        fake_execute)
+    return calls
+
+
+@pytest.mark.unit
+def test_write_behind_merges(executed):
+    metrics = Metrics()
+    a, b = entity(1), entity(2)
+    with WriteBehindQueue(None, flush_interval=60, metrics=metrics) as wbq:
+        created = [wbq.create_node(['thingy'], {'name': 'a'}),
+                   wbq.create_node(['thingy'], {'name': 'b'}),
+                   wbq.create_node(properties={'name': 'c'})]
+        updated = [wbq.update_properties(a, {'x': 1, 'y': 1}),
+                   wbq.update_properties(b, {'x': 2}),
+                   wbq.update_properties(a, {'y': 2})]
+        rels = [wbq.create_unique_rel(a, 'KNOWS', b),
+                wbq.create_unique_rel(a, 'KNOWS', b),
+                wbq.create_unique_rel(a, 'KNOWS', entity(404))]
+        assert not created[0].done()
+        assert wbq.flush(timeout=5)
+
+    assert [f.result() for f in created] == \
+        [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]
+    assert [f.result() for f in updated] == [None, None, None]
+    assert [f.result() for f in rels] == [(1, 2), (1, 2), None]
+
+    assert len(executed) == 4
+    assert ':`thingy`' in executed[0][0]
+    assert [row['properties'] for row in executed[2][1]] == \
+        [{'x': 1, 'y': 2}, {'x': 2}]
+    assert len(executed[3][1]) == 2
+    assert metrics.get('write_behind.queued') == 9
+    assert metrics.get('write_behind.batches') == 1
+    assert wbq.closed
+
+
+@pytest.mark.unit
+def test_write_behind_flushes_on_size(executed):
+    with WriteBehindQueue(None, batch_size=2, flush_interval=60) as wbq:
+        futures = [wbq.create_node(properties={'n': n}) for n in range(5)]
+        futures[3].result(timeout=5)
+        assert [len(rows) for _, rows in executed] == [2, 2]
+    assert [len(rows) for _, rows in executed] == [2, 2, 1]
+
+
+@pytest.mark.unit
+def test_write_behind_flushes_on_time(executed):
+    with WriteBehindQueue(None, flush_interval=0.01) as wbq:
+        assert wbq.create_node().result(timeout=5) == {}
+
+
+@pytest.mark.unit
+def test_write_behind_errors(executed):
+    errors = []
+    wbq = WriteBehindQueue(None, flush_interval=60,
+                           on_error=lambda e, writes: errors.append(writes))
+    failed = wbq.create_node(['fail'])
+    ok = wbq.create_node(['thingy'])
+    wbq.close()
+
+    with pytest.raises(ValueError):
+        failed.result()
+    assert ok.result() == {}
+    assert [w.operation for writes in errors for w in writes] == \
+        ['create_node']
+
+    with pytest.raises(RuntimeError):
+        wbq.create_node()
+
+    # Unbound entities are refused before they can spoil a batch
+    wbq = WriteBehindQueue(None, flush_interval=60)
+    node = wbq.create_node()
+    with pytest.raises(ValueError):
+        wbq.update_properties(entity(None), {})
+    with pytest.raises(ValueError):
+        wbq.create_unique_rel(entity(1), 'KNOWS', entity(None))
+    with pytest.raises(ValueError):
+        wbq.update_properties(None, {})
+    wbq.close()
+    assert node.result() == {}
+
+
+@pytest.mark.unit
+def test_write_behind_backpressure(monkeypatch):
+    release = threading.Event()
+
+    def slow_execute(graph, query, rows):
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(py2neo_compat.writebehind, 'cypher_execute',
+                        slow_execute)
+    wbq = WriteBehindQueue(None, maxsize=1, batch_size=1, put_timeout=0.01)
+    first = wbq.create_node()
+    while not first.running():
+        release.wait(0.001)  # until taken by the worker
+    wbq.create_node()
+    with pytest.raises(queue.Full):
+        wbq.create_node()
+    release.set()
+    wbq.close()
+
+
+@pytest.mark.unit
+def test_write_behind_partial_failure(monkeypatch):
+    """Writes committed before a failed batch still invalidate the cache."""
+    calls, invalidated = [], []
+
+    def fake_execute(graph, query, rows):
+        calls.append(len(rows))
+        if len(rows) > 2:
+            raise MemoryError()
+        if any(row.get('end_id') == 99 for row in rows):
+            raise ValueError('fail')
+        return [{'i': row['i'], 'e': row.get('end_id')} for row in rows]
+
+    monkeypatch.setattr(py2neo_compat.writebehind, 'cypher_execute',
+                        fake_execute)
+    monkeypatch.setattr(py2neo_compat.writebehind, 'invalidate_queries',
+                        lambda graph, tags: invalidated.append(list(tags)))
+
+    # Unique relationships are split after an overload
+    batcher = AdaptiveBatcher(initial=4, clock=lambda: 0.0)
+    with WriteBehindQueue(None, batch_size=batcher, flush_interval=60) as wbq:
+        rels = [wbq.create_unique_rel(entity(1), 'KNOWS', entity(end))
+                for end in (2, 3, 4, 99)]
+    assert calls == [4, 2, 2]
+    assert [f.result() for f in rels[:2]] == [2, 3]
+    assert all(f.exception() is not None for f in rels[2:])
+    assert invalidated == [['KNOWS']]
+
+    # Node creation is not
+    del calls[:], invalidated[:]
+    batcher = AdaptiveBatcher(initial=4, clock=lambda: 0.0)
+    with WriteBehindQueue(None, batch_size=batcher, flush_interval=60) as wbq:
+        nodes = [wbq.create_node(['thingy']) for _ in range(4)]
+    assert calls == [4]
+    assert all(isinstance(f.exception(), MemoryError) for f in nodes)
+    assert invalidated == []
+
+
+@pytest.mark.unit
+def test_write_behind_close_when_full(monkeypatch):
+    release = threading.Event()
+
+    def slow_execute(graph, query, rows):
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(py2neo_compat.writebehind, 'cypher_execute',
+                        slow_execute)
+    wbq = WriteBehindQueue(None, maxsize=1, batch_size=1, put_timeout=0.01)
+    first = wbq.create_node()
+    while not first.running():
+        release.wait(0.001)  # until taken by the worker
+    last = wbq.create_node()
+    with pytest.raises(queue.Full):
+        wbq.close()
+    assert not wbq.closed
+
+    release.set()
+    wbq.close(timeout=5)
+    assert wbq.closed
+    assert last.result() is None
+
+
+@pytest.mark.integration
+def test_write_behind(sample_graph_and_nodes):
+    g, node_a, node_b = sample_graph_and_nodes
+
+    with WriteBehindQueue(g) as wbq:
+        node = wbq.create_node(['thingy'], {'name': 'c'})
+        wbq.update_properties(node_a, {'size': 3})
+        rel = wbq.create_unique_rel(node_a, 'knows', node_b)
+
+    assert 'thingy' in node.result().labels
+    assert rel.result() is not None
+    assert foremost(cypher_execute(
+        g, 'MATCH (n) WHERE ID(n) = {id} RETURN n.size AS size',
+        id=node_a._id))['size'] == 3